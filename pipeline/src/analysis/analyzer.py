@@ -1,23 +1,349 @@
 """Gemini API-based analysis pipeline using google-genai SDK."""
 
+import asyncio
+import heapq
 import json
 import os
+import time
+from datetime import datetime
 
 from google import genai
-
-from src.analysis.prompts import TRIAGE_PROMPT, ANALYSIS_PROMPT, RESOURCES_PROMPT
-from src.config import RawArticle
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+from src.analysis.clustering import StoryCluster
+from src.analysis.context_cache import SharedContext
+from src.analysis.governor import PRIORITY_BACKGROUND, PRIORITY_CRITICAL, RateGovernor, get_governor
+from src.analysis.json_stream import ArrayItemStream, extract_balanced_json
+from src.analysis.llm_cache import get_response_cache, usage_to_dict
+from src.analysis.packer import CHARS_PER_TOKEN, estimate_tokens, pack_articles, serialize_article
+from src.analysis.passages import select_passages
+from src.analysis.routing import ModelRoute, mark_dispatched, route_call
+from src.analysis.prompts import (
+    TRIAGE_PROMPT,
+    TRIAGE_SHARD_PROMPT,
+    TRIAGE_REDUCE_PROMPT,
+    ANALYSIS_PROMPT,
+    ANALYSIS_CONTINUE_PROMPT,
+    SECTION_PROMPT,
+    ASSEMBLY_PROMPT,
+    RESOURCES_PROMPT,
+)
+from src.config import (
+    AnalysisFraming,
+    CuratedResource,
+    RawArticle,
+    ResourceList,
+    TriagedStory,
+    TriageResult,
+    ANALYSIS_CONTENT_CHARS,
+    ANALYSIS_MODE,
+    ANALYSIS_SECTIONS,
+    ANALYSIS_PARTIAL_PATH,
+    ANALYSIS_STREAMING,
+    ANALYSIS_STREAM_RESUMES,
+    GEMINI_FLASH_RPM,
+    GEMINI_FLASH_TPM,
+    GEMINI_PRO_RPM,
+    GEMINI_PRO_TPM,
+    HEDGE_FLASH_SECONDS,
+    HEDGE_PRO_SECONDS,
+    RESOURCES_CONTENT_CHARS,
+    TRIAGE_CONTENT_CHARS,
+    TRIAGE_INPUT_TOKEN_BUDGET,
+    TRIAGE_SHARD_SIZE,
+    TRIAGE_SHARD_CONCURRENCY,
+)
 
 # Model configuration
 FLASH_MODEL = os.getenv("GEMINI_FLASH_MODEL", "gemini-3-flash-preview")
 PRO_MODEL = os.getenv("GEMINI_PRO_MODEL", "gemini-3-pro-preview")
+FLASH_FALLBACK_MODEL = os.getenv("GEMINI_FLASH_FALLBACK_MODEL", "gemini-2.5-flash")
+PRO_FALLBACK_MODEL = os.getenv("GEMINI_PRO_FALLBACK_MODEL", "gemini-2.5-pro")
+
+
+def _route_models(env_var: str, default: list[str]) -> list[str]:
+    """Comma-separated model list from the environment, e.g. TRIAGE_MODELS=a,b."""
+    value = os.getenv(env_var, "")
+    models = [m.strip() for m in value.split(",") if m.strip()]
+    return models or default
+
+
+# Ordered fallback list and hedge deadline per stage
+TRIAGE_ROUTE = ModelRoute(
+    "triage",
+    _route_models("TRIAGE_MODELS", [FLASH_MODEL, FLASH_FALLBACK_MODEL]),
+    HEDGE_FLASH_SECONDS,
+)
+ANALYSIS_ROUTE = ModelRoute(
+    "analysis",
+    _route_models("ANALYSIS_MODELS", [PRO_MODEL, PRO_FALLBACK_MODEL]),
+    HEDGE_PRO_SECONDS,
+)
+RESOURCES_ROUTE = ModelRoute(
+    "resources",
+    _route_models("RESOURCES_MODELS", [FLASH_MODEL, FLASH_FALLBACK_MODEL]),
+    HEDGE_FLASH_SECONDS,
+)
+
+_TRIAGE_CONFIG = {
+    "temperature": 0.3,
+    "max_output_tokens": 4000,
+    "response_mime_type": "application/json",
+    "response_schema": TriageResult,
+}
+
+_RESOURCES_CONFIG = {
+    "temperature": 0.3,
+    "max_output_tokens": 3000,
+    "response_mime_type": "application/json",
+    "response_schema": ResourceList,
+}
+
+_ANALYSIS_CONFIG = {
+    "temperature": 0.7,
+    "max_output_tokens": 8000,
+}
+
+_SECTION_CONFIG = {
+    "temperature": 0.7,
+    "max_output_tokens": 2500,
+}
+
+_ASSEMBLY_CONFIG = {
+    "temperature": 0.7,
+    "max_output_tokens": 2500,
+    "response_mime_type": "application/json",
+    "response_schema": AnalysisFraming,
+}
+
+
+_client: genai.Client | None = None
 
 
 def _get_client() -> genai.Client:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise RuntimeError("GEMINI_API_KEY environment variable is not set")
-    return genai.Client(api_key=api_key)
+    """Return the shared Gemini client, creating it on first use.
+
+    GEMINI_BASE_URL points the client at another endpoint, e.g. the offline
+    fake server in ``src.analysis.fake_gemini``; no API key is needed then.
+    """
+    global _client
+    if _client is None:
+        base_url = os.getenv("GEMINI_BASE_URL")
+        api_key = os.getenv("GEMINI_API_KEY")
+        if base_url:
+            _client = genai.Client(
+                api_key=api_key or "offline",
+                http_options=types.HttpOptions(base_url=base_url),
+            )
+        elif not api_key:
+            raise RuntimeError("GEMINI_API_KEY environment variable is not set")
+        else:
+            _client = genai.Client(api_key=api_key)
+    return _client
+
+
+def _governor(model: str) -> RateGovernor:
+    """The process-wide rate governor for ``model``'s quota."""
+    if model == PRO_MODEL or "-pro" in model:
+        return get_governor(model, GEMINI_PRO_RPM, GEMINI_PRO_TPM)
+    return get_governor(model, GEMINI_FLASH_RPM, GEMINI_FLASH_TPM)
+
+
+async def _generate(
+    model: str,
+    prompt: str,
+    config: dict,
+    label: str,
+    refresh: bool = False,
+    priority: int = PRIORITY_CRITICAL,
+    context: SharedContext | None = None,
+):
+    """Run one generate_content call on the async client and log token usage.
+
+    Uses ``client.aio`` so the event loop keeps serving other stages while
+    the model is working. Responses are served from and written to the
+    on-disk response cache; ``refresh`` skips the lookup (used on retries,
+    where the cached reply is the one that just failed). Calls that miss
+    the cache go through the model's rate governor, which also retries
+    429s with backoff. With a shared ``context`` the prompt follows the
+    context prefix, referenced as cached content when one is registered.
+    """
+    full_prompt = context.prompt(prompt) if context else prompt
+    cache = get_response_cache()
+    cache_key = cache.key(model, full_prompt, config)
+    if not refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"  {label}: served from response cache")
+            return cached
+
+    client = _get_client()
+    request, request_config = await _with_context(client, model, prompt, config, context)
+    governor = _governor(model)
+
+    def send():
+        # Runs once the governor grants a permit; a route's hedge clock starts here
+        mark_dispatched()
+        return client.aio.models.generate_content(
+            model=model,
+            contents=[{"role": "user", "parts": [{"text": request}]}],
+            config=request_config,
+        )
+
+    response, permit = await governor.call(send, estimate_tokens(full_prompt), priority, label)
+    governor.settle(permit, usage_to_dict(response).get("prompt_token_count"))
+    _log_usage(label, response)
+
+    cache.put(cache_key, response.text, usage_to_dict(response))
+    return response
+
+
+async def _with_context(
+    client,
+    model: str,
+    prompt: str,
+    config: dict,
+    context: SharedContext | None,
+) -> tuple[str, dict]:
+    """The request text and config for ``prompt`` behind an optional shared context."""
+    if context is None:
+        return prompt, config
+    name = await context.cache_name(client, model)
+    if name is None:
+        return context.prompt(prompt), config
+    return prompt, {**config, "cached_content": name}
+
+
+def _log_usage(label: str, response) -> None:
+    usage = usage_to_dict(response)
+    if not usage:
+        return
+    line = (
+        f"  {label} tokens — input: {usage.get('prompt_token_count')}, "
+        f"output: {usage.get('candidates_token_count')}"
+    )
+    if usage.get("cached_content_token_count"):
+        line += f" (cached input: {usage['cached_content_token_count']})"
+    print(line)
+
+
+async def _generate_routed(
+    route: ModelRoute,
+    prompt: str,
+    config: dict,
+    label: str,
+    refresh: bool = False,
+    priority: int = PRIORITY_CRITICAL,
+    context: SharedContext | None = None,
+):
+    """``_generate`` along a stage's model route, with fallback and hedging.
+
+    A reply cached from any model on the route is reused, so a rerun of a
+    call that a fallback or hedge answered doesn't go back to the API.
+    """
+    if not refresh:
+        full_prompt = context.prompt(prompt) if context else prompt
+        cache = get_response_cache()
+        for model in route.models:
+            cached = cache.get(cache.key(model, full_prompt, config))
+            if cached is not None:
+                print(f"  {label}: served from response cache ({model})")
+                return cached
+
+    response, _ = await route_call(
+        route,
+        lambda model: _generate(
+            model, prompt, config, label, refresh=refresh, priority=priority, context=context
+        ),
+        label,
+        signals_dispatch=True,
+    )
+    return response
+
+
+async def _generate_stream(
+    model: str,
+    prompt: str,
+    config: dict,
+    label: str,
+    partial_path: str,
+    max_resumes: int,
+    context: SharedContext | None = None,
+) -> str:
+    """Stream a long response, appending chunks to ``partial_path`` as they arrive.
+
+    Logs time-to-first-token and output tokens/sec. If the stream fails
+    midway, the request is resumed with a continuation prompt carrying the
+    text received so far, instead of regenerating the whole document.
+    """
+    cache = get_response_cache()
+    cache_key = cache.key(model, context.prompt(prompt) if context else prompt, config)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print(f"  {label}: served from response cache")
+        return cached.text
+
+    client = _get_client()
+    governor = _governor(model)
+    os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+    text = ""
+    usage = {}
+
+    with open(partial_path, "w", encoding="utf-8") as partial:
+        for attempt in range(max_resumes + 1):
+            request = prompt
+            if text:
+                request = f"{prompt}\n\n{ANALYSIS_CONTINUE_PROMPT.format(partial=text)}"
+            request, request_config = await _with_context(client, model, request, config, context)
+            estimated = estimate_tokens(request)
+            if "cached_content" in request_config:
+                estimated += context.tokens
+
+            start = time.perf_counter()
+            first_token_at = None
+            received = 0
+            try:
+                stream, permit = await governor.call(
+                    lambda: client.aio.models.generate_content_stream(
+                        model=model,
+                        contents=[{"role": "user", "parts": [{"text": request}]}],
+                        config=request_config,
+                    ),
+                    estimated,
+                    PRIORITY_CRITICAL,
+                    label,
+                )
+                async for chunk in stream:
+                    piece = chunk.text or ""
+                    if not piece:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter() - start
+                    text += piece
+                    received += len(piece)
+                    partial.write(piece)
+                    partial.flush()
+                    usage = usage_to_dict(chunk) or usage
+            except Exception as e:
+                if attempt == max_resumes:
+                    raise
+                print(f"  {label} stream interrupted after {len(text)} characters, resuming: {e}")
+                continue
+
+            governor.settle(permit, usage.get("prompt_token_count"))
+            elapsed = time.perf_counter() - start
+            output_tokens = usage.get("candidates_token_count") or estimate_tokens(text[len(text) - received:])
+            generating = elapsed - (first_token_at or 0.0)
+            rate = output_tokens / generating if generating > 0 else 0.0
+            print(
+                f"  {label} stream — time to first token: {first_token_at or 0.0:.2f}s, "
+                f"{rate:.1f} tokens/s, {len(text)} characters"
+            )
+            break
+
+    cache.put(cache_key, text, usage)
+    return text
 
 
 def _parse_json_response(text: str) -> dict:
@@ -32,165 +358,360 @@ def _parse_json_response(text: str) -> dict:
     try:
         return json.loads(text)
     except json.JSONDecodeError:
-        extracted = _extract_balanced_json(text)
+        extracted = extract_balanced_json(text)
         if extracted:
             return json.loads(extracted)
         raise
 
 
-def _extract_balanced_json(text: str) -> str | None:
-    """Best-effort extraction of the first balanced JSON object/array."""
-    start = None
-    for i, ch in enumerate(text):
-        if ch in "{[":
-            start = i
-            break
-    if start is None:
-        return None
-
-    opener = text[start]
-    closer = "}" if opener == "{" else "]"
-    depth = 0
-    in_string = False
-    escaped = False
-
-    for i in range(start, len(text)):
-        ch = text[i]
-        if in_string:
-            if escaped:
-                escaped = False
-                continue
-            if ch == "\\":
-                escaped = True
-                continue
-            if ch == "\"":
-                in_string = False
-            continue
+def _was_truncated(response) -> bool:
+    """True when the model stopped because it hit max_output_tokens."""
+    candidates = getattr(response, "candidates", None)
+    if not isinstance(candidates, list) or not candidates:
+        return False
+    reason = getattr(candidates[0], "finish_reason", None)
+    return getattr(reason, "value", reason) == "MAX_TOKENS"
+
+
+def _parse_structured(response, key: str, item_model: type[BaseModel], label: str) -> dict:
+    """Validate a schema-constrained JSON reply into ``{key: [item, ...]}``.
+
+    Output cut off at max_output_tokens, or broken partway through, keeps its
+    complete list items instead of failing the call. Items that don't
+    validate are dropped individually.
+    """
+    text = response.text or ""
+    try:
+        data = _parse_json_response(text)
+        items = data.get(key, []) if isinstance(data, dict) else []
+    except json.JSONDecodeError:
+        stream = ArrayItemStream(key)
+        stream.feed(text)
+        if not stream.items:
+            raise
+        items = stream.items
+        # An array that never closes means the text stopped early
+        reason = "truncated" if _was_truncated(response) or not stream.closed else "malformed"
+        print(f"  {label} output {reason}, salvaged {len(items)} complete items")
 
-        if ch == "\"":
-            in_string = True
+    valid = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            valid.append(item_model.model_validate(item).model_dump())
+        except ValidationError:
             continue
-        if ch == opener:
-            depth += 1
-        elif ch == closer:
-            depth -= 1
-            if depth == 0:
-                return text[start:i + 1]
-
-    return None
-
-
-def _articles_to_json(articles: list[RawArticle], max_content_len: int = 2000) -> str:
-    """Convert articles to a JSON string for LLM input, truncating content."""
-    items = []
-    for i, article in enumerate(articles):
-        content = article.content[:max_content_len]
-        items.append({
-            "index": i,
-            "title": article.title,
-            "url": article.url,
-            "source": article.source,
-            "content": content,
-            "score": article.score,
-            "tags": article.tags,
-        })
-    return json.dumps(items, indent=2)
-
-
-async def triage_articles(articles: list[RawArticle]) -> dict:
+    if len(valid) < len(items):
+        print(f"  {label}: dropped {len(items) - len(valid)} items that failed validation")
+    return {key: valid}
+
+
+def _articles_to_json(articles: list[RawArticle], max_content_len: int = TRIAGE_CONTENT_CHARS) -> str:
+    """Convert articles to a compact JSON string for LLM input, excerpting content."""
+    items = [
+        serialize_article(i, article, select_passages(article.content, article.title, max_content_len))
+        for i, article in enumerate(articles)
+    ]
+    return "[" + ",".join(items) + "]"
+
+
+async def triage_articles(
+    articles: list[RawArticle],
+    clusters: list[StoryCluster] | None = None,
+    focus: str = "",
+) -> dict:
     """Call 1 — Triage and categorize articles using Gemini Flash.
 
+    With ``clusters``, only one representative per story cluster is sent,
+    tagged with its member indices; member indices are added back to each
+    story's ``source_article_indices`` afterwards. Large inputs are triaged
+    in shards (see ``_sharded_triage``). ``focus`` is a digest profile's
+    subject (see ``config.DigestProfile``); stories are picked for it.
+
     Returns dict with 'stories' key containing list of triaged stories.
     """
-    client = _get_client()
-    articles_json = _articles_to_json(articles)
+    indices = None
+    members: dict[int, list[int]] = {}
+    if clusters:
+        indices = [c.representative for c in clusters]
+        members = {
+            c.representative: [m for m in c.members if m != c.representative]
+            for c in clusters
+            if len(c.members) > 1
+        }
+        print(f"  Triage over {len(indices)} story clusters ({len(articles)} articles)")
+
+    if len(articles if indices is None else indices) > TRIAGE_SHARD_SIZE:
+        result = await _sharded_triage(articles, indices, members, focus)
+    else:
+        result = await _triage_batch(articles, indices, _focused(TRIAGE_PROMPT, focus), "Triage", members)
+
+    if members:
+        for story in result.get("stories", []):
+            expanded = []
+            for idx in story.get("source_article_indices", []):
+                for member in [idx, *members.get(idx, [])]:
+                    if member not in expanded:
+                        expanded.append(member)
+            story["source_article_indices"] = expanded
+    return result
+
+
+def _focused(prompt: str, focus: str) -> str:
+    if not focus:
+        return prompt
+    return f"{prompt}\n\nThis digest focuses on {focus}. Pick the stories that matter most to that audience."
+
+
+async def _triage_batch(
+    articles: list[RawArticle],
+    indices: list[int] | None,
+    prompt: str,
+    label: str,
+    members: dict[int, list[int]] | None = None,
+) -> dict:
+    """Triage one batch of articles (all of them when ``indices`` is None)."""
+    packed = pack_articles(articles, TRIAGE_INPUT_TOKEN_BUDGET, indices=indices, members=members)
+    print(
+        f"  {label} input: ~{packed.tokens_used} tokens, "
+        f"{len(packed.included)} articles packed, {packed.dropped} dropped"
+    )
 
-    user_message = f"Here are the collected articles from this week:\n\n{articles_json}"
+    user_message = f"Here are the collected articles from this week:\n\n{packed.payload}"
 
     for attempt in range(2):
         try:
-            response = client.models.generate_content(
-                model=FLASH_MODEL,
-                contents=[
-                    {"role": "user", "parts": [{"text": f"{TRIAGE_PROMPT}\n\n{user_message}"}]}
-                ],
-                config={
-                    "temperature": 0.3,
-                    "max_output_tokens": 4000,
-                    "response_mime_type": "application/json",
-                },
+            response = await _generate_routed(
+                TRIAGE_ROUTE,
+                f"{prompt}\n\n{user_message}",
+                _TRIAGE_CONFIG,
+                label,
+                refresh=attempt > 0,
             )
-
-            result = _parse_json_response(response.text)
-
-            # Log token usage
-            if hasattr(response, "usage_metadata"):
-                usage = response.usage_metadata
-                print(f"  Triage tokens — input: {usage.prompt_token_count}, output: {usage.candidates_token_count}")
-
-            return result
+            return _parse_structured(response, "stories", TriagedStory, label)
         except json.JSONDecodeError:
             if attempt == 0:
-                print("  Triage JSON parse failed, retrying...")
+                print(f"  {label} JSON parse failed, retrying...")
                 continue
             raise
         except Exception as e:
             if attempt == 0:
-                print(f"  Triage error, retrying: {e}")
+                print(f"  {label} error, retrying: {e}")
                 continue
             raise
 
     return {"stories": []}
 
 
-async def deep_analysis(triage: dict, articles: list[RawArticle]) -> str:
-    """Call 2 — Deep analysis using Gemini Pro.
+def _balanced_shards(
+    articles: list[RawArticle],
+    shard_size: int,
+    indices: list[int] | None = None,
+) -> list[list[int]]:
+    """Split article indices into shards of roughly equal estimated prompt size.
 
-    Returns the full markdown analysis text.
+    Largest articles are placed first, each into the currently lightest shard.
     """
-    client = _get_client()
+    if indices is None:
+        indices = list(range(len(articles)))
+    num_shards = max(1, -(-len(indices) // shard_size))
+    heap = [(0, shard, []) for shard in range(num_shards)]
+    sizes = {
+        i: estimate_tokens(articles[i].title)
+        + min(articles[i].content_length, TRIAGE_CONTENT_CHARS) // CHARS_PER_TOKEN
+        for i in indices
+    }
+    for idx in sorted(sizes, key=sizes.get, reverse=True):
+        load, shard, members = heapq.heappop(heap)
+        members.append(idx)
+        heapq.heappush(heap, (load + sizes[idx], shard, members))
+    return [sorted(members) for _, _, members in sorted(heap, key=lambda item: item[1])]
+
+
+def _valid_indices(story: dict, num_articles: int) -> list[int]:
+    indices = story.get("source_article_indices", [])
+    if not isinstance(indices, list):
+        return []
+    return [i for i in indices if isinstance(i, int) and 0 <= i < num_articles]
+
+
+async def _sharded_triage(
+    articles: list[RawArticle],
+    indices: list[int] | None = None,
+    members: dict[int, list[int]] | None = None,
+    focus: str = "",
+) -> dict:
+    """Map-reduce triage for large article sets.
+
+    Map: each balanced shard is triaged concurrently (bounded by
+    TRIAGE_SHARD_CONCURRENCY) into candidate stories. Articles keep their
+    global indices throughout. Reduce: one call merges and re-ranks all
+    candidates into the final 8-15 stories.
+    """
+    shards = _balanced_shards(articles, TRIAGE_SHARD_SIZE, indices)
+    total = len(articles) if indices is None else len(indices)
+    print(f"  Sharded triage: {total} articles in {len(shards)} shards")
+
+    sem = asyncio.Semaphore(TRIAGE_SHARD_CONCURRENCY)
+
+    async def _map(shard_num: int, shard: list[int]) -> dict:
+        async with sem:
+            return await _triage_batch(
+                articles,
+                shard,
+                _focused(TRIAGE_SHARD_PROMPT, focus),
+                f"Triage shard {shard_num + 1}/{len(shards)}",
+                members,
+            )
+
+    results = await asyncio.gather(
+        *(_map(n, shard) for n, shard in enumerate(shards)),
+        return_exceptions=True,
+    )
+
+    candidates = []
+    for n, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"  Triage shard {n + 1} failed: {result}")
+            continue
+        for story in result.get("stories", []):
+            story["source_article_indices"] = _valid_indices(story, len(articles))
+            if story["source_article_indices"]:
+                candidates.append(story)
+
+    if not candidates:
+        return {"stories": []}
+
+    candidates_json = json.dumps(candidates, separators=(",", ":"), ensure_ascii=False)
+    user_message = f"Candidate stories from all batches:\n\n{candidates_json}"
+
+    for attempt in range(2):
+        try:
+            response = await _generate_routed(
+                TRIAGE_ROUTE,
+                f"{_focused(TRIAGE_REDUCE_PROMPT, focus)}\n\n{user_message}",
+                _TRIAGE_CONFIG,
+                "Triage reduce",
+                refresh=attempt > 0,
+            )
+            result = _parse_structured(response, "stories", TriagedStory, "Triage reduce")
+            break
+        except Exception as e:
+            if attempt == 0:
+                print(f"  Triage reduce error, retrying: {e}")
+                continue
+            # The map results are still usable: keep the most significant candidates
+            print(f"  Triage reduce failed, ranking candidates locally: {e}")
+            ranked = sorted(candidates, key=lambda s: s.get("significance", 0), reverse=True)
+            return {"stories": ranked[:15]}
 
-    # Build context: triaged stories + relevant source material
-    stories_context = json.dumps(triage.get("stories", []), indent=2)
+    for story in result.get("stories", []):
+        story["source_article_indices"] = _valid_indices(story, len(articles))
+    return result
 
-    # Gather source articles referenced by the triage
-    referenced_indices = set()
-    for story in triage.get("stories", []):
+
+def _source_material(stories: list[dict], articles: list[RawArticle]) -> list[dict]:
+    """Excerpts of the source articles referenced by ``stories``.
+
+    Each article is queried with its title plus the headlines of the stories
+    that cite it, so passage selection favors the story's angle.
+    """
+    headlines_by_index: dict[int, list[str]] = {}
+    for story in stories:
         for idx in story.get("source_article_indices", []):
-            referenced_indices.add(idx)
+            headlines_by_index.setdefault(idx, []).append(story.get("headline", ""))
 
     source_material = []
-    for idx in sorted(referenced_indices):
+    for idx in sorted(headlines_by_index):
         if idx < len(articles):
             a = articles[idx]
+            query = " ".join([a.title, *headlines_by_index[idx]])
             source_material.append({
                 "index": idx,
                 "title": a.title,
                 "url": a.url,
                 "source": a.source,
-                "content": a.content[:3000],
+                "content": select_passages(a.content, query, ANALYSIS_CONTENT_CHARS),
             })
+    return source_material
+
+
+def build_shared_context(
+    triage: dict,
+    articles: list[RawArticle],
+    week_ending: datetime | None = None,
+    focus: str = "",
+) -> SharedContext:
+    """Render the stories and source material read by both analysis and curation.
+
+    ``week_ending`` pins a backfilled digest to its own week, so the model
+    doesn't write about a past week as if it were this one. ``focus`` tells
+    it which digest profile the post is for.
+    """
+    stories = triage.get("stories", [])
+    stories_json = json.dumps(stories, separators=(",", ":"), ensure_ascii=False)
+    source_json = json.dumps(_source_material(stories, articles), separators=(",", ":"), ensure_ascii=False)
+    text = f"Triaged stories:\n{stories_json}\n\nSource material:\n{source_json}"
+    preamble = []
+    if week_ending is not None:
+        preamble.append(f"This digest covers the week ending {week_ending:%A, %B %d, %Y}.")
+    if focus:
+        preamble.append(f"This digest focuses on {focus}.")
+    if preamble:
+        text = "\n\n".join([*preamble, text])
+    # Sectioned analysis sends its own prompts, so only curation would read the prefix
+    readers = [RESOURCES_ROUTE.primary]
+    if ANALYSIS_MODE != "sections":
+        readers.append(ANALYSIS_ROUTE.primary)
+    return SharedContext(
+        text,
+        shared_models={m for m in readers if readers.count(m) > 1},
+        preamble="\n\n".join(preamble),
+    )
 
-    source_json = json.dumps(source_material, indent=2)
-    user_message = f"Triaged stories:\n{stories_context}\n\nSource material:\n{source_json}"
+
+async def deep_analysis(
+    triage: dict,
+    articles: list[RawArticle],
+    context: SharedContext | None = None,
+    partial_path: str | None = None,
+) -> str:
+    """Call 2 — Deep analysis using Gemini Pro.
+
+    With ANALYSIS_MODE=sections the post is written section by section
+    (see ``_sectioned_analysis``). ``context`` is the shared stories and
+    source material prefix; it is built here when not passed in.
+    ``partial_path`` is where streamed text is written as it arrives
+    (default ANALYSIS_PARTIAL_PATH); concurrent analyses each need their own.
+
+    Returns the full markdown analysis text.
+    """
+    if ANALYSIS_MODE == "sections":
+        # Section prompts carry their own source material, but still need the week and focus
+        return await _sectioned_analysis(triage, articles, context.preamble if context else "")
+
+    context = context or build_shared_context(triage, articles)
+    if ANALYSIS_STREAMING:
+        # A half-written stream can't be hedged; it resumes on the primary model
+        return await _generate_stream(
+            ANALYSIS_ROUTE.primary,
+            ANALYSIS_PROMPT,
+            _ANALYSIS_CONFIG,
+            "Analysis",
+            partial_path or ANALYSIS_PARTIAL_PATH,
+            ANALYSIS_STREAM_RESUMES,
+            context=context,
+        )
 
     for attempt in range(2):
         try:
-            response = client.models.generate_content(
-                model=PRO_MODEL,
-                contents=[
-                    {"role": "user", "parts": [{"text": f"{ANALYSIS_PROMPT}\n\n{user_message}"}]}
-                ],
-                config={
-                    "temperature": 0.7,
-                    "max_output_tokens": 8000,
-                },
+            response = await _generate_routed(
+                ANALYSIS_ROUTE,
+                ANALYSIS_PROMPT,
+                _ANALYSIS_CONFIG,
+                "Analysis",
+                refresh=attempt > 0,
+                context=context,
             )
-
-            if hasattr(response, "usage_metadata"):
-                usage = response.usage_metadata
-                print(f"  Analysis tokens — input: {usage.prompt_token_count}, output: {usage.candidates_token_count}")
-
             return response.text
         except Exception as e:
             if attempt == 0:
@@ -201,42 +722,165 @@ async def deep_analysis(triage: dict, articles: list[RawArticle]) -> str:
     return ""
 
 
-async def curate_resources(triage: dict, articles: list[RawArticle]) -> dict:
-    """Call 3 — Resource curation using Gemini Flash.
+def _with_preamble(preamble: str, prompt: str) -> str:
+    return f"{preamble}\n\n{prompt}" if preamble else prompt
 
-    Returns dict with 'resources' key containing list of curated resources.
-    """
-    client = _get_client()
 
-    stories_context = json.dumps(triage.get("stories", []), indent=2)
-    articles_summary = _articles_to_json(articles[:50], max_content_len=500)
+async def _write_section(heading: str, stories: list[dict], articles: list[RawArticle], preamble: str = "") -> str:
+    """Write one category section from only its own stories' source material."""
+    stories_context = json.dumps(stories, separators=(",", ":"), ensure_ascii=False)
+    source_json = json.dumps(_source_material(stories, articles), separators=(",", ":"), ensure_ascii=False)
+    prompt = _with_preamble(preamble, (
+        f"{SECTION_PROMPT.format(heading=heading)}\n\n"
+        f"Triaged stories:\n{stories_context}\n\nSource material:\n{source_json}"
+    ))
 
-    user_message = (
-        f"Top stories this week:\n{stories_context}\n\n"
-        f"All collected articles:\n{articles_summary}"
-    )
+    for attempt in range(2):
+        try:
+            response = await _generate_routed(
+                ANALYSIS_ROUTE,
+                prompt,
+                _SECTION_CONFIG,
+                f"Section '{heading}'",
+                refresh=attempt > 0,
+            )
+            text = (response.text or "").strip()
+            if not text.startswith("## "):
+                text = f"## {heading}\n\n{text}"
+            return text
+        except Exception as e:
+            if attempt == 0:
+                print(f"  Section '{heading}' error, retrying: {e}")
+                continue
+            raise
+
+    return ""
+
+
+async def _frame_analysis(stories: list[dict], sections: list[str], preamble: str = "") -> dict:
+    """Write the executive summary, big story and closing analysis from the drafts."""
+    headlines = [
+        {k: s.get(k) for k in ("headline", "category", "significance", "one_line_summary")}
+        for s in stories
+    ]
+    prompt = _with_preamble(preamble, (
+        f"{ASSEMBLY_PROMPT}\n\n"
+        f"Triaged stories:\n{json.dumps(headlines, separators=(',', ':'), ensure_ascii=False)}\n\n"
+        "Section drafts:\n\n" + "\n\n".join(sections)
+    ))
 
     for attempt in range(2):
         try:
-            response = client.models.generate_content(
-                model=FLASH_MODEL,
-                contents=[
-                    {"role": "user", "parts": [{"text": f"{RESOURCES_PROMPT}\n\n{user_message}"}]}
-                ],
-                config={
-                    "temperature": 0.3,
-                    "max_output_tokens": 3000,
-                    "response_mime_type": "application/json",
-                },
+            response = await _generate_routed(
+                ANALYSIS_ROUTE,
+                prompt,
+                _ASSEMBLY_CONFIG,
+                "Assembly",
+                refresh=attempt > 0,
             )
+            return AnalysisFraming.model_validate(_parse_json_response(response.text)).model_dump()
+        except Exception as e:
+            if attempt == 0:
+                print(f"  Assembly error, retrying: {e}")
+                continue
+            # Fall back to framing built from the triage itself
+            print(f"  Assembly failed, using triage summaries: {e}")
+            top = max(stories, key=lambda s: s.get("significance", 0), default={})
+            return {
+                "this_week": " ".join(s.get("one_line_summary", "") for s in stories[:3]),
+                "big_story": f"**{top.get('headline', '')}** — {top.get('one_line_summary', '')}",
+                "connecting_the_dots": "",
+            }
+
+    return {}
+
+
+async def _sectioned_analysis(triage: dict, articles: list[RawArticle], preamble: str = "") -> str:
+    """Fan-out deep analysis: one concurrent request per category section.
+
+    Each section prompt carries only its own stories' source material, so
+    prompts are small and wall time is roughly the slowest section plus one
+    assembly call that writes "This Week", "The Big Story" and
+    "Connecting the Dots" from the drafts. ``preamble`` (the shared
+    context's week and focus lines) leads every one of those prompts.
+    """
+    stories = triage.get("stories", [])
+    grouped: dict[str, list[dict]] = {}
+    for story in stories:
+        heading = ANALYSIS_SECTIONS.get(story.get("category"), ANALYSIS_SECTIONS["tech"])
+        grouped.setdefault(heading, []).append(story)
+
+    # Keep the post's section order regardless of triage order
+    headings = [h for h in dict.fromkeys(ANALYSIS_SECTIONS.values()) if h in grouped]
+    print(f"  Writing {len(headings)} sections concurrently")
+
+    results = await asyncio.gather(
+        *(_write_section(h, grouped[h], articles, preamble) for h in headings),
+        return_exceptions=True,
+    )
+    sections = []
+    for heading, result in zip(headings, results):
+        if isinstance(result, Exception):
+            print(f"  Section '{heading}' failed, omitting it: {result}")
+        elif result:
+            sections.append(result)
+    if not sections:
+        # Framing alone is not a digest; fail the stage rather than publish it
+        errors = [r for r in results if isinstance(r, Exception)]
+        raise RuntimeError(f"All {len(headings)} analysis sections failed") from (errors[0] if errors else None)
+
+    framing = await _frame_analysis(stories, sections, preamble)
+    this_week = "\n".join(
+        line if line.startswith(">") else f"> {line}" if line.strip() else ">"
+        for line in framing["this_week"].strip().splitlines()
+    )
 
-            result = _parse_json_response(response.text)
+    parts = [
+        f"## This Week in AI & Tech\n{this_week}",
+        f"## The Big Story\n\n{framing['big_story'].strip()}",
+        *sections,
+    ]
+    if framing["connecting_the_dots"].strip():
+        parts.append(f"## Connecting the Dots\n\n{framing['connecting_the_dots'].strip()}")
+    return "\n\n".join(parts)
+
+
+async def curate_resources(
+    triage: dict,
+    articles: list[RawArticle],
+    context: SharedContext | None = None,
+) -> dict:
+    """Call 3 — Resource curation using Gemini Flash.
 
-            if hasattr(response, "usage_metadata"):
-                usage = response.usage_metadata
-                print(f"  Resources tokens — input: {usage.prompt_token_count}, output: {usage.candidates_token_count}")
+    ``context`` is the same shared prefix deep analysis reads; it is only
+    sent when both stages run on one model and can share its cache.
+    Otherwise curation gets the stories alone, not their source material.
 
-            return result
+    Returns dict with 'resources' key containing list of curated resources.
+    """
+    context = context or build_shared_context(triage, articles)
+    articles_summary = _articles_to_json(articles[:50], max_content_len=RESOURCES_CONTENT_CHARS)
+    prompt = f"{RESOURCES_PROMPT}\n\nAll collected articles:\n{articles_summary}"
+    if not context.shared_with(RESOURCES_ROUTE.primary):
+        stories_json = json.dumps(triage.get("stories", []), separators=(",", ":"), ensure_ascii=False)
+        prompt = (
+            f"{RESOURCES_PROMPT}\n\nTop stories this week:\n{stories_json}\n\n"
+            f"All collected articles:\n{articles_summary}"
+        )
+        context = None
+
+    for attempt in range(2):
+        try:
+            response = await _generate_routed(
+                RESOURCES_ROUTE,
+                prompt,
+                _RESOURCES_CONFIG,
+                "Resources",
+                refresh=attempt > 0,
+                priority=PRIORITY_BACKGROUND,
+                context=context,
+            )
+            return _parse_structured(response, "resources", CuratedResource, "Resources")
         except json.JSONDecodeError:
             if attempt == 0:
                 print("  Resources JSON parse failed, retrying...")
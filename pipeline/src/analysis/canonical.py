@@ -0,0 +1,207 @@
+"""URL canonicalization — memoized normalization plus a persistent map of resolved aliases."""
+
+import html
+import json
+import os
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from src.config import CACHE_DIR
+
+# URL parameters commonly used for tracking that should be stripped
+TRACKING_PARAMS = {
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "ref", "source", "fbclid", "gclid", "mc_cid", "mc_eid",
+}
+
+# Parameters that only select an AMP rendering of the same page
+AMP_PARAMS = {"amp", "outputtype"}
+
+# Host prefixes that serve the same story as the bare domain
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# AMP cache hosts that embed the origin URL in their path, e.g.
+# https://example-com.cdn.ampproject.org/c/s/example.com/story
+AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+
+NORMALIZE_CACHE_SIZE = 8192
+MAX_ALIASES = 50_000
+MAX_ALIAS_HOPS = 5
+
+CANONICAL_MAP_PATH = os.path.join(CACHE_DIR, "canonical_urls.json")
+
+# Second-level labels under which a country TLD registers names (example.co.uk)
+_SECOND_LEVEL_LABELS = {"ac", "co", "com", "edu", "gov", "net", "org"}
+
+_LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_REL_CANONICAL_RE = re.compile(r"""\brel\s*=\s*["']?[^"'>]*\bcanonical\b""", re.IGNORECASE)
+_HREF_RE = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_url(url: str) -> str:
+    """Normalize a URL by stripping tracking params, www/mobile/AMP variants, and trailing slashes."""
+    try:
+        parsed = urlsplit(url)
+
+        netloc = parsed.netloc.lower()
+        path = parsed.path
+
+        # Unwrap AMP cache URLs to the origin they mirror
+        if netloc.endswith(AMP_CACHE_SUFFIX) and path[:5] in ("/c/s/", "/v/s/"):
+            return normalize_url(f"https://{path[5:]}")
+        if netloc in ("google.com", "www.google.com") and path.startswith("/amp/s/"):
+            return normalize_url(f"https://{path[7:]}")
+
+        # Strip www, mobile and AMP subdomains (but never down to a bare TLD)
+        for prefix in HOST_PREFIXES:
+            if netloc.startswith(prefix) and "." in netloc[len(prefix):]:
+                netloc = netloc[len(prefix):]
+
+        # Strip tracking and AMP-selector parameters
+        query = parsed.query
+        if query:
+            cleaned_params = [
+                (k, v) for k, v in parse_qsl(query)
+                if k.lower() not in TRACKING_PARAMS and k.lower() not in AMP_PARAMS
+            ]
+            query = urlencode(cleaned_params)
+
+        # Strip trailing slashes and a trailing /amp segment from path
+        path = path.rstrip("/")
+        if path.endswith("/amp"):
+            path = path[:-4]
+
+        return urlunsplit((parsed.scheme.lower(), netloc, path, query, ""))
+    except Exception:
+        return url.lower().rstrip("/")
+
+
+def extract_canonical_link(page: str) -> str | None:
+    """Return the href of the first <link rel="canonical"> tag in an HTML page."""
+    if not page:
+        return None
+    head_end = page.find("</head>")
+    head = page if head_end == -1 else page[:head_end]
+    for tag in _LINK_TAG_RE.findall(head):
+        if not _REL_CANONICAL_RE.search(tag):
+            continue
+        match = _HREF_RE.search(tag)
+        if match:
+            href = next(g for g in match.groups() if g is not None)
+            return html.unescape(href.strip()) or None
+    return None
+
+
+def registrable_host(url: str) -> str:
+    """The registered domain a URL's host belongs to: ``news.example.co.uk`` → ``example.co.uk``."""
+    labels = (urlsplit(url).hostname or "").split(".")
+    keep = 3 if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS else 2
+    return ".".join(labels[-keep:])
+
+
+def _usable_canonical(page_url: str, canonical: str) -> bool:
+    """Whether a page's canonical tag names a specific article on the same site.
+
+    Paywalled and AMP pages often point their canonical at the site's home
+    page, or at a syndication partner; trusting those would alias every
+    article from the site onto one URL.
+    """
+    if urlsplit(canonical).path.strip("/") == "":
+        return False
+    return registrable_host(canonical) == registrable_host(page_url)
+
+
+class URLCanonicalizer:
+    """Resolves URL variants to one canonical URL.
+
+    Normalization is memoized by ``normalize_url``'s LRU. On top of that, aliases
+    learned during fetches (redirect targets such as ``t.co`` expansions, and
+    ``<link rel="canonical">`` hrefs) are kept in a JSON map on disk so later
+    runs group those variants without refetching them.
+    """
+
+    def __init__(self, path: str | None = CANONICAL_MAP_PATH, max_aliases: int = MAX_ALIASES):
+        self.path = path
+        self.max_aliases = max_aliases
+        self._aliases: dict[str, str] = {}
+        self._dirty = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def canonicalize(self, url: str) -> str:
+        """Return the canonical form of a URL, following any recorded aliases."""
+        key = normalize_url(url)
+        for _ in range(MAX_ALIAS_HOPS):
+            target = self._aliases.get(key)
+            if target is None or target == key:
+                break
+            key = target
+        return key
+
+    def record(self, url: str, canonical: str) -> None:
+        """Record that ``url`` is an alias of ``canonical``."""
+        if not canonical.startswith(("http://", "https://")):
+            return
+        source = normalize_url(url)
+        target = self.canonicalize(canonical)
+        if source == target:
+            return
+
+        # Re-insert so the most recently seen aliases survive trimming
+        self._aliases.pop(source, None)
+        self._aliases[source] = target
+        while len(self._aliases) > self.max_aliases:
+            self._aliases.pop(next(iter(self._aliases)))
+        self._dirty = True
+
+    def record_fetch(self, url: str, final_url: str = "", page: str = "") -> None:
+        """Learn aliases from a completed fetch: the redirect target and canonical tag."""
+        resolved = url
+        if final_url.startswith(("http://", "https://")) and final_url != url:
+            self.record(url, final_url)
+            resolved = final_url
+
+        canonical = extract_canonical_link(page)
+        absolute = urljoin(resolved, canonical) if canonical else ""
+        if absolute and _usable_canonical(resolved, absolute):
+            self.record(resolved, absolute)
+            if resolved != url:
+                self.record(url, absolute)
+
+    def save(self) -> None:
+        """Persist the alias map if it changed since it was loaded."""
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._aliases, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"  Warning: Could not read canonical URL map: {e}")
+            return
+        if isinstance(data, dict):
+            self._aliases = {k: v for k, v in data.items() if isinstance(v, str)}
+
+
+_canonicalizer: URLCanonicalizer | None = None
+
+
+def get_canonicalizer() -> URLCanonicalizer:
+    """Return the process-wide canonicalizer, loading the on-disk map on first use."""
+    global _canonicalizer
+    if _canonicalizer is None:
+        _canonicalizer = URLCanonicalizer()
+    return _canonicalizer
@@ -0,0 +1,152 @@
+"""Local story clustering — group deduplicated articles that cover the same story.
+
+Runs after ``deduplicate`` so triage only needs one representative per story.
+Articles are embedded as hashed TF-IDF vectors over the title and an extracted
+text excerpt, compared with sparse cosine similarity through an inverted index,
+and joined into connected components wherever similarity clears a threshold.
+"""
+
+import math
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from operator import itemgetter
+
+from src.analysis.packer import article_priority
+from src.analysis.passages import select_passages, tokenize
+from src.config import RawArticle
+
+HASH_FEATURES = 2 ** 20
+CLUSTER_SIMILARITY_THRESHOLD = 0.5
+CLUSTER_TEXT_CHARS = 1500
+
+# Title terms carry more story identity than body text
+TITLE_WEIGHT = 2
+
+# Features present in more than this share of documents don't generate candidate pairs
+MAX_DOCUMENT_FREQUENCY = 0.2
+
+
+@dataclass
+class StoryCluster:
+    representative: int
+    members: list[int]
+
+
+def _hashed_counts(article: RawArticle, text_chars: int) -> Counter:
+    title_tokens = tokenize(article.title)
+    body_tokens = tokenize(select_passages(article.content, article.title, text_chars))
+    terms = title_tokens * TITLE_WEIGHT + body_tokens
+    terms += [f"{a} {b}" for a, b in zip(title_tokens, title_tokens[1:])]
+    return Counter(zlib.crc32(term.encode("utf-8")) % HASH_FEATURES for term in terms)
+
+
+def _tfidf_vectors(counts: list[Counter]) -> tuple[list[dict[int, float]], Counter]:
+    n = len(counts)
+    df = Counter(feature for doc in counts for feature in doc)
+    vectors = []
+    for doc in counts:
+        vec = {
+            feature: (1.0 + math.log(tf)) * (math.log((1 + n) / (1 + df[feature])) + 1.0)
+            for feature, tf in doc.items()
+        }
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        vectors.append({feature: w / norm for feature, w in vec.items()})
+    return vectors, df
+
+
+def _similar_pairs(vectors: list[dict[int, float]], df: Counter, threshold: float):
+    """Yield (i, j) pairs whose cosine similarity is at least ``threshold``."""
+    max_df = max(2, int(MAX_DOCUMENT_FREQUENCY * len(vectors)))
+    postings: dict[int, list[tuple[int, float]]] = {}
+    for doc, vec in enumerate(vectors):
+        for feature, weight in vec.items():
+            if df[feature] <= max_df:
+                postings.setdefault(feature, []).append((doc, weight))
+
+    # One row of the similarity matrix at a time: memory grows with the number
+    # of articles, not with the number of candidate pairs
+    for i, vec in enumerate(vectors):
+        row: Counter = Counter()
+        for feature, w_i in vec.items():
+            entries = postings.get(feature)
+            if entries is None or len(entries) < 2:
+                continue
+            # Postings are in document order; only later documents pair with i
+            for j, w_j in entries[bisect_right(entries, i, key=itemgetter(0)):]:
+                row[j] += w_i * w_j
+
+        # Pruned features only lower the estimate, so confirm candidates exactly
+        for j, partial in row.items():
+            if partial <= 0:
+                continue
+            small, large = sorted((vec, vectors[j]), key=len)
+            similarity = sum(w * large.get(feature, 0.0) for feature, w in small.items())
+            if similarity >= threshold:
+                yield i, j
+
+
+def cluster_articles(
+    articles: list[RawArticle],
+    threshold: float = CLUSTER_SIMILARITY_THRESHOLD,
+    text_chars: int = CLUSTER_TEXT_CHARS,
+) -> list[StoryCluster]:
+    """Group articles into story clusters.
+
+    Every article lands in exactly one cluster. The representative is the
+    member with the highest packing priority (score, source weight,
+    relevance), so it is the one triage would have ranked first anyway.
+    """
+    if not articles:
+        return []
+
+    counts = [_hashed_counts(article, text_chars) for article in articles]
+    vectors, df = _tfidf_vectors(counts)
+
+    parent = list(range(len(articles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in _similar_pairs(vectors, df, threshold):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(articles)):
+        groups.setdefault(find(i), []).append(i)
+
+    return [
+        StoryCluster(representative=_representative(members, articles), members=members)
+        for members in groups.values()
+    ]
+
+
+def _representative(members: list[int], articles: list[RawArticle]) -> int:
+    return max(members, key=lambda i: (article_priority(articles[i]), articles[i].content_length))
+
+
+def restrict_clusters(clusters: list[StoryCluster], articles: list[RawArticle], keep: list[int]) -> list[StoryCluster]:
+    """Re-index ``clusters`` over the subset ``[articles[i] for i in keep]``.
+
+    Lets each digest profile reuse the run's one clustering pass. Clusters
+    with no kept members are dropped; one whose representative wasn't kept
+    gets the best of its remaining members.
+    """
+    subset = [articles[i] for i in keep]
+    position = {old: new for new, old in enumerate(keep)}
+    restricted = []
+    for cluster in clusters:
+        members = [position[m] for m in cluster.members if m in position]
+        if not members:
+            continue
+        representative = position.get(cluster.representative)
+        if representative is None:
+            representative = _representative(members, subset)
+        restricted.append(StoryCluster(representative=representative, members=members))
+    return restricted
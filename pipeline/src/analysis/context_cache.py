@@ -0,0 +1,100 @@
+"""Shared prompt prefix for the post-triage stages, registered as Gemini cached content.
+
+Deep analysis and resource curation both need the triaged stories and their
+source material. ``SharedContext`` renders that block once; each call sends
+it as the same leading prefix. Explicit caches are per model and cost a
+``caches.create`` round-trip, so one is only registered for a model that
+reads the prefix more than once. For a model both stages run on
+(``shared_models``) the first call creates it. On any other model the
+first call goes inline, and a second read there (a JSON-parse retry, a
+stream resume) creates it. Either way, every later call on that model
+references it by name, so those input tokens are billed as cached instead
+of fresh. A model read only once, and any context below the service's
+minimum size, is left to implicit prefix caching.
+"""
+
+import asyncio
+from collections.abc import Collection
+
+from src.analysis.packer import estimate_tokens
+from src.config import CONTEXT_CACHE_ENABLED, CONTEXT_CACHE_MIN_TOKENS, CONTEXT_CACHE_TTL_SECONDS
+
+
+class SharedContext:
+    def __init__(
+        self,
+        text: str,
+        enabled: bool = CONTEXT_CACHE_ENABLED,
+        min_tokens: int = CONTEXT_CACHE_MIN_TOKENS,
+        ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS,
+        shared_models: Collection[str] = (),
+        preamble: str = "",
+    ):
+        self.text = text
+        # The week and focus lines that open ``text``, for prompts that don't send the whole prefix
+        self.preamble = preamble
+        self.shared_models = frozenset(shared_models)
+        self.enabled = enabled
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self._caches: dict[str, asyncio.Task] = {}
+        # Models that have read the prefix inline once
+        self._read: set[str] = set()
+        self._client = None
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+    def shared_with(self, model: str) -> bool:
+        """Whether more than one stage reads this prefix on ``model``."""
+        return model in self.shared_models
+
+    def prompt(self, instructions: str) -> str:
+        """The full inline prompt: shared prefix first, then the stage's instructions."""
+        return f"{self.text}\n\n{instructions}"
+
+    async def cache_name(self, client, model: str) -> str | None:
+        """Name of this context's cached content for ``model``, creating it once.
+
+        Returns None when caching is off, the context is too small to cache,
+        creation failed, or this is the first read on a model no other stage
+        shares; callers then send the prefix inline.
+        """
+        if not self.enabled or self.tokens < self.min_tokens:
+            return None
+        task = self._caches.get(model)
+        if task is None:
+            if not self.shared_with(model) and model not in self._read:
+                self._read.add(model)
+                return None
+            self._client = client
+            task = self._caches[model] = asyncio.ensure_future(self._create(client, model))
+        return await asyncio.shield(task)
+
+    async def _create(self, client, model: str) -> str | None:
+        try:
+            cache = await client.aio.caches.create(
+                model=model,
+                config={
+                    "contents": [{"role": "user", "parts": [{"text": self.text}]}],
+                    "display_name": "digest-shared-context",
+                    "ttl": f"{self.ttl_seconds}s",
+                },
+            )
+        except Exception as e:
+            print(f"  Context cache for {model} unavailable, sending inline: {e}")
+            return None
+        print(f"  Cached shared context for {model} (~{self.tokens} tokens)")
+        return cache.name
+
+    async def release(self) -> None:
+        """Delete the cached contents now instead of waiting for their TTL."""
+        for task in self._caches.values():
+            name = await task
+            if name and self._client is not None:
+                try:
+                    await self._client.aio.caches.delete(name=name)
+                except Exception as e:
+                    print(f"  Warning: Could not delete context cache {name}: {e}")
+        self._caches.clear()
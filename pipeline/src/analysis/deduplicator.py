@@ -1,59 +1,23 @@
 """Deduplicate articles across sources using URL normalization and fuzzy title matching."""
 
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-
 from thefuzz import fuzz
 
+# normalize_url is re-exported here for existing callers
+from src.analysis.canonical import URLCanonicalizer, get_canonicalizer, normalize_url
 from src.config import RawArticle
 
-# URL parameters commonly used for tracking that should be stripped
-TRACKING_PARAMS = {
-    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
-    "ref", "source", "fbclid", "gclid", "mc_cid", "mc_eid",
-}
-
 FUZZY_TITLE_THRESHOLD = 80
 
 
-def normalize_url(url: str) -> str:
-    """Normalize a URL by stripping tracking params, www prefix, and trailing slashes."""
-    try:
-        parsed = urlparse(url)
-
-        # Strip www prefix
-        netloc = parsed.netloc.lower()
-        if netloc.startswith("www."):
-            netloc = netloc[4:]
-
-        # Strip tracking parameters
-        query_params = parse_qs(parsed.query)
-        cleaned_params = {
-            k: v for k, v in query_params.items() if k.lower() not in TRACKING_PARAMS
-        }
-        cleaned_query = urlencode(cleaned_params, doseq=True)
-
-        # Strip trailing slashes from path
-        path = parsed.path.rstrip("/")
-
-        # Reconstruct
-        normalized = urlunparse((
-            parsed.scheme.lower(),
-            netloc,
-            path,
-            parsed.params,
-            cleaned_query,
-            "",  # drop fragment
-        ))
-        return normalized
-    except Exception:
-        return url.lower().rstrip("/")
-
-
-def deduplicate(articles: list[RawArticle]) -> list[RawArticle]:
+def deduplicate(
+    articles: list[RawArticle],
+    canonicalizer: URLCanonicalizer | None = None,
+) -> list[RawArticle]:
     """Deduplicate articles by URL and fuzzy title matching.
 
     Strategy:
-    1. Group by normalized URL — exact URL matches are definite duplicates.
+    1. Group by canonical URL — normalized URLs plus aliases learned from
+       redirects and canonical tags are definite duplicates.
     2. Within remaining articles, use fuzzy title matching to find duplicates.
     3. When duplicates found: keep the version with the longest content.
     4. Merge tags from all duplicate versions.
@@ -61,10 +25,13 @@ def deduplicate(articles: list[RawArticle]) -> list[RawArticle]:
     if not articles:
         return []
 
-    # Phase 1: Group by normalized URL
+    if canonicalizer is None:
+        canonicalizer = get_canonicalizer()
+
+    # Phase 1: Group by canonical URL
     url_groups: dict[str, list[RawArticle]] = {}
     for article in articles:
-        norm_url = normalize_url(article.url)
+        norm_url = canonicalizer.canonicalize(article.url)
         if norm_url not in url_groups:
             url_groups[norm_url] = []
         url_groups[norm_url].append(article)
@@ -97,13 +64,54 @@ def deduplicate(articles: list[RawArticle]) -> list[RawArticle]:
     return final
 
 
+def merge_new(
+    existing: list[RawArticle],
+    new: list[RawArticle],
+    canonicalizer: URLCanonicalizer | None = None,
+) -> tuple[list[RawArticle], set[int]]:
+    """Fold ``new`` articles into an already-deduplicated list.
+
+    Same matching rules as ``deduplicate``, but ``new`` is only compared
+    against the existing set rather than rerunning the whole pairwise pass,
+    so folding in an hourly snapshot stays cheap as the week fills up.
+    Returns the updated list and the indexes that were changed or appended.
+    """
+    if canonicalizer is None:
+        canonicalizer = get_canonicalizer()
+
+    unique = list(existing)
+    by_url = {canonicalizer.canonicalize(a.url): i for i, a in enumerate(unique)}
+    changed: set[int] = set()
+
+    for article in deduplicate(new, canonicalizer):
+        index = by_url.get(canonicalizer.canonicalize(article.url))
+        if index is None:
+            index = next(
+                (
+                    i for i, other in enumerate(unique)
+                    if fuzz.token_sort_ratio(article.title, other.title) >= FUZZY_TITLE_THRESHOLD
+                ),
+                None,
+            )
+        if index is None:
+            unique.append(article)
+            index = len(unique) - 1
+        else:
+            unique[index] = _merge_group([unique[index], article])
+        by_url[canonicalizer.canonicalize(unique[index].url)] = index
+        by_url.setdefault(canonicalizer.canonicalize(article.url), index)
+        changed.add(index)
+
+    return unique, changed
+
+
 def _merge_group(group: list[RawArticle]) -> RawArticle:
     """Merge a group of duplicate articles, keeping the longest content and merging tags."""
     if len(group) == 1:
         return group[0]
 
     # Keep the version with the longest content
-    best = max(group, key=lambda a: len(a.content))
+    best = max(group, key=lambda a: a.content_length)
 
     # Merge all tags
     all_tags = set()
@@ -113,12 +121,5 @@ def _merge_group(group: list[RawArticle]) -> RawArticle:
     # Keep the highest score
     best_score = max((a.score for a in group if a.score is not None), default=None)
 
-    return RawArticle(
-        title=best.title,
-        url=best.url,
-        source=best.source,
-        content=best.content,
-        published_at=best.published_at,
-        score=best_score,
-        tags=list(all_tags),
-    )
+    # The merged article shares best's spooled body rather than copying it
+    return best.model_copy(update={"score": best_score, "tags": list(all_tags)})
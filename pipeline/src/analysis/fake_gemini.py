@@ -0,0 +1,555 @@
+"""Offline stand-in for the Gemini API, for tests and load testing.
+
+``FakeGeminiService`` holds the behavior: deterministic canned replies,
+token accounting that mirrors the service (cached-content tokens are counted
+in ``prompt_token_count`` and reported separately in
+``cached_content_token_count``), and optional realism from ``FakeBehavior`` —
+lognormal latency, output token-rate pacing, server-side RPM/TPM quotas and
+random 429s, MAX_TOKENS truncation and markdown-fenced JSON.
+
+Two transports sit on top of it:
+
+- ``FakeGeminiClient`` implements the slice of ``genai.Client`` the analyzer
+  calls (``aio.models.generate_content``, ``generate_content_stream`` and
+  ``aio.caches``) in-process, for unit tests.
+- ``FakeGeminiServer`` speaks the REST API (``:generateContent``,
+  ``:streamGenerateContent?alt=sse``, ``cachedContents``) on localhost, so
+  the real SDK can be pointed at it with ``GEMINI_BASE_URL``::
+
+      python -m src.analysis.fake_gemini --port 8765 --latency 2 --rate-limit-rate 0.05
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import httpx
+from google.genai import errors
+
+from src.analysis.packer import CHARS_PER_TOKEN, estimate_tokens
+
+# Article indices in packed articles, or in candidate stories during the triage reduce
+_INDEX_RE = re.compile(r'"(?:index|source_article_indices)":\s*\[?(\d+)')
+_URL_RE = re.compile(r'"url":\s*"([^"]+)"')
+_SECTION_HEADING_RE = re.compile(r"nothing before it:\n## (.+)")
+_MODEL_PATH_RE = re.compile(r"/models/([^/:]+):(generateContent|streamGenerateContent)$")
+
+# Characters per streamed chunk
+STREAM_CHUNK_CHARS = 200
+
+
+def _config_value(config, name: str):
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+def _schema_fields(schema) -> set[str]:
+    """Top-level property names of a pydantic response schema or its JSON form."""
+    if schema is None:
+        return set()
+    if isinstance(schema, dict):
+        return set(schema.get("properties", {}))
+    return set(getattr(schema, "model_fields", {}))
+
+
+def canned_reply(model: str, prompt: str, config) -> str:
+    """A deterministic, schema-valid reply derived from the prompt."""
+    fields = _schema_fields(_config_value(config, "response_schema"))
+    if "stories" in fields:
+        indices = list(dict.fromkeys(int(i) for i in _INDEX_RE.findall(prompt)))[:5]
+        stories = [
+            {
+                "headline": f"Story {i}",
+                "category": "ai-research" if n % 2 == 0 else "ai-industry",
+                "significance": 9 - n,
+                "source_article_indices": [i],
+                "one_line_summary": f"Summary of article {i}.",
+            }
+            for n, i in enumerate(indices)
+        ]
+        return json.dumps({"stories": stories})
+    if "resources" in fields:
+        urls = list(dict.fromkeys(_URL_RE.findall(prompt)))[:3]
+        resources = [
+            {"title": f"Resource {n}", "url": url, "type": "article", "description": "Worth reading."}
+            for n, url in enumerate(urls)
+        ]
+        return json.dumps({"resources": resources})
+    if "big_story" in fields:
+        return json.dumps({
+            "this_week": "A week of steady progress.",
+            "big_story": "The biggest story of the week.",
+            "connecting_the_dots": "These threads point the same way.",
+        })
+
+    heading = _SECTION_HEADING_RE.search(prompt)
+    if heading:
+        return (
+            f"## {heading.group(1)}\n\n### Story\n\n"
+            "What happened and why it matters.\n\n**Bottom Line:** Watch this space."
+        )
+    return (
+        "## This Week in AI & Tech\n> A week of steady progress.\n\n"
+        "## The Big Story\n\nThe biggest story of the week.\n\n"
+        "## Connecting the Dots\n\nThese threads point the same way."
+    )
+
+
+@dataclass
+class FakeBehavior:
+    """Knobs for how realistic (and hostile) the fake is. Defaults are instant and clean."""
+
+    latency_median: float = 0.0  # seconds before the first token
+    latency_sigma: float = 0.0  # lognormal spread around the median
+    output_tokens_per_second: float = 0.0  # 0 = whole reply at once
+    rpm_limit: int = 0  # server-side quotas over a sliding minute; 0 = unlimited
+    tpm_limit: int = 0
+    rate_limit_rate: float = 0.0  # share of requests rejected with a random 429
+    truncate_rate: float = 0.0  # share of replies cut off with MAX_TOKENS
+    fence_rate: float = 0.0  # share of JSON replies wrapped in ```json fences
+    retry_delay: float = 1.0  # retryDelay suggested with random 429s
+    seed: int = 0
+
+
+@dataclass
+class FakeCachedContent:
+    name: str
+    model: str
+    tokens: int
+
+
+@dataclass
+class FakeCall:
+    """Token accounting for one request the fake served."""
+
+    model: str
+    prompt_tokens: int
+    cached_tokens: int
+    output_tokens: int
+
+
+@dataclass
+class FakeReply:
+    text: str
+    finish_reason: str
+    prompt_tokens: int
+    cached_tokens: int
+    output_tokens: int
+
+    def usage(self) -> dict:
+        return {
+            "prompt_token_count": self.prompt_tokens,
+            "candidates_token_count": self.output_tokens,
+            "cached_content_token_count": self.cached_tokens or None,
+            "total_token_count": self.prompt_tokens + self.output_tokens,
+        }
+
+
+class FakeAPIError(Exception):
+    """An error reply: HTTP status plus the API's JSON error body."""
+
+    def __init__(self, code: int, status: str, message: str, retry_delay: float | None = None):
+        super().__init__(f"{code} {status}. {message}")
+        self.code = code
+        self.body = {"error": {"code": code, "message": message, "status": status}}
+        if retry_delay is not None:
+            self.body["error"]["details"] = [{
+                "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                "retryDelay": f"{retry_delay:.3f}s",
+            }]
+
+    def to_sdk_error(self) -> errors.APIError:
+        """The exception the real SDK raises for this reply."""
+        response = httpx.Response(self.code, json=self.body)
+        cls = errors.ClientError if self.code < 500 else errors.ServerError
+        return cls(self.code, response)
+
+
+class FakeGeminiService:
+    """Transport-independent fake: replies, quotas, caches and accounting."""
+
+    def __init__(self, behavior: FakeBehavior | None = None, responder=canned_reply):
+        self.behavior = behavior or FakeBehavior()
+        self.responder = responder
+        self.cached_contents: dict[str, FakeCachedContent] = {}
+        self.calls: list[FakeCall] = []
+        self.rejected = 0
+        self._rng = random.Random(self.behavior.seed)
+        self._window: deque[tuple[float, int]] = deque()
+        self._cache_ids = itertools.count(1)
+
+    def create_cache(self, model: str, text: str) -> FakeCachedContent:
+        name = f"cachedContents/fake-{next(self._cache_ids)}"
+        cache = FakeCachedContent(name=name, model=model, tokens=estimate_tokens(text))
+        self.cached_contents[name] = cache
+        return cache
+
+    def delete_cache(self, name: str) -> None:
+        self.cached_contents.pop(name, None)
+
+    def latency(self) -> float:
+        b = self.behavior
+        if b.latency_median <= 0:
+            return 0.0
+        return b.latency_median * math.exp(b.latency_sigma * self._rng.gauss(0.0, 1.0))
+
+    def pacing(self, output_tokens: int) -> float:
+        """Seconds it takes to emit ``output_tokens`` at the configured rate."""
+        rate = self.behavior.output_tokens_per_second
+        return output_tokens / rate if rate > 0 else 0.0
+
+    def _admit(self, prompt_tokens: int) -> None:
+        """Apply random 429s and the sliding-minute RPM/TPM quotas."""
+        b = self.behavior
+        if b.rate_limit_rate and self._rng.random() < b.rate_limit_rate:
+            self.rejected += 1
+            raise FakeAPIError(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (injected).", b.retry_delay)
+
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] >= 60.0:
+            self._window.popleft()
+        used_tokens = sum(tokens for _, tokens in self._window)
+        over_rpm = b.rpm_limit and len(self._window) + 1 > b.rpm_limit
+        over_tpm = b.tpm_limit and used_tokens + prompt_tokens > b.tpm_limit
+        if over_rpm or over_tpm:
+            self.rejected += 1
+            wait = 60.0 - (now - self._window[0][0]) if self._window else 1.0
+            raise FakeAPIError(429, "RESOURCE_EXHAUSTED", "Quota exceeded for the fake model.", max(wait, 0.1))
+        self._window.append((now, prompt_tokens))
+
+    def generate(self, model: str, prompt: str, config: dict) -> FakeReply:
+        """Produce (but don't pace) one reply; raises ``FakeAPIError`` on rejection."""
+        cached = None
+        name = config.get("cached_content")
+        if name:
+            cached = self.cached_contents.get(name)
+            if cached is None:
+                raise FakeAPIError(404, "NOT_FOUND", f"Cached content {name} not found")
+            if cached.model != model:
+                raise FakeAPIError(400, "INVALID_ARGUMENT", f"{name} was created for {cached.model}, not {model}")
+
+        cached_tokens = cached.tokens if cached else 0
+        prompt_tokens = estimate_tokens(prompt) + cached_tokens
+        self._admit(prompt_tokens)
+
+        text = self.responder(model, prompt, config)
+        finish_reason = "STOP"
+        if config.get("response_schema") is not None and self._rng.random() < self.behavior.fence_rate:
+            text = f"```json\n{text}\n```"
+        max_chars = (config.get("max_output_tokens") or 0) * CHARS_PER_TOKEN
+        if self._rng.random() < self.behavior.truncate_rate:
+            text = text[: int(len(text) * self._rng.uniform(0.3, 0.9))]
+            finish_reason = "MAX_TOKENS"
+        elif max_chars and len(text) > max_chars:
+            text = text[:max_chars]
+            finish_reason = "MAX_TOKENS"
+
+        reply = FakeReply(text, finish_reason, prompt_tokens, cached_tokens, estimate_tokens(text))
+        self.calls.append(FakeCall(model, prompt_tokens, cached_tokens, reply.output_tokens))
+        return reply
+
+    @property
+    def cached_tokens(self) -> int:
+        return sum(call.cached_tokens for call in self.calls)
+
+    @property
+    def uncached_tokens(self) -> int:
+        return sum(call.prompt_tokens - call.cached_tokens for call in self.calls)
+
+
+def _contents_text(contents) -> str:
+    parts = []
+    for content in contents or []:
+        for part in content.get("parts", []):
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+def _sdk_config(config) -> dict:
+    """The generation settings the fake looks at, from an SDK config dict/object."""
+    return {
+        name: _config_value(config, name)
+        for name in ("response_schema", "max_output_tokens", "cached_content")
+    }
+
+
+def _sdk_response(text: str, finish_reason: str | None, usage: dict | None):
+    return SimpleNamespace(
+        text=text,
+        candidates=[SimpleNamespace(finish_reason=finish_reason)],
+        usage_metadata=SimpleNamespace(**usage) if usage else None,
+    )
+
+
+# --- In-process client ---
+
+class _FakeModels:
+    def __init__(self, service: FakeGeminiService):
+        self._service = service
+
+    async def generate_content(self, model: str, contents, config=None):
+        await asyncio.sleep(self._service.latency())
+        try:
+            reply = self._service.generate(model, _contents_text(contents), _sdk_config(config))
+        except FakeAPIError as e:
+            raise e.to_sdk_error() from None
+        await asyncio.sleep(self._service.pacing(reply.output_tokens))
+        return _sdk_response(reply.text, reply.finish_reason, reply.usage())
+
+    async def generate_content_stream(self, model: str, contents, config=None):
+        service = self._service
+        await asyncio.sleep(service.latency())
+        try:
+            reply = service.generate(model, _contents_text(contents), _sdk_config(config))
+        except FakeAPIError as e:
+            raise e.to_sdk_error() from None
+
+        async def chunks():
+            pieces = [reply.text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(reply.text), STREAM_CHUNK_CHARS)]
+            for n, piece in enumerate(pieces or [""]):
+                await asyncio.sleep(service.pacing(estimate_tokens(piece)))
+                last = n == max(len(pieces), 1) - 1
+                yield _sdk_response(
+                    piece,
+                    reply.finish_reason if last else None,
+                    reply.usage() if last else None,
+                )
+
+        return chunks()
+
+
+class _FakeCaches:
+    def __init__(self, service: FakeGeminiService):
+        self._service = service
+
+    async def create(self, model: str, config=None):
+        return self._service.create_cache(model, _contents_text(_config_value(config, "contents")))
+
+    async def delete(self, name: str, config=None):
+        self._service.delete_cache(name)
+
+
+class FakeGeminiClient:
+    """Drop-in for ``genai.Client`` in tests and offline runs."""
+
+    def __init__(self, behavior: FakeBehavior | None = None, responder=canned_reply):
+        self.service = FakeGeminiService(behavior, responder)
+        self.aio = SimpleNamespace(models=_FakeModels(self.service), caches=_FakeCaches(self.service))
+
+    @property
+    def cached_contents(self) -> dict[str, FakeCachedContent]:
+        return self.service.cached_contents
+
+    @property
+    def calls(self) -> list[FakeCall]:
+        return self.service.calls
+
+    @property
+    def cached_tokens(self) -> int:
+        return self.service.cached_tokens
+
+    @property
+    def uncached_tokens(self) -> int:
+        return self.service.uncached_tokens
+
+
+# --- REST server ---
+
+def _rest_config(body: dict) -> dict:
+    generation = body.get("generationConfig") or {}
+    return {
+        "response_schema": generation.get("responseSchema"),
+        "max_output_tokens": generation.get("maxOutputTokens"),
+        "cached_content": body.get("cachedContent"),
+    }
+
+
+def _rest_reply(text: str, finish_reason: str | None, usage: dict | None) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    payload = {"candidates": [candidate]}
+    if usage:
+        payload["usageMetadata"] = {
+            "promptTokenCount": usage["prompt_token_count"],
+            "candidatesTokenCount": usage["candidates_token_count"],
+            "totalTokenCount": usage["total_token_count"],
+        }
+        if usage["cached_content_token_count"]:
+            payload["usageMetadata"]["cachedContentTokenCount"] = usage["cached_content_token_count"]
+    return payload
+
+
+class FakeGeminiServer:
+    """Minimal HTTP/1.1 server for the Gemini REST endpoints the analyzer uses.
+
+    Runs its own event loop in a daemon thread; ``url`` is the value for
+    ``GEMINI_BASE_URL``.
+    """
+
+    def __init__(self, behavior: FakeBehavior | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.service = FakeGeminiService(behavior)
+        self.host = host
+        self.port = port
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeGeminiServer":
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="fake-gemini", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def __enter__(self) -> "FakeGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            raw = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+            method, target = request_line[0], request_line[1]
+            body = json.loads(raw) if raw else {}
+            await self._route(method, urlparse(target).path, body, writer)
+        except FakeAPIError as e:
+            self._write_json(writer, e.code, e.body)
+        except Exception as e:
+            self._write_json(writer, 500, {"error": {"code": 500, "message": str(e), "status": "INTERNAL"}})
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _route(self, method: str, path: str, body: dict, writer: asyncio.StreamWriter) -> None:
+        service = self.service
+        match = _MODEL_PATH_RE.search(path)
+        if method == "POST" and match:
+            model, action = match.groups()
+            await asyncio.sleep(service.latency())
+            reply = service.generate(model, _contents_text(body.get("contents")), _rest_config(body))
+            if action == "generateContent":
+                await asyncio.sleep(service.pacing(reply.output_tokens))
+                self._write_json(writer, 200, _rest_reply(reply.text, reply.finish_reason, reply.usage()))
+            else:
+                await self._write_stream(writer, reply)
+        elif method == "POST" and path.endswith("/cachedContents"):
+            model = body.get("model", "").removeprefix("models/")
+            cache = service.create_cache(model, _contents_text(body.get("contents")))
+            self._write_json(writer, 200, {"name": cache.name, "model": f"models/{model}"})
+        elif method == "DELETE" and "/cachedContents/" in path:
+            service.delete_cache(path[path.index("cachedContents/"):])
+            self._write_json(writer, 200, {})
+        else:
+            raise FakeAPIError(404, "NOT_FOUND", f"No fake endpoint for {method} {path}")
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, reply: FakeReply) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n"
+        )
+        pieces = [reply.text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(reply.text), STREAM_CHUNK_CHARS)]
+        for n, piece in enumerate(pieces or [""]):
+            await asyncio.sleep(self.service.pacing(estimate_tokens(piece)))
+            last = n == max(len(pieces), 1) - 1
+            payload = _rest_reply(piece, reply.finish_reason if last else None, reply.usage() if last else None)
+            writer.write(f"data: {json.dumps(payload)}\r\n\r\n".encode("utf-8"))
+            await writer.drain()
+
+    @staticmethod
+    def _write_json(writer: asyncio.StreamWriter, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the offline fake Gemini API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="median seconds before the first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="lognormal spread of the latency")
+    parser.add_argument("--tps", type=float, default=0.0, help="output tokens per second (0 = instant)")
+    parser.add_argument("--rpm", type=int, default=0, help="server-side requests/min quota")
+    parser.add_argument("--tpm", type=int, default=0, help="server-side input tokens/min quota")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of random 429 replies")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of MAX_TOKENS cut-offs")
+    parser.add_argument("--fence-rate", type=float, default=0.0, help="share of fenced JSON replies")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    behavior = FakeBehavior(
+        latency_median=args.latency,
+        latency_sigma=args.latency_sigma,
+        output_tokens_per_second=args.tps,
+        rpm_limit=args.rpm,
+        tpm_limit=args.tpm,
+        rate_limit_rate=args.rate_limit_rate,
+        truncate_rate=args.truncate_rate,
+        fence_rate=args.fence_rate,
+        seed=args.seed,
+    )
+    server = FakeGeminiServer(behavior, args.host, args.port).start()
+    print(f"Fake Gemini API listening on {server.url} (set GEMINI_BASE_URL to use it)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
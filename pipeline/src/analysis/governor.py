@@ -0,0 +1,206 @@
+"""Process-wide rate governor for Gemini requests.
+
+Every analyzer call to a model goes through that model's governor, which
+holds two token buckets: requests per minute and input tokens per minute.
+A call is pre-charged with its estimated prompt size before it is sent and
+the charge is corrected from ``usage_metadata`` once the reply arrives.
+Waiting callers are served in priority order, and a 429 /
+RESOURCE_EXHAUSTED reply pauses the whole governor with exponential backoff
+(or the server's suggested retry delay) instead of letting every concurrent
+caller retry on its own.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+from dataclasses import dataclass
+
+from src.config import GOVERNOR_BASE_BACKOFF, GOVERNOR_MAX_BACKOFF, GOVERNOR_MAX_RETRIES
+
+# Lower runs first
+PRIORITY_CRITICAL = 0
+PRIORITY_BACKGROUND = 1
+
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+
+class TokenBucket:
+    """Capacity refilled continuously at ``capacity`` units per minute.
+
+    The level may go negative when a charge is corrected upward after the
+    fact; the debt is paid back by the refill before the next grant.
+    """
+
+    def __init__(self, per_minute: float, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if it can be taken now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) ``delta`` units after the fact."""
+        self._refill()
+        self._level = min(self.capacity, self._level - delta)
+
+
+@dataclass
+class Permit:
+    """A granted request slot and the token estimate it was charged."""
+
+    tokens: int
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True for 429 / RESOURCE_EXHAUSTED errors from the Gemini API."""
+    if getattr(exc, "code", None) == 429 or getattr(exc, "status", None) == "RESOURCE_EXHAUSTED":
+        return True
+    message = str(exc)
+    return "RESOURCE_EXHAUSTED" in message or message.startswith("429")
+
+
+def retry_delay(exc: BaseException) -> float | None:
+    """The server-suggested retry delay in seconds, if the error carries one."""
+    match = _RETRY_DELAY_RE.search(str(getattr(exc, "details", None) or exc))
+    return float(match.group(1)) if match else None
+
+
+class RateGovernor:
+    """RPM/TPM token buckets with a priority queue and shared 429 backoff."""
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        max_retries: int = GOVERNOR_MAX_RETRIES,
+        base_backoff: float = GOVERNOR_BASE_BACKOFF,
+        max_backoff: float = GOVERNOR_MAX_BACKOFF,
+        clock=time.monotonic,
+    ):
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._waiters: list[tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._wakeup_loop = None
+        self.throttled = 0
+
+    def _event(self) -> asyncio.Event:
+        # The governor outlives event loops (one per asyncio.run / test)
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None or self._wakeup_loop is not loop:
+            self._wakeup = asyncio.Event()
+            self._wakeup_loop = loop
+        return self._wakeup
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def acquire(self, estimated_tokens: int, priority: int = PRIORITY_CRITICAL) -> Permit:
+        """Wait for a request slot and ``estimated_tokens`` of TPM, highest priority first."""
+        entry = (priority, next(self._sequence))
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                event = self._event()
+                event.clear()
+                timeout = None
+                if self._waiters[0] == entry:
+                    timeout = max(
+                        self._paused_until - self._clock(),
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens),
+                    )
+                    if timeout <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(estimated_tokens)
+                        return Permit(tokens=estimated_tokens)
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._notify()
+
+    def settle(self, permit: Permit, actual_tokens: int | None) -> None:
+        """Replace the permit's estimate with the real prompt token count."""
+        if actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - permit.tokens)
+            permit.tokens = actual_tokens
+            self._notify()
+
+    def backoff(self, attempt: int, exc: BaseException | None = None) -> float:
+        """Pause every caller after a 429; returns the delay applied."""
+        delay = retry_delay(exc) if exc is not None else None
+        if delay is None:
+            delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+            delay *= 1.0 + random.random() * 0.25
+        self._paused_until = max(self._paused_until, self._clock() + delay)
+        self.throttled += 1
+        self._notify()
+        return delay
+
+    async def call(self, request, estimated_tokens: int, priority: int = PRIORITY_CRITICAL, label: str = ""):
+        """Run ``await request()`` under the governor, retrying on rate limits.
+
+        ``request`` is a zero-argument coroutine function; a fresh coroutine
+        is created for each attempt. Returns ``(result, permit)`` so the
+        caller can ``settle`` once it knows the real token count.
+        """
+        for attempt in range(self.max_retries + 1):
+            permit = await self.acquire(estimated_tokens, priority)
+            try:
+                return await request(), permit
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                # A rejected request doesn't consume TPM
+                self.settle(permit, 0)
+                delay = self.backoff(attempt, e)
+                print(f"  {label} rate limited, backing off {delay:.1f}s (attempt {attempt + 1})")
+
+        raise RuntimeError("unreachable")
+
+
+_governors: dict[str, RateGovernor] = {}
+
+
+def get_governor(model: str, rpm: int, tpm: int) -> RateGovernor:
+    """Return the process-wide governor for ``model``, creating it on first use."""
+    governor = _governors.get(model)
+    if governor is None:
+        governor = _governors[model] = RateGovernor(rpm, tpm)
+    return governor
+
+
+def all_governors() -> dict[str, RateGovernor]:
+    """Every governor created so far, keyed by model."""
+    return dict(_governors)
@@ -0,0 +1,163 @@
+"""Tolerant, incremental JSON scanning for LLM output.
+
+The scanner never walks the text one character at a time in Python: a single
+regex jumps between structural tokens (strings, brackets, braces and commas),
+so the interpreter only runs once per token. Element bodies are decoded by
+``json.loads``.
+
+The analyzer uses it after the fact: structured replies aren't streamed, so
+``_parse_structured`` feeds it the whole text once ``json.loads`` has failed.
+``ArrayItemStream`` also accepts the text in chunks, with each chunk scanned
+once, strings that span chunks included.
+"""
+
+import json
+import re
+
+# A JSON string (closing quote optional, so a cut-off string is still one
+# token) or a structural character.
+_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[\[\]{},]')
+# The rest of a string whose opening quote came in an earlier chunk
+_STRING_TAIL_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*(")?')
+_KEY_VALUE_START_RE = re.compile(r"\s*:\s*(\[)?")
+_OPENERS = "[{"
+_CLOSERS = "]}"
+
+
+def extract_balanced_json(text: str) -> str | None:
+    """Best-effort extraction of the first balanced JSON object/array.
+
+    Returns None when the document never closes, e.g. truncated output.
+    """
+    match = re.search(r"[{\[]", text)
+    if match is None:
+        return None
+    start = match.start()
+    depth = 0
+    for token in _TOKEN_RE.finditer(text, start):
+        ch = token.group()[0]
+        if ch == '"':
+            if token.group(1) is None:
+                return None
+        elif ch in _OPENERS:
+            depth += 1
+        elif ch in _CLOSERS:
+            depth -= 1
+            if depth == 0:
+                return text[start:token.end()]
+    return None
+
+
+class ArrayItemStream:
+    """Incrementally yields complete elements of a top-level array field.
+
+    Feed the response text whole, or in chunks; each call to ``feed``
+    returns the elements of ``{"<key>": [...]}`` completed by that chunk.
+    Elements cut off by truncation are simply never returned, and
+    malformed elements are skipped, so everything complete is recovered.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.items: list = []
+        self.closed = False
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._array_depth: int | None = None
+        self._item_start: int | None = None
+        # An unterminated string: where it starts, and how far it has been scanned
+        self._string_start: int | None = None
+        self._string_scanned = 0
+
+    def feed(self, chunk: str) -> list:
+        self._buffer += chunk
+        before = len(self.items)
+        self._scan()
+        self._compact()
+        return self.items[before:]
+
+    def _next_token(self) -> tuple[int, int] | None:
+        """Bounds of the next complete token, or None until more text arrives."""
+        if self._string_start is not None:
+            tail = _STRING_TAIL_RE.match(self._buffer, self._string_scanned)
+            if tail.group(1) is None:
+                self._string_scanned = tail.end()
+                return None
+            start, self._string_start = self._string_start, None
+            return start, tail.end()
+        token = _TOKEN_RE.search(self._buffer, self._pos)
+        if token is None:
+            return None
+        if token.group()[0] == '"' and token.group(1) is None:
+            # The string continues in a later chunk; resume where this scan stopped
+            self._string_start, self._string_scanned = token.start(), token.end()
+            return None
+        return token.start(), token.end()
+
+    def _scan(self) -> None:
+        buffer = self._buffer
+        while not self.closed:
+            token = self._next_token()
+            if token is None:
+                return
+            start, end = token
+            ch = buffer[start]
+            in_array = self._depth == self._array_depth
+
+            if ch == '"':
+                if in_array:
+                    self._decode(start, end)
+                elif self._array_depth is None and self._depth == 1 and buffer[start + 1:end - 1] == self.key:
+                    value = _KEY_VALUE_START_RE.match(buffer, end)
+                    if value is not None and value.group(1):
+                        self._depth += 1
+                        self._array_depth = self._depth
+                        self._pos = value.end()
+                        continue
+                    if value is None and not buffer[end:].strip():
+                        return  # can't tell what follows the key yet
+                    if value is not None and value.end() == len(buffer):
+                        return
+            elif ch in _OPENERS:
+                if in_array:
+                    self._item_start = start
+                self._depth += 1
+            elif ch in _CLOSERS:
+                if in_array:
+                    self._decode_scalar(start)
+                    self.closed = True
+                self._depth -= 1
+                if self._item_start is not None and self._depth == self._array_depth:
+                    self._decode(self._item_start, end)
+                    self._item_start = None
+            elif ch == "," and in_array:
+                self._decode_scalar(start)
+            self._pos = end
+
+    def _decode(self, start: int, end: int) -> None:
+        try:
+            self.items.append(json.loads(self._buffer[start:end]))
+        except json.JSONDecodeError:
+            pass  # malformed element: skip it, keep the rest
+
+    def _decode_scalar(self, end: int) -> None:
+        """Numbers and literals have no token of their own; decode what precedes ``end``."""
+        if self._buffer[self._pos:end].strip():
+            self._decode(self._pos, end)
+
+    def _compact(self) -> None:
+        """Drop consumed text so memory and rescans stay bounded (amortized)."""
+        if self._item_start is None and self._pos > len(self._buffer) // 2:
+            self._buffer = self._buffer[self._pos:]
+            if self._string_start is not None:
+                self._string_start -= self._pos
+                self._string_scanned -= self._pos
+            self._pos = 0
+
+
+def salvage_array_items(text: str, key: str) -> list:
+    """Every complete element of the top-level ``key`` array in possibly truncated text."""
+    stream = ArrayItemStream(key)
+    stream.feed(text)
+    return stream.items
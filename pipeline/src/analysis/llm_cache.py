@@ -0,0 +1,154 @@
+"""Disk-backed cache of LLM responses keyed on model, prompt and generation config."""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from src.config import (
+    LLM_CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_TTL_HOURS,
+    LLM_CACHE_MAX_ENTRIES,
+)
+
+USAGE_FIELDS = (
+    "prompt_token_count",
+    "candidates_token_count",
+    "cached_content_token_count",
+    "total_token_count",
+)
+
+
+def _jsonable(value):
+    """JSON fallback for config values; response schemas key on their JSON schema."""
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    return str(value)
+
+
+@dataclass
+class CachedResponse:
+    """Stand-in for a generate_content response replayed from the cache."""
+
+    text: str
+    usage: dict = field(default_factory=dict)
+
+    @property
+    def usage_metadata(self) -> SimpleNamespace:
+        return SimpleNamespace(**{name: self.usage.get(name) for name in USAGE_FIELDS})
+
+
+def usage_to_dict(response) -> dict:
+    """Pull the integer token counts out of a response's usage_metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    counts = {}
+    for name in USAGE_FIELDS:
+        value = getattr(usage, name, None)
+        if isinstance(value, int):
+            counts[name] = value
+    return counts
+
+
+class ResponseCache:
+    """One JSON file per response, expired by age and trimmed to a max entry count."""
+
+    def __init__(
+        self,
+        directory: str = LLM_CACHE_DIR,
+        ttl_hours: float = LLM_CACHE_TTL_HOURS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+    ):
+        self.directory = directory
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, prompt: str, config: dict) -> str:
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "config": config},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=_jsonable,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> CachedResponse | None:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return CachedResponse(text=entry["text"], usage=entry.get("usage", {}))
+
+    def put(self, key: str, text: str, usage: dict | None = None) -> None:
+        if not self.enabled or not isinstance(text, str):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"created_at": time.time(), "text": text, "usage": usage or {}},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop the oldest entries once the cache exceeds max_entries."""
+        try:
+            entries = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".json")
+            ]
+        except OSError:
+            return
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:excess]:
+            self._remove(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
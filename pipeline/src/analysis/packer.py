@@ -0,0 +1,128 @@
+"""Token-budgeted packing of articles into compact JSON for LLM prompts."""
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+
+from src.analysis.passages import fit_passages, ranked_passages
+from src.config import AI_TECH_KEYWORDS, SOURCE_WEIGHTS, TRIAGE_CONTENT_CHARS, RawArticle
+
+# Rough average for English prose and JSON; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+DEFAULT_MAX_CONTENT_LEN = TRIAGE_CONTENT_CHARS
+DEFAULT_MIN_CONTENT_LEN = 200
+
+# Weight of one distinct keyword hit relative to the score component
+RELEVANCE_WEIGHT = 0.5
+
+_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(kw) for kw in AI_TECH_KEYWORDS) + r")\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class PackResult:
+    """Compact JSON payload plus accounting for what did and didn't fit."""
+
+    payload: str
+    tokens_used: int
+    included: list[int] = field(default_factory=list)
+    dropped: int = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer round-trip)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def article_priority(article: RawArticle) -> float:
+    """Rank an article by score, source weight and keyword relevance."""
+    source_family = article.source.split(":", 1)[0]
+    weight = SOURCE_WEIGHTS.get(source_family, 1.0)
+    score = math.log1p(max(article.score or 0, 0))
+    text = f"{article.title} {article.head(500)}"
+    relevance = len({m.lower() for m in _KEYWORD_RE.findall(text)})
+    return weight * (1.0 + score) + RELEVANCE_WEIGHT * relevance
+
+
+def serialize_article(
+    index: int,
+    article: RawArticle,
+    content: str,
+    members: list[int] | None = None,
+) -> str:
+    """Serialize one article and its excerpt compactly, omitting null and empty fields.
+
+    ``members`` lists the other articles clustered into the same story.
+    """
+    item = {
+        "index": index,
+        "title": article.title,
+        "url": article.url,
+        "source": article.source,
+        "content": content,
+        "score": article.score,
+        "tags": article.tags,
+        "members": members,
+    }
+    item = {k: v for k, v in item.items() if v not in (None, "", [])}
+    return json.dumps(item, separators=(",", ":"), ensure_ascii=False)
+
+
+def pack_articles(
+    articles: list[RawArticle],
+    token_budget: int,
+    max_content_len: int = DEFAULT_MAX_CONTENT_LEN,
+    min_content_len: int = DEFAULT_MIN_CONTENT_LEN,
+    indices: list[int] | None = None,
+    members: dict[int, list[int]] | None = None,
+) -> PackResult:
+    """Fill a token budget with the highest-priority articles.
+
+    Articles are taken in priority order. Each one gets an excerpt of its
+    best-matching passages whose size shrinks in proportion to the budget
+    still available, never below ``min_content_len``. Articles that do not
+    fit even at the minimum excerpt are dropped. Every item keeps its position in ``articles`` as ``index`` so
+    indices returned by the model resolve against the original list.
+    ``members`` maps cluster representatives to the rest of their cluster.
+    """
+    members = members or {}
+    candidates = range(len(articles)) if indices is None else indices
+    order = sorted(candidates, key=lambda i: article_priority(articles[i]), reverse=True)
+
+    parts: list[str] = []
+    included: list[int] = []
+    dropped = 0
+    used = 1  # enclosing brackets
+
+    for idx in order:
+        remaining = token_budget - used
+        if remaining <= 0:
+            dropped += 1
+            continue
+
+        article = articles[idx]
+        passages = ranked_passages(article.content, article.title)
+        content_len = max(min_content_len, int(max_content_len * remaining / token_budget))
+        text = serialize_article(idx, article, fit_passages(passages, content_len), members.get(idx))
+        cost = estimate_tokens(text)
+        if cost > remaining and content_len > min_content_len:
+            text = serialize_article(idx, article, fit_passages(passages, min_content_len), members.get(idx))
+            cost = estimate_tokens(text)
+        if cost > remaining:
+            dropped += 1
+            continue
+
+        parts.append(text)
+        included.append(idx)
+        used += cost
+
+    return PackResult(
+        payload="[" + ",".join(parts) + "]",
+        tokens_used=used,
+        included=included,
+        dropped=dropped,
+    )
@@ -0,0 +1,153 @@
+"""Extractive passage selection — keep the parts of an article body that match its story.
+
+Article bodies are often raw HTML whose first few kilobytes are navigation,
+bylines and cookie banners. Instead of sending ``content[:N]``, bodies are
+split into passages, scored against a query (the article title, plus the
+story headline during analysis) with BM25, and the best passages are packed
+into the same character budget in their original order.
+"""
+
+import html
+import re
+
+import numpy as np
+
+PASSAGE_TARGET_CHARS = 400
+PASSAGE_SEPARATOR = "\n\n"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Tiny bonus for earlier passages so ties keep the article's lead
+POSITION_PRIOR = 1e-3
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this "
+    "to was were will with we you they he she our their not can more new how what".split()
+)
+
+_DROP_BLOCKS_RE = re.compile(
+    r"<(script|style|noscript|nav|header|footer|aside|form|svg)\b.*?</\1\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_BLOCK_TAG_RE = re.compile(r"</?(p|div|br|li|h[1-6]|tr|section|article|blockquote|pre)\b[^>]*>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_INLINE_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n+|\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def html_to_text(content: str) -> str:
+    """Strip markup from an HTML page, keeping paragraph breaks."""
+    if "<" not in content:
+        return content.strip()
+    text = _COMMENT_RE.sub(" ", content)
+    text = _DROP_BLOCKS_RE.sub(" ", text)
+    text = _BLOCK_TAG_RE.sub("\n", text)
+    text = _TAG_RE.sub(" ", text)
+    text = html.unescape(text)
+    lines = (_INLINE_SPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def split_passages(text: str, target_chars: int = PASSAGE_TARGET_CHARS) -> list[str]:
+    """Split text into passages of roughly ``target_chars``.
+
+    Short paragraphs are merged; long ones are split on sentence boundaries,
+    and sentences that are still too long are cut at whitespace.
+    """
+    pieces: list[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= target_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_RE.split(paragraph):
+            while len(sentence) > target_chars:
+                cut = sentence.rfind(" ", 0, target_chars)
+                cut = cut if cut > 0 else target_chars
+                pieces.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if sentence:
+                pieces.append(sentence)
+
+    passages: list[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > target_chars:
+            passages.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        passages.append(current)
+    return passages
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def bm25_scores(passages: list[str], query: str) -> np.ndarray:
+    """Score each passage against the query with BM25 over the passage set."""
+    terms = sorted(set(tokenize(query)))
+    if not passages or not terms:
+        return np.zeros(len(passages))
+
+    columns = {term: col for col, term in enumerate(terms)}
+    tf = np.zeros((len(passages), len(terms)))
+    lengths = np.empty(len(passages))
+    for row, passage in enumerate(passages):
+        tokens = tokenize(passage)
+        lengths[row] = len(tokens)
+        for token in tokens:
+            col = columns.get(token)
+            if col is not None:
+                tf[row, col] += 1
+
+    n = len(passages)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((n - df + 0.5) / (df + 0.5) + 1.0)
+    avg_len = max(lengths.mean(), 1.0)
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / avg_len)
+    weights = tf * (BM25_K1 + 1.0) / (tf + norm[:, None])
+    return weights @ idf
+
+
+def ranked_passages(content: str, query: str) -> list[tuple[int, str]]:
+    """Return ``(position, passage)`` pairs, best match first."""
+    passages = split_passages(html_to_text(content))
+    if not passages:
+        return []
+    scores = bm25_scores(passages, query)
+    scores = scores + POSITION_PRIOR * (1.0 - np.arange(len(passages)) / len(passages))
+    order = np.argsort(-scores, kind="stable")
+    return [(int(i), passages[i]) for i in order]
+
+
+def fit_passages(ranked: list[tuple[int, str]], budget_chars: int) -> str:
+    """Pack the best passages into ``budget_chars``, restoring document order."""
+    chosen: list[tuple[int, str]] = []
+    used = 0
+    for position, passage in ranked:
+        cost = len(passage) + (len(PASSAGE_SEPARATOR) if chosen else 0)
+        if used + cost <= budget_chars:
+            chosen.append((position, passage))
+            used += cost
+    if not chosen:
+        return ranked[0][1][:budget_chars] if ranked else ""
+    chosen.sort()
+    return PASSAGE_SEPARATOR.join(passage for _, passage in chosen)
+
+
+def select_passages(content: str, query: str, budget_chars: int) -> str:
+    """Best-matching excerpt of ``content`` for ``query`` within ``budget_chars``."""
+    text = html_to_text(content)
+    if len(text) <= budget_chars:
+        return text
+    return fit_passages(ranked_passages(text, query), budget_chars)
@@ -9,6 +9,60 @@ Your job:
 3. Rate significance 1-10 (10 = paradigm shifting, 7+ = major, 4-6 = notable)
 4. Group articles covering the same story by referencing their indices
 
+Some articles carry a "members" list: indices of other articles already identified as
+covering the same story. Treat such an article as the whole story; referencing its own
+index is enough.
+
+Respond with ONLY valid JSON, no markdown fencing:
+{
+  "stories": [
+    {
+      "headline": "Short punchy headline",
+      "category": "ai-research",
+      "significance": 8,
+      "source_article_indices": [0, 3, 7],
+      "one_line_summary": "One sentence on what happened."
+    }
+  ]
+}"""
+
+TRIAGE_SHARD_PROMPT = """You are an expert AI and technology analyst. You will receive a JSON array
+of articles, papers, and posts — one batch out of this week's full collection.
+Other batches are reviewed separately and the results merged afterwards.
+
+Your job:
+1. Identify up to 10 candidate stories in this batch worth considering for the weekly top list
+2. Categorize each as exactly one of: ai-research, ai-industry, tech, open-source, policy
+3. Rate significance 1-10 (10 = paradigm shifting, 7+ = major, 4-6 = notable)
+4. Group articles covering the same story by referencing their "index" values exactly as given
+
+Some articles carry a "members" list: indices of other articles already identified as
+covering the same story. Treat such an article as the whole story; referencing its own
+index is enough.
+
+Respond with ONLY valid JSON, no markdown fencing:
+{
+  "stories": [
+    {
+      "headline": "Short punchy headline",
+      "category": "ai-research",
+      "significance": 8,
+      "source_article_indices": [12, 40],
+      "one_line_summary": "One sentence on what happened."
+    }
+  ]
+}"""
+
+TRIAGE_REDUCE_PROMPT = """You are an expert AI and technology analyst. You will receive candidate
+stories proposed by reviewers who each saw a different batch of this week's articles.
+
+Your job:
+1. Merge candidates that describe the same story — combine their source_article_indices
+2. Re-rank the merged stories and keep the 8-15 most significant developments of the week
+3. Keep each category as exactly one of: ai-research, ai-industry, tech, open-source, policy
+4. Re-rate significance 1-10 relative to the whole week
+5. Only use source_article_indices that appear in the candidates; never invent new ones
+
 Respond with ONLY valid JSON, no markdown fencing:
 {
   "stories": [
@@ -59,6 +113,50 @@ Required structure (use these exact headings):
 ## Connecting the Dots
 [Cross-cutting analysis: what these stories mean together, emerging trends]"""
 
+SECTION_PROMPT = """You are writing one section of the weekly AI & Tech Digest. You will receive
+the triaged stories for this section along with their full source material. Other
+sections, the executive summary and the closing analysis are written separately.
+
+Requirements:
+- Clear, authoritative, and engaging tone
+- For each story: WHAT happened, WHY it matters, WHAT COMES NEXT
+- Draw connections between the stories in this section where they exist
+- Include specific technical details — never be vague
+- Be opinionated where warranted — readers want analysis, not summaries
+- End the section with a "Bottom Line" takeaway
+- Length: 400-900 words
+- Use markdown: ### subheadings per story, bullet points, **bold** for emphasis
+
+Start your response with exactly this heading line and nothing before it:
+## {heading}"""
+
+ASSEMBLY_PROMPT = """You are finishing the weekly AI & Tech Digest. The category sections have
+already been written; you will receive all of them along with the list of triaged stories.
+Write only the framing pieces that tie the issue together:
+
+- "this_week": one paragraph executive summary of the entire week (no heading)
+- "big_story": the single most important development, with deep analysis — why it
+  matters more than anything else this week and what comes next (2-4 paragraphs,
+  markdown allowed, no top-level heading)
+- "connecting_the_dots": cross-cutting analysis of what these stories mean together
+  and the emerging trends (2-3 paragraphs, markdown allowed, no top-level heading)
+
+Do not repeat the sections verbatim. Respond with ONLY valid JSON, no markdown fencing:
+{
+  "this_week": "...",
+  "big_story": "...",
+  "connecting_the_dots": "..."
+}"""
+
+ANALYSIS_CONTINUE_PROMPT = """Your previous response was cut off partway through. Everything written
+so far is reproduced below between the markers. Continue writing from exactly where it
+stops: do not repeat any text that is already there, do not restart the document or a
+section, and keep the same structure and tone through to the end.
+
+--- WRITTEN SO FAR ---
+{partial}
+--- END OF WRITTEN SO FAR ---"""
+
 RESOURCES_PROMPT = """Given the articles and analysis from this week, recommend 5-10 high-quality
 resources for readers who want to go deeper.
 
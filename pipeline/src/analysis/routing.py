@@ -0,0 +1,197 @@
+"""Per-stage model routing: ordered fallbacks and latency-based hedging.
+
+Each analyzer stage has a ``ModelRoute`` — an ordered list of models and a
+hedge deadline. The first model is called; if it fails, the next one starts
+immediately, and if it simply hasn't answered by the deadline, the next one
+is started alongside it. The deadline counts from when the request leaves
+the model's rate governor, so time spent queued for a permit doesn't trigger
+a hedge. Whichever finishes first wins and the others are cancelled. Wins,
+losses, errors and latencies are recorded per stage and model so the
+fallback lists and deadlines can be tuned from real runs.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from src.config import CACHE_DIR
+
+MODEL_STATS_PATH = os.path.join(CACHE_DIR, "model_stats.json")
+
+# Latencies kept per stage/model for the percentile summary
+MAX_LATENCY_SAMPLES = 100
+
+
+@dataclass
+class ModelRoute:
+    stage: str
+    models: list[str]
+    hedge_after: float | None = None
+
+    @property
+    def primary(self) -> str:
+        return self.models[0]
+
+
+class RoutingStats:
+    """Win/loss/error counts and recent winning latencies per stage and model."""
+
+    def __init__(self, path: str | None = MODEL_STATS_PATH):
+        self.path = path
+        self._stats: dict[str, dict] = {}
+        self._dirty = False
+        self._load()
+
+    def record(self, stage: str, model: str, outcome: str, latency: float | None = None) -> None:
+        """Record one call; ``outcome`` is "win", "loss" (cancelled) or "error"."""
+        entry = self._stats.setdefault(
+            f"{stage}:{model}", {"win": 0, "loss": 0, "error": 0, "latencies": []}
+        )
+        entry[outcome] += 1
+        if latency is not None:
+            entry["latencies"] = (entry["latencies"] + [round(latency, 3)])[-MAX_LATENCY_SAMPLES:]
+        self._dirty = True
+
+    def win_rate(self, stage: str, model: str) -> float:
+        entry = self._stats.get(f"{stage}:{model}")
+        if not entry:
+            return 0.0
+        calls = entry["win"] + entry["loss"] + entry["error"]
+        return entry["win"] / calls if calls else 0.0
+
+    def summary(self) -> list[str]:
+        lines = []
+        for key, entry in sorted(self._stats.items()):
+            stage, model = key.split(":", 1)
+            latencies = sorted(entry["latencies"])
+            p50 = latencies[len(latencies) // 2] if latencies else 0.0
+            p90 = latencies[int(len(latencies) * 0.9)] if latencies else 0.0
+            lines.append(
+                f"{stage} {model}: win rate {self.win_rate(stage, model):.0%} "
+                f"({entry['win']}W/{entry['loss']}L/{entry['error']}E), "
+                f"p50 {p50:.1f}s, p90 {p90:.1f}s"
+            )
+        return lines
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._stats, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"  Warning: Could not read model stats: {e}")
+            return
+        if isinstance(data, dict):
+            self._stats = data
+
+
+_stats: RoutingStats | None = None
+
+
+def get_routing_stats() -> RoutingStats:
+    """Return the process-wide routing stats, loading history on first use."""
+    global _stats
+    if _stats is None:
+        _stats = RoutingStats()
+    return _stats
+
+
+_dispatched: ContextVar[asyncio.Event | None] = ContextVar("route_dispatched", default=None)
+
+
+def mark_dispatched() -> None:
+    """Start the enclosing ``route_call``'s hedge clock for this model: its request is on its way."""
+    event = _dispatched.get()
+    if event is not None:
+        event.set()
+
+
+async def _attempt(call, model: str, dispatched: asyncio.Event):
+    _dispatched.set(dispatched)
+    return await call(model)
+
+
+async def route_call(route: ModelRoute, call, label: str, signals_dispatch: bool = False):
+    """Run ``await call(model)`` along ``route``; returns ``(result, model)``.
+
+    With ``signals_dispatch``, ``call`` runs ``mark_dispatched()`` once its
+    request is actually sent (after any rate-governor queueing), and the
+    hedge deadline counts from then; otherwise it counts from the start.
+    Raises the last error when every model in the route has failed.
+    """
+    stats = get_routing_stats()
+    remaining = list(route.models)
+    running: dict[asyncio.Task, tuple[str, float]] = {}
+    last_error: Exception | None = None
+    dispatched = asyncio.Event()
+    dispatched_at: float | None = None
+
+    def launch() -> None:
+        nonlocal dispatched, dispatched_at
+        model = remaining.pop(0)
+        dispatched, dispatched_at = asyncio.Event(), None
+        if not signals_dispatch:
+            dispatched.set()
+        running[asyncio.create_task(_attempt(call, model, dispatched))] = (model, time.perf_counter())
+
+    launch()
+    try:
+        while running:
+            waiter, timeout = None, None
+            if remaining and route.hedge_after:
+                if dispatched_at is None and dispatched.is_set():
+                    dispatched_at = time.perf_counter()
+                if dispatched_at is None:
+                    # Still queued for a permit: wait for it to go out, then start the clock
+                    waiter = asyncio.create_task(dispatched.wait())
+                else:
+                    timeout = max(0.0, route.hedge_after - (time.perf_counter() - dispatched_at))
+            waiting = [*running, waiter] if waiter is not None else list(running)
+            done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if waiter is not None:
+                waiter.cancel()
+                done.discard(waiter)
+            if not done:
+                if waiter is None:
+                    print(f"  {label}: no reply after {route.hedge_after:.0f}s, hedging with {remaining[0]}")
+                    launch()
+                continue
+
+            for task in done:
+                model, started = running.pop(task)
+                latency = time.perf_counter() - started
+                if task.exception() is None:
+                    stats.record(route.stage, model, "win", latency)
+                    for other, _ in running.values():
+                        stats.record(route.stage, other, "loss")
+                    if model != route.primary:
+                        print(f"  {label}: answered by {model} after {latency:.1f}s")
+                    return task.result(), model
+                last_error = task.exception()
+                stats.record(route.stage, model, "error")
+                print(f"  {label}: {model} failed: {last_error}")
+
+            if not running and remaining:
+                print(f"  {label}: falling back to {remaining[0]}")
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    raise last_error
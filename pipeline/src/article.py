@@ -0,0 +1,133 @@
+"""The article record passed between collectors, dedup, clustering and the analyzer."""
+
+from datetime import datetime
+from typing import Any
+
+from src.spool import get_spool
+
+# Shorter bodies (titles-as-content, Reddit self posts) aren't worth a spool round-trip
+SPOOL_MIN_CHARS = 1024
+
+
+def _parse_datetime(value: datetime | str | None) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class RawArticle:
+    """One collected article.
+
+    A slotted record rather than a pydantic model: thousands of these live
+    through a run, and long bodies stay in the ``BodySpool`` until
+    ``content`` is read. Copies made with ``model_copy`` (e.g. when dedup
+    merges duplicates) share the original's spooled body. The ``model_*``
+    methods mirror the pydantic API the rest of the pipeline uses.
+    """
+
+    __slots__ = (
+        "title", "url", "source", "published_at", "score", "tags",
+        "_text", "_spool", "_offset", "_size", "_length",
+    )
+
+    def __init__(
+        self,
+        *,
+        title: str,
+        url: str,
+        source: str,  # e.g. "hackernews", "arxiv", "rss:techcrunch"
+        content: str,  # Full text or substantial excerpt
+        published_at: datetime | str | None = None,
+        score: int | None = None,  # Upvotes, stars, etc.
+        tags: list[str] | None = None,
+    ):
+        self.title = title
+        self.url = url
+        self.source = source
+        self.published_at = _parse_datetime(published_at)
+        self.score = score
+        self.tags = list(tags) if tags else []
+        self.content = content
+
+    @property
+    def content(self) -> str:
+        if self._text is not None:
+            return self._text
+        return self._spool.read(self._offset, self._size)
+
+    @content.setter
+    def content(self, text: str) -> None:
+        if not isinstance(text, str):
+            raise TypeError(f"content must be str, not {type(text).__name__}")
+        self._length = len(text)
+        if self._length < SPOOL_MIN_CHARS:
+            self._text, self._spool, self._offset, self._size = text, None, 0, 0
+        else:
+            self._text, self._spool = None, get_spool()
+            self._offset, self._size = self._spool.append(text)
+
+    @property
+    def content_length(self) -> int:
+        """Length of ``content`` in characters, without loading it."""
+        return self._length
+
+    def head(self, chars: int) -> str:
+        """The first ``chars`` characters of ``content``, reading no more of the body than that needs."""
+        if self._text is not None or chars >= self._length:
+            return self.content[:chars]
+        # UTF-8 is at most 4 bytes a character; a split character at the end is dropped
+        size = min(self._size, chars * 4)
+        return self._spool.read(self._offset, size, errors="ignore")[:chars]
+
+    def model_dump(self, mode: str = "python") -> dict[str, Any]:
+        published_at = self.published_at
+        if mode == "json" and published_at is not None:
+            published_at = published_at.isoformat()
+        return {
+            "title": self.title,
+            "url": self.url,
+            "source": self.source,
+            "content": self.content,
+            "published_at": published_at,
+            "score": self.score,
+            "tags": list(self.tags),
+        }
+
+    @classmethod
+    def model_validate(cls, data: dict[str, Any]) -> "RawArticle":
+        return cls(**data)
+
+    def model_copy(self, update: dict[str, Any] | None = None) -> "RawArticle":
+        """A copy with ``update`` applied; the body is shared unless ``content`` is replaced."""
+        copy = object.__new__(RawArticle)
+        for name in self.__slots__:
+            setattr(copy, name, getattr(self, name))
+        copy.tags = list(self.tags)
+        for name, value in (update or {}).items():
+            setattr(copy, name, _parse_datetime(value) if name == "published_at" else value)
+        return copy
+
+    def shares_body(self, other: "RawArticle") -> bool:
+        """Whether both articles read their content from the same spooled body."""
+        return self._spool is not None and (self._spool, self._offset) == (other._spool, other._offset)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RawArticle):
+            return NotImplemented
+        return self.model_dump() == other.model_dump()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"RawArticle(title={self.title!r}, url={self.url!r}, source={self.source!r}, "
+            f"content=<{self._length} chars>, score={self.score!r})"
+        )
+
+    def __getstate__(self):
+        # The spool is local to this process; pickles carry the text itself
+        return self.model_dump()
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
@@ -0,0 +1,121 @@
+"""Regenerate or fill in past weekly digests, several weeks at a time.
+
+Each week in the range is an ordinary stage graph (``main.build_stages``)
+run up to analysis and curation with that week as its reference date, under
+its own checkpointed run id (``backfill-<sunday>``), so an interrupted
+backfill resumes where it stopped. Every active digest profile is built
+from each week's one collection pass. Weeks run concurrently in one process:
+they share the per-model Gemini rate governors, the response cache and the
+URL canonicalizer, and a per-source gate keeps several weeks from hitting
+the same site at once. Posts are written in one batch at the end, oldest
+first, followed by a single git commit.
+
+    python -m src.main backfill --from 2026-08-02 --to 2026-09-27
+"""
+
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta, timezone
+
+from src import checkpoint, main
+from src.checkpoint import RunCheckpoints
+from src.config import BACKFILL_CONCURRENCY, BACKFILL_SOURCE_CONCURRENCY
+from src.dag import DAGExecutor, StageFailed
+
+# Everything up to the LLM outputs; writing and publishing happen in one batch
+WEEK_TARGETS = ["analysis", "resources"]
+
+
+def sundays(start: date, end: date) -> list[date]:
+    """Every Sunday from ``start`` to ``end`` inclusive."""
+    first = start + timedelta(days=(6 - start.weekday()) % 7)
+    return [first + timedelta(weeks=i) for i in range((end - first).days // 7 + 1)] if first <= end else []
+
+
+def week_reference(sunday: date) -> datetime:
+    """End of the collection window for the digest dated ``sunday``: midnight after it."""
+    return datetime.combine(sunday + timedelta(days=1), time(), tzinfo=timezone.utc)
+
+
+async def _run_week(sunday: date, collectors: dict, gates: dict, weeks: asyncio.Semaphore) -> dict:
+    run_id = f"backfill-{sunday.isoformat()}"
+    resume = os.path.isdir(os.path.join(checkpoint.RUNS_DIR, run_id))
+    async with weeks:
+        print(f"\n[{sunday}] Starting{' (resuming)' if resume else ''}...")
+        run = RunCheckpoints(run_id, resume=resume)
+        executor = DAGExecutor(
+            main.build_stages(collectors, reference=week_reference(sunday), gates=gates, run_dir=run.directory),
+            checkpoints=run,
+            targets=list(main.profile_targets(WEEK_TARGETS)),
+        )
+        try:
+            return await executor.run()
+        finally:
+            for name, value in executor.values.items():
+                if name.partition("@")[0] == "context" and value is not None:
+                    await value.release()
+
+
+async def backfill(
+    start: date,
+    end: date,
+    concurrency: int = BACKFILL_CONCURRENCY,
+    publish: bool = True,
+) -> list[str]:
+    """Build the digest for every Sunday in ``start``..``end``; returns the written post paths."""
+    main.load_dotenv()
+    weeks = sundays(start, end)
+    if not weeks:
+        print(f"No Sundays between {start} and {end}.")
+        return []
+    print("=" * 60)
+    print(f"Backfilling {len(weeks)} weeks: {weeks[0]} → {weeks[-1]} ({concurrency} at a time)")
+    print("=" * 60)
+
+    profiles = main.active_profiles()
+    collectors = main.build_collectors()
+    gates = {name: asyncio.Semaphore(BACKFILL_SOURCE_CONCURRENCY) for name in collectors}
+    limit = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(
+        *(_run_week(sunday, collectors, gates, limit) for sunday in weeks),
+        return_exceptions=True,
+    )
+
+    print("\n" + "=" * 60)
+    written, failed, filled = [], [], set()
+    for sunday, result in zip(weeks, results):
+        if isinstance(result, StageFailed) and isinstance(result.error, main.PipelineAborted):
+            print(f"[{sunday}] Skipped: {result.error}")
+            continue
+        if isinstance(result, BaseException):
+            print(f"[{sunday}] Failed: {result}")
+            failed.append(sunday)
+            continue
+        # Resources merge into one file per profile, so weeks are applied one at a time
+        for profile, branch in main.profile_values(result, profiles):
+            if branch["analysis"] is None:
+                print(f"[{sunday}] Skipped the {profile.name} digest")
+                continue
+            post_path = main.write_post(
+                branch["triage"],
+                branch["analysis"],
+                branch["resources"],
+                source_articles=branch["unique"],
+                reference=week_reference(sunday),
+                profile=profile,
+            )
+            written.append(post_path)
+            filled.add(sunday)
+            main.update_resources(branch["resources"], profile=profile)
+            main.get_store().record_post(
+                post_path, sunday, branch["unique"], branch["clusters"], branch["triage"].get("stories", [])
+            )
+
+    if written and publish:
+        main.git_publish(message=f"digest: backfill {weeks[0]} to {weeks[-1]} ({len(filled)} weeks)")
+    print(f"Backfill done: {len(written)} posts written, {len(failed)} weeks failed")
+    if failed:
+        retry = ", ".join(str(s) for s in failed)
+        print(f"Rerun the same range to retry {retry}; finished weeks resume from checkpoints")
+    print("=" * 60)
+    return written
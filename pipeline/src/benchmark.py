@@ -0,0 +1,154 @@
+"""Offline load test for the analysis stages against the fake Gemini server.
+
+Generates a synthetic week of articles, starts ``FakeGeminiServer`` with the
+requested latency / quota / failure profile, points the analyzer at it and
+runs dedup + clustering, triage, and analysis + curation, reporting wall
+time per stage, requests served and rejected, and governor throttling.
+
+    python -m src.benchmark --articles 2000 --latency 1.5 --tps 120 --rate-limit-rate 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import string
+import time
+import tracemalloc
+
+from src.analysis import analyzer
+from src.analysis.clustering import cluster_articles
+from src.analysis.deduplicator import deduplicate
+from src.analysis.fake_gemini import FakeBehavior, FakeGeminiServer
+from src.analysis.governor import all_governors
+from src.analysis.llm_cache import get_response_cache
+from src.analysis.routing import get_routing_stats
+from src.config import RawArticle
+from src.spool import get_spool
+
+TOPICS = [
+    "open-weight language model release",
+    "GPU export controls",
+    "AI coding assistant pricing",
+    "robotics foundation model",
+    "EU AI Act enforcement",
+    "vector database funding round",
+    "reasoning benchmark results",
+    "on-device inference chip",
+    "open source license change",
+    "AI safety evaluation framework",
+]
+SOURCES = ["hackernews", "reddit:MachineLearning", "rss:techcrunch", "arxiv", "github"]
+
+
+def synthetic_articles(count: int, seed: int = 0) -> list[RawArticle]:
+    """``count`` articles over a fixed set of topics; every fifth one reposts an earlier story."""
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 9))) for _ in range(5000)
+    ]
+    articles = []
+    for i in range(count):
+        if i % 5 == 4 and articles:
+            original = rng.choice(articles)
+            articles.append(original.model_copy(update={
+                "url": f"{original.url}?utm_source=feed",
+                "source": rng.choice(SOURCES),
+            }))
+            continue
+        topic = rng.choice(TOPICS)
+        names = " ".join(rng.sample(vocabulary, 3))
+        body = f"{names.title()} and the {topic}. " + " ".join(
+            " ".join(rng.sample(vocabulary, 8)) + "." for _ in range(rng.randint(5, 40))
+        )
+        articles.append(RawArticle(
+            title=f"{names.title()}: {topic}",
+            url=f"https://news.example.com/{i}",
+            source=rng.choice(SOURCES),
+            content=body,
+            score=rng.randint(0, 2000),
+        ))
+    return articles
+
+
+async def run_benchmark(articles: list[RawArticle]) -> dict[str, float]:
+    timings = {}
+
+    start = time.perf_counter()
+    unique = deduplicate(articles)
+    clusters = cluster_articles(unique)
+    timings["dedup+cluster"] = time.perf_counter() - start
+    print(f"{len(articles)} articles → {len(unique)} unique → {len(clusters)} clusters")
+
+    start = time.perf_counter()
+    triage = await analyzer.triage_articles(unique, clusters)
+    timings["triage"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    context = analyzer.build_shared_context(triage, unique)
+    try:
+        await asyncio.gather(
+            analyzer.deep_analysis(triage, unique, context),
+            analyzer.curate_resources(triage, unique, context),
+        )
+    finally:
+        await context.release()
+    timings["analysis+resources"] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stages 3-5 against the offline fake Gemini API.")
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.5, help="median seconds before the first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--tps", type=float, default=150.0, help="output tokens per second")
+    parser.add_argument("--rpm", type=int, default=0)
+    parser.add_argument("--tpm", type=int, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--fence-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="report peak Python heap (slows the run)")
+    args = parser.parse_args()
+
+    behavior = FakeBehavior(
+        latency_median=args.latency,
+        latency_sigma=args.latency_sigma,
+        output_tokens_per_second=args.tps,
+        rpm_limit=args.rpm,
+        tpm_limit=args.tpm,
+        rate_limit_rate=args.rate_limit_rate,
+        truncate_rate=args.truncate_rate,
+        fence_rate=args.fence_rate,
+        seed=args.seed,
+    )
+
+    # Every request should reach the fake, not the on-disk response cache
+    get_response_cache().enabled = False
+
+    with FakeGeminiServer(behavior) as server:
+        os.environ["GEMINI_BASE_URL"] = server.url
+        analyzer._client = None
+        if args.trace_memory:
+            tracemalloc.start()
+        timings = asyncio.run(run_benchmark(synthetic_articles(args.articles, args.seed)))
+        if args.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"Peak heap: {peak / 2**20:.1f} MB, article bodies spooled: {get_spool().size / 2**20:.1f} MB")
+
+        service = server.service
+        print("\nStage timings:")
+        for stage, seconds in timings.items():
+            print(f"  {stage}: {seconds:.2f}s")
+        print(f"Requests served: {len(service.calls)}, rejected with 429: {service.rejected}")
+        print(f"Input tokens: {service.uncached_tokens} fresh, {service.cached_tokens} cached")
+        for model, governor in all_governors().items():
+            print(f"  governor {model}: {governor.throttled} backoffs")
+        for line in get_routing_stats().summary():
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Per-run stage checkpoints so a failed run can resume without redoing finished work.
+
+Every stage of ``run_pipeline`` writes its output to
+``<CACHE_DIR>/runs/<run-id>/<stage>.json`` together with two hashes: the
+hash of its inputs (the stage name, the checkpoint format version and the
+output hashes of the stages it consumes) and the hash of its own output.
+When a run is resumed, a stage whose stored input hash matches the one
+computed now is skipped and its output loaded from disk; anything
+downstream of a stage that did rerun sees a new input hash and reruns too.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from src.config import CACHE_DIR
+
+# Bump when a stage's output format changes so old checkpoints are ignored
+CHECKPOINT_VERSION = 1
+
+RUNS_DIR = os.path.join(CACHE_DIR, "runs")
+
+# Written when a run starts (not when it resumes), so runs can be ordered by start time
+RUN_INFO = "run.json"
+
+
+def _to_json(value: Any) -> Any:
+    """``default`` hook for json: records with ``model_dump`` are converted one at a time as they're written."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def content_hash(value: Any) -> str:
+    """Stable hash of a JSON-serializable value."""
+    digest = hashlib.sha256()
+    # Streamed, so a large output is never held as one JSON string
+    for chunk in json.JSONEncoder(sort_keys=True, ensure_ascii=False, default=_to_json).iterencode(value):
+        digest.update(chunk.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def _started_at(directory: str) -> float:
+    try:
+        with open(os.path.join(directory, RUN_INFO), "r", encoding="utf-8") as f:
+            return float(json.load(f)["started_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        # Runs from before run.json was written
+        return os.path.getmtime(directory)
+
+
+def run_ids(runs_dir: str | None = None) -> list[str]:
+    """Every run in ``runs_dir``, oldest start first.
+
+    Ordered by when each run was started, not by id: named runs
+    (``finalize-<week>``, ``backfill-<sunday>``, ``--run week-6``) would
+    otherwise sort after every timestamp id.
+    """
+    runs_dir = runs_dir or RUNS_DIR
+    try:
+        names = [name for name in os.listdir(runs_dir) if os.path.isdir(os.path.join(runs_dir, name))]
+    except OSError:
+        return []
+    return sorted(names, key=lambda name: (_started_at(os.path.join(runs_dir, name)), name))
+
+
+def latest_run_id(runs_dir: str | None = None) -> str | None:
+    """The most recently started run."""
+    runs = run_ids(runs_dir)
+    return runs[-1] if runs else None
+
+
+class RunCheckpoints:
+    """Checkpoint store for one pipeline run."""
+
+    def __init__(
+        self,
+        run_id: str,
+        resume: bool = False,
+        runs_dir: str | None = None,
+        rerun: tuple[str, ...] = (),
+    ):
+        runs_dir = runs_dir or RUNS_DIR
+        self.run_id = run_id
+        self.resume = resume
+        # Stages to recompute even when their checkpoint is still valid
+        self.rerun = set(rerun)
+        self.directory = os.path.join(runs_dir, run_id)
+        self.hashes: dict[str, str] = {}
+        self.skipped: list[str] = []
+        if resume and not os.path.isdir(self.directory):
+            raise FileNotFoundError(f"No checkpoints for run {run_id} in {runs_dir}")
+        if not resume:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, RUN_INFO), "w", encoding="utf-8") as f:
+                json.dump({"run_id": run_id, "started_at": time.time()}, f)
+
+    def input_hash(self, stage: str, inputs: list[str], extra: Any = None) -> str:
+        """Hash of a stage's identity and the output hashes of the stages it reads."""
+        return content_hash({
+            "version": CHECKPOINT_VERSION,
+            "stage": stage,
+            "inputs": {name: self.hashes[name] for name in inputs},
+            "extra": extra,
+        })
+
+    def passthrough(self, stage: str, inputs: list[str], extra: Any = None) -> None:
+        """Give an uncheckpointed stage an identity derived from its inputs.
+
+        In-memory stages (e.g. a context cache handle) can't be stored, but
+        downstream checkpoints still need a hash to key on.
+        """
+        self.hashes[stage] = self.input_hash(stage, inputs, extra)
+
+    async def stage(
+        self,
+        stage: str,
+        compute: Callable[[], Awaitable[Any]],
+        inputs: list[str] | None = None,
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+        extra: Any = None,
+        still_valid: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Run ``compute`` for ``stage`` or, when resuming, reuse its checkpoint.
+
+        ``encode``/``decode`` convert between the stage's result and JSON.
+        ``extra`` folds anything else the stage depends on into its input
+        hash; ``still_valid`` can reject a checkpoint whose side effects are
+        gone (e.g. a written file that was deleted).
+        """
+        key = self.input_hash(stage, inputs or [], extra)
+        if self.resume and stage not in self.rerun:
+            checkpoint = self._load(stage)
+            if (
+                checkpoint is not None
+                and checkpoint.get("input_hash") == key
+                and (still_valid is None or still_valid(checkpoint["output"]))
+            ):
+                self.hashes[stage] = checkpoint["output_hash"]
+                self.skipped.append(stage)
+                print(f"  Resumed '{stage}' from checkpoint")
+                return decode(checkpoint["output"])
+
+        result = await compute()
+        output = encode(result)
+        self.hashes[stage] = content_hash(output)
+        self._save(stage, {
+            "version": CHECKPOINT_VERSION,
+            "stage": stage,
+            "input_hash": key,
+            "output_hash": self.hashes[stage],
+            "created_at": time.time(),
+            "output": output,
+        })
+        return result
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def _load(self, stage: str) -> dict | None:
+        try:
+            with open(self._path(stage), "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"  Warning: Ignoring unreadable checkpoint for '{stage}': {e}")
+            return None
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            return None
+        return checkpoint
+
+    def _save(self, stage: str, checkpoint: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(stage)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False, default=_to_json)
+        os.replace(tmp_path, path)
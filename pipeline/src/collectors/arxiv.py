@@ -1,7 +1,7 @@
 """ArXiv API collector for AI/ML papers."""
 
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 
 import httpx
 
@@ -13,12 +13,16 @@ ARXIV_NS = {"atom": "http://www.w3.org/2005/Atom"}
 
 
 class ArxivCollector(BaseCollector):
-    def __init__(self):
-        self.cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+    def __init__(self, reference: datetime | None = None):
+        super().__init__(reference)
 
     async def collect(self) -> list[RawArticle]:
         articles = []
         query = " OR ".join(f"cat:{cat}" for cat in ARXIV_CATEGORIES)
+        if self.reference is not None:
+            # Newest-first results only reach back a few days; ask for the past week directly
+            window = f"[{self.cutoff:%Y%m%d%H%M} TO {self.reference:%Y%m%d%H%M}]"
+            query = f"({query}) AND submittedDate:{window}"
         params = {
             "search_query": query,
             "sortBy": "submittedDate",
@@ -91,7 +95,7 @@ class ArxivCollector(BaseCollector):
                     pass
 
             # Keep the feed focused on the last 7 days.
-            if published_at and published_at < self.cutoff:
+            if not self.in_window(published_at):
                 continue
 
             content = f"Authors: {', '.join(authors)}\n\n{abstract}"
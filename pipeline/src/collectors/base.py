@@ -1,10 +1,63 @@
 """Abstract base collector class."""
 
 from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from src.analysis.canonical import get_canonicalizer
 from src.config import RawArticle
+from src.store import get_store
+
+COLLECTION_WINDOW_DAYS = 7
+PAGE_MAX_CHARS = 50000
 
 
 class BaseCollector(ABC):
+    def __init__(self, reference: datetime | None = None):
+        # End of the collection window. None means "now" (the weekly run);
+        # a past datetime collects that week instead (backfill).
+        self.reference = reference
+        self.cutoff = (reference or datetime.now(timezone.utc)) - timedelta(days=COLLECTION_WINDOW_DAYS)
+        # Pages downloaded by this collector, saved to the store in one batch with its articles
+        self.pages: list[tuple[str, str, str]] = []
+        # Recently downloaded pages found by _load_cached_pages, by URL
+        self._cached_pages: dict[str, str] = {}
+
+    def in_window(self, published: datetime | None) -> bool:
+        """Whether an item dated ``published`` belongs to this collection window."""
+        if published is None:
+            return True
+        if published < self.cutoff:
+            return False
+        return self.reference is None or published < self.reference
+
+    def _load_cached_pages(self, urls: list[str]) -> None:
+        """Look up which of ``urls`` the store downloaded recently, in one query.
+
+        Collectors call this once per batch before fetching its pages, so
+        ``_fetch_page`` doesn't hit SQLite on the event loop for every page.
+        """
+        self._cached_pages.update(get_store().cached_pages(urls))
+
+    async def _fetch_page(self, client: httpx.AsyncClient, url: str) -> str:
+        """An article page's text, from the store if ``_load_cached_pages`` found it."""
+        cached = self._cached_pages.get(url)
+        if cached is not None:
+            return cached
+        try:
+            resp = await client.get(url)
+            resp.raise_for_status()
+            # Return raw HTML text — the analyzer will handle extraction
+            text = resp.text
+            get_canonicalizer().record_fetch(url, str(resp.url), text)
+        except Exception:
+            return ""
+        text = text[:PAGE_MAX_CHARS]
+        if text:
+            self.pages.append((url, str(resp.url), text))
+        return text
+
     @abstractmethod
     async def collect(self) -> list[RawArticle]:
         pass
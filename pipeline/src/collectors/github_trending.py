@@ -1,7 +1,6 @@
 """GitHub trending repositories collector using the Search API."""
 
 import os
-from datetime import datetime, timedelta, timezone
 
 import httpx
 
@@ -27,7 +26,9 @@ GITHUB_TOPICS = [
 class GitHubTrendingCollector(BaseCollector):
     async def collect(self) -> list[RawArticle]:
         articles = []
-        date_cutoff = (datetime.now(timezone.utc) - timedelta(days=7)).strftime("%Y-%m-%d")
+        date_cutoff = f">{self.cutoff:%Y-%m-%d}"
+        if self.reference is not None:
+            date_cutoff = f"{self.cutoff:%Y-%m-%d}..{self.reference:%Y-%m-%d}"
 
         headers = {"User-Agent": USER_AGENT, "Accept": "application/vnd.github.v3+json"}
         token = os.getenv("GITHUB_TOKEN")
@@ -62,7 +63,7 @@ class GitHubTrendingCollector(BaseCollector):
     async def _search_topic(
         self, client: httpx.AsyncClient, topic: str, date_cutoff: str
     ) -> list[RawArticle]:
-        query = f"topic:{topic} stars:>50 pushed:>{date_cutoff}"
+        query = f"topic:{topic} stars:>50 pushed:{date_cutoff}"
         params = {
             "q": query,
             "sort": "stars",
@@ -1,6 +1,7 @@
 """HackerNews API collector."""
 
 import asyncio
+from datetime import datetime
 
 import httpx
 
@@ -8,10 +9,14 @@ from src.collectors.base import BaseCollector
 from src.config import RawArticle, AI_TECH_KEYWORDS, HTTP_TIMEOUT, USER_AGENT
 
 HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
+# The Firebase API only lists current stories; past weeks come from the Algolia index
+HN_SEARCH_URL = "https://hn.algolia.com/api/v1/search"
 
 
 class HackerNewsCollector(BaseCollector):
-    def __init__(self):
+    def __init__(self, reference: datetime | None = None, keywords: list[str] | None = None):
+        super().__init__(reference)
+        self.keywords = AI_TECH_KEYWORDS if keywords is None else keywords
         self.min_score = 50
         self.max_stories = 30
 
@@ -22,6 +27,9 @@ class HackerNewsCollector(BaseCollector):
             headers={"User-Agent": USER_AGENT},
             follow_redirects=True,
         ) as client:
+            if self.reference is not None:
+                return await self._collect_week(client)
+
             # Fetch both top and best story IDs
             story_ids = set()
             for endpoint in ("topstories", "beststories"):
@@ -36,7 +44,16 @@ class HackerNewsCollector(BaseCollector):
             # Fetch individual stories concurrently
             sem = asyncio.Semaphore(10)  # Limit concurrent requests
             tasks = [self._fetch_story(client, sem, sid) for sid in story_ids]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            stories = [s for s in await asyncio.gather(*tasks, return_exceptions=True) if isinstance(s, tuple)]
+
+            # Then their linked pages, checking the store for all of them at once
+            self._load_cached_pages([url for _, url, _, _ in stories])
+
+            async def build(title: str, url: str, score: int, text: str) -> RawArticle | None:
+                async with sem:
+                    return await self._build_article(client, title, url, score, text)
+
+            results = await asyncio.gather(*(build(*story) for story in stories), return_exceptions=True)
 
             for result in results:
                 if isinstance(result, RawArticle):
@@ -50,7 +67,8 @@ class HackerNewsCollector(BaseCollector):
 
     async def _fetch_story(
         self, client: httpx.AsyncClient, sem: asyncio.Semaphore, story_id: int
-    ) -> RawArticle | None:
+    ) -> tuple[str, str, int, str] | None:
+        """A story's title, URL, score and text, if it scores high enough."""
         async with sem:
             try:
                 resp = await client.get(f"{HN_API_BASE}/item/{story_id}.json")
@@ -68,44 +86,72 @@ class HackerNewsCollector(BaseCollector):
 
             title = item.get("title", "")
             url = item.get("url", f"https://news.ycombinator.com/item?id={story_id}")
-
-            # Filter for AI/tech relevance
-            if not self._is_relevant(title, url):
-                return None
-
-            # Try to fetch linked article content
-            content = ""
-            if url and not url.startswith("https://news.ycombinator.com"):
-                content = await self._fetch_content(client, url)
-
-            # Include HN text (for Ask HN, Show HN posts)
-            hn_text = item.get("text", "")
-            if hn_text:
-                content = f"{hn_text}\n\n{content}" if content else hn_text
-
-            if not content:
-                content = title
-
-            return RawArticle(
-                title=title,
-                url=url,
-                source="hackernews",
-                content=content,
-                score=score,
-                tags=["hackernews"],
-            )
-
-    async def _fetch_content(self, client: httpx.AsyncClient, url: str) -> str:
+            return title, url, score, item.get("text", "")
+
+    async def _collect_week(self, client: httpx.AsyncClient) -> list[RawArticle]:
+        """Top stories submitted inside the collection window, for backfills."""
+        params = {
+            "tags": "story",
+            "numericFilters": (
+                f"created_at_i>={int(self.cutoff.timestamp())},"
+                f"created_at_i<{int(self.reference.timestamp())},"
+                f"points>={self.min_score}"
+            ),
+            "hitsPerPage": "100",
+        }
         try:
-            resp = await client.get(url)
+            resp = await client.get(HN_SEARCH_URL, params=params)
             resp.raise_for_status()
-            text = resp.text
-            if len(text) > 50000:
-                text = text[:50000]
-            return text
-        except Exception:
-            return ""
+            hits = resp.json().get("hits", [])
+        except Exception as e:
+            print(f"HN search error: {e}")
+            return []
+
+        sem = asyncio.Semaphore(10)
+
+        async def build(hit: dict) -> RawArticle | None:
+            url = hit.get("url") or f"https://news.ycombinator.com/item?id={hit.get('objectID')}"
+            async with sem:
+                return await self._build_article(
+                    client, hit.get("title", ""), url, hit.get("points", 0), hit.get("story_text") or ""
+                )
+
+        self._load_cached_pages([hit["url"] for hit in hits if hit.get("url")])
+        results = await asyncio.gather(*(build(hit) for hit in hits), return_exceptions=True)
+        articles = [r for r in results if isinstance(r, RawArticle)]
+        articles.sort(key=lambda a: a.score or 0, reverse=True)
+        articles = articles[: self.max_stories]
+        print(f"  HackerNews: {len(articles)} articles")
+        return articles
+
+    async def _build_article(
+        self, client: httpx.AsyncClient, title: str, url: str, score: int, hn_text: str
+    ) -> RawArticle | None:
+        # Filter for AI/tech relevance
+        if not self._is_relevant(title, url):
+            return None
+
+        # Try to fetch linked article content
+        content = ""
+        if url and not url.startswith("https://news.ycombinator.com"):
+            content = await self._fetch_page(client, url)
+
+        # Include HN text (for Ask HN, Show HN posts)
+        if hn_text:
+            content = f"{hn_text}\n\n{content}" if content else hn_text
+
+        if not content:
+            content = title
+
+        return RawArticle(
+            title=title,
+            url=url,
+            source="hackernews",
+            content=content,
+            score=score,
+            tags=["hackernews"],
+        )
 
     def _is_relevant(self, title: str, url: str) -> bool:
         text = f"{title} {url}".lower()
-        return any(kw in text for kw in AI_TECH_KEYWORDS)
+        return any(kw in text for kw in self.keywords)
@@ -1,6 +1,7 @@
 """Reddit public JSON API collector."""
 
 import asyncio
+from datetime import datetime
 
 import httpx
 
@@ -9,11 +10,16 @@ from src.config import RawArticle, SUBREDDITS, HTTP_TIMEOUT, USER_AGENT
 
 
 class RedditCollector(BaseCollector):
-    def __init__(self):
-        self.subreddits = SUBREDDITS
+    def __init__(self, reference: datetime | None = None, subreddits: list[str] | None = None):
+        super().__init__(reference)
+        self.subreddits = SUBREDDITS if subreddits is None else subreddits
         self.min_score = 100
 
     async def collect(self) -> list[RawArticle]:
+        if self.reference is not None:
+            # top.json?t=week only ever covers the current week
+            print("  Reddit: no historical listing API, skipping for backfill")
+            return []
         articles = []
         async with httpx.AsyncClient(
             timeout=HTTP_TIMEOUT,
@@ -1,7 +1,7 @@
 """RSS feed collector using feedparser and httpx."""
 
 import asyncio
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 import feedparser
 import httpx
@@ -11,9 +11,13 @@ from src.config import RSS_FEEDS, RawArticle, HTTP_TIMEOUT, USER_AGENT
 
 
 class RSSCollector(BaseCollector):
-    def __init__(self):
-        self.feeds = RSS_FEEDS
-        self.cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+    def __init__(
+        self,
+        reference: datetime | None = None,
+        feeds: list[tuple[str, str]] | None = None,
+    ):
+        super().__init__(reference)
+        self.feeds = RSS_FEEDS if feeds is None else feeds
 
     async def collect(self) -> list[RawArticle]:
         articles = []
@@ -43,9 +47,10 @@ class RSSCollector(BaseCollector):
             print(f"Failed to fetch RSS feed {source_name}: {e}")
             return []
 
+        self._load_cached_pages([entry["link"] for entry in feed.entries if entry.get("link")])
         for entry in feed.entries:
             published = self._parse_date(entry)
-            if published and published < self.cutoff:
+            if not self.in_window(published):
                 continue
 
             url = entry.get("link", "")
@@ -53,7 +58,7 @@ class RSSCollector(BaseCollector):
                 continue
 
             # Try to fetch full article content
-            content = await self._fetch_full_content(client, url)
+            content = await self._fetch_page(client, url)
             if not content:
                 # Fallback to RSS summary
                 content = entry.get("summary", "") or entry.get("description", "")
@@ -75,19 +80,6 @@ class RSSCollector(BaseCollector):
         print(f"  RSS {source_name}: {len(articles)} articles")
         return articles
 
-    async def _fetch_full_content(self, client: httpx.AsyncClient, url: str) -> str:
-        try:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            # Return raw HTML text — the analyzer will handle extraction
-            # For now, take a reasonable chunk of text content
-            text = resp.text
-            if len(text) > 50000:
-                text = text[:50000]
-            return text
-        except Exception:
-            return ""
-
     def _parse_date(self, entry) -> datetime | None:
         for field in ("published_parsed", "updated_parsed"):
             parsed = entry.get(field)
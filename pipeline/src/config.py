@@ -1,17 +1,45 @@
 """Configuration, data models, and source lists for the pipeline."""
 
-from pydantic import BaseModel, Field
-from datetime import datetime
+import os
+from dataclasses import dataclass
 
+from pydantic import BaseModel
 
-class RawArticle(BaseModel):
+# RawArticle is re-exported here for existing callers
+from src.article import RawArticle
+
+
+# --- Structured LLM output ---
+# These double as Gemini response schemas, which reject default values,
+# so every field is required.
+
+class TriagedStory(BaseModel):
+    headline: str
+    category: str
+    significance: int
+    source_article_indices: list[int]
+    one_line_summary: str
+
+
+class TriageResult(BaseModel):
+    stories: list[TriagedStory]
+
+
+class AnalysisFraming(BaseModel):
+    this_week: str
+    big_story: str
+    connecting_the_dots: str
+
+
+class CuratedResource(BaseModel):
     title: str
     url: str
-    source: str  # e.g. "hackernews", "arxiv", "rss:techcrunch"
-    content: str  # Full text or substantial excerpt
-    published_at: datetime | None = None
-    score: int | None = None  # Upvotes, stars, etc.
-    tags: list[str] = Field(default_factory=list)
+    type: str
+    description: str
+
+
+class ResourceList(BaseModel):
+    resources: list[CuratedResource]
 
 
 # --- RSS Feeds ---
@@ -53,13 +81,221 @@ AI_TECH_KEYWORDS = [
     "agent", "copilot", "automation", "semiconductor", "chip",
 ]
 
+# --- Digest profiles ---
+# Each profile is its own digest, built from the articles of one shared
+# collection pass: the collectors fetch the union of every active profile's
+# sources, and each profile then keeps only its own (see src/main.py).
+SOURCE_FAMILIES = ("rss", "hackernews", "reddit", "arxiv", "github")
+
+
+@dataclass(frozen=True)
+class DigestProfile:
+    name: str
+    title: str  # Post title, followed by "— Week of ..."
+    focus: str  # Steers triage and the analysis; empty for the general digest
+    rss_feeds: tuple[tuple[str, str], ...]
+    subreddits: tuple[str, ...]
+    keywords: tuple[str, ...]  # HackerNews stories must mention one
+    sources: tuple[str, ...] = SOURCE_FAMILIES
+    content_dir: str = ""  # Under content/; "" is the site's own posts/ and resources.json
+
+    def matches(self, article: RawArticle) -> bool:
+        """Whether ``article`` would have been collected for this profile alone."""
+        family, _, name = article.source.partition(":")
+        if family not in self.sources:
+            return False
+        if family == "rss":
+            return any(name == feed for feed, _ in self.rss_feeds)
+        if family == "reddit":
+            return name.removeprefix("r/") in self.subreddits
+        if family == "hackernews":
+            text = f"{article.title} {article.url}".lower()
+            return any(kw in text for kw in self.keywords)
+        return True
+
+
+PROFILES = {
+    "general": DigestProfile(
+        name="general",
+        title="AI & Tech Weekly Digest",
+        focus="",
+        rss_feeds=tuple(RSS_FEEDS),
+        subreddits=tuple(SUBREDDITS),
+        keywords=tuple(AI_TECH_KEYWORDS),
+    ),
+    "open-source": DigestProfile(
+        name="open-source",
+        title="Open Source AI Tooling Weekly",
+        focus="open-source models, libraries, developer tools and notable releases",
+        rss_feeds=(
+            ("huggingface", "https://huggingface.co/blog/feed.xml"),
+            ("simonwillison", "https://simonwillison.net/atom/everything/"),
+            ("github-blog", "https://github.blog/feed/"),
+            ("lwn", "https://lwn.net/headlines/rss"),
+        ),
+        subreddits=("LocalLLaMA", "opensource", "programming", "selfhosted"),
+        keywords=(
+            "open source", "open-source", "open weights", "github", "release",
+            "library", "framework", "llama", "mistral", "hugging face", "pytorch",
+            "python", "rust", "compiler", "inference", "self-hosted", "linux",
+        ),
+        sources=("rss", "hackernews", "reddit", "github"),
+        content_dir="open-source",
+    ),
+    "policy": DigestProfile(
+        name="policy",
+        title="AI Policy Weekly",
+        focus="regulation, lawsuits, government action and the societal impact of AI and tech",
+        rss_feeds=(
+            ("arstechnica-policy", "https://feeds.arstechnica.com/arstechnica/tech-policy"),
+            ("theverge-policy", "https://www.theverge.com/rss/policy/index.xml"),
+            ("eff", "https://www.eff.org/rss/updates.xml"),
+        ),
+        subreddits=("technology", "artificial", "privacy"),
+        keywords=(
+            "regulation", "regulator", "policy", "law", "lawsuit", "court", "copyright",
+            "antitrust", "privacy", "ftc", "congress", "senate", "eu ai act",
+            "export control", "ban", "government", "safety",
+        ),
+        sources=("rss", "hackernews", "reddit"),
+        content_dir="policy",
+    ),
+}
+
+# Comma-separated profile names; the first is the primary digest
+DIGEST_PROFILES = [name.strip() for name in os.getenv("DIGEST_PROFILES", "general").split(",") if name.strip()]
+
+
+def active_profiles(names: list[str] | None = None) -> list[DigestProfile]:
+    """The profiles named in ``names`` (default: DIGEST_PROFILES), in that order."""
+    names = DIGEST_PROFILES if names is None else names
+    unknown = [name for name in names if name not in PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown digest profile(s) {', '.join(unknown)}; known: {', '.join(PROFILES)}")
+    return [PROFILES[name] for name in dict.fromkeys(names)] or [PROFILES["general"]]
+
+
 # --- Category values ---
 VALID_CATEGORIES = ["ai-research", "ai-industry", "tech", "open-source", "policy"]
 
 # --- Resource types ---
 VALID_RESOURCE_TYPES = ["paper", "article", "tool", "repo", "video", "podcast", "newsletter"]
 
+# --- Triage prompt budget ---
+TRIAGE_INPUT_TOKEN_BUDGET = int(os.getenv("TRIAGE_INPUT_TOKEN_BUDGET", "60000"))
+
+# Per-article excerpt budgets (characters of best-matching passages)
+TRIAGE_CONTENT_CHARS = int(os.getenv("TRIAGE_CONTENT_CHARS", "1500"))
+ANALYSIS_CONTENT_CHARS = int(os.getenv("ANALYSIS_CONTENT_CHARS", "2500"))
+RESOURCES_CONTENT_CHARS = int(os.getenv("RESOURCES_CONTENT_CHARS", "500"))
+
+# Above this many articles, triage switches to sharded map-reduce mode
+TRIAGE_SHARD_SIZE = int(os.getenv("TRIAGE_SHARD_SIZE", "150"))
+TRIAGE_SHARD_CONCURRENCY = int(os.getenv("TRIAGE_SHARD_CONCURRENCY", "4"))
+
+# --- Deep analysis mode ---
+# "single": one Gemini Pro call writes the whole post.
+# "sections": one concurrent call per category section, then a light assembly call.
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "single").lower()
+
+# Category → post section heading, in the order sections appear in the post
+ANALYSIS_SECTIONS = {
+    "ai-research": "AI Research & Breakthroughs",
+    "ai-industry": "Industry Moves",
+    "tech": "Industry Moves",
+    "open-source": "Open Source & Tools",
+    "policy": "Policy & Society",
+}
+
+# --- Deep analysis streaming ---
+ANALYSIS_STREAMING = os.getenv("ANALYSIS_STREAM", "off").lower() in ("1", "on", "true", "yes")
+ANALYSIS_STREAM_RESUMES = int(os.getenv("ANALYSIS_STREAM_RESUMES", "2"))
+
+# Relative trust in each source family when packing articles into a prompt
+SOURCE_WEIGHTS = {
+    "arxiv": 1.2,
+    "rss": 1.1,
+    "hackernews": 1.0,
+    "reddit": 0.9,
+    "github": 0.9,
+}
+
 # --- HTTP settings ---
 HTTP_TIMEOUT = 15.0
 MAX_RETRIES = 2
 USER_AGENT = "AI-Tech-Digest-Bot/1.0 (https://github.com/ai-tech-digest)"
+
+# --- Local cache ---
+CACHE_DIR = os.getenv(
+    "DIGEST_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".cache")
+)
+
+# Article pages fetched by the collectors are reused from the article store
+# (src/store.py) for this long, so reruns don't download them again
+PAGE_CACHE_TTL_HOURS = float(os.getenv("PAGE_CACHE_TTL_HOURS", "168"))
+
+# Deep analysis text is appended here while it streams in, unless the caller
+# gives a path of its own (pipeline runs use their run directory)
+ANALYSIS_PARTIAL_PATH = os.path.join(CACHE_DIR, "analysis.partial.md")
+
+# --- LLM response cache ---
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm")
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false", "no")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+
+# --- Gemini rate governor (per-model quotas; TPM counts input tokens) ---
+GEMINI_FLASH_RPM = int(os.getenv("GEMINI_FLASH_RPM", "1000"))
+GEMINI_FLASH_TPM = int(os.getenv("GEMINI_FLASH_TPM", "1000000"))
+GEMINI_PRO_RPM = int(os.getenv("GEMINI_PRO_RPM", "150"))
+GEMINI_PRO_TPM = int(os.getenv("GEMINI_PRO_TPM", "2000000"))
+GOVERNOR_MAX_RETRIES = int(os.getenv("GOVERNOR_MAX_RETRIES", "5"))
+GOVERNOR_BASE_BACKOFF = float(os.getenv("GOVERNOR_BASE_BACKOFF", "2.0"))
+GOVERNOR_MAX_BACKOFF = 60.0
+
+# --- Model routing ---
+# Start the next model in a stage's fallback list if the current one hasn't
+# answered after this many seconds (0 disables hedging; errors still fall back)
+HEDGE_FLASH_SECONDS = float(os.getenv("HEDGE_FLASH_SECONDS", "60"))
+HEDGE_PRO_SECONDS = float(os.getenv("HEDGE_PRO_SECONDS", "240"))
+
+# --- Gemini context caching (shared prefix for analysis and curation) ---
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE", "on").lower() not in ("0", "off", "false", "no")
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+# --- Stage timeouts (seconds; 0 disables) ---
+def _timeout(env: str, default: str) -> float | None:
+    return float(os.getenv(env, default)) or None
+
+
+COLLECTOR_TIMEOUT = _timeout("COLLECTOR_TIMEOUT", "300")
+TRIAGE_TIMEOUT = _timeout("TRIAGE_TIMEOUT", "900")
+ANALYSIS_TIMEOUT = _timeout("ANALYSIS_TIMEOUT", "1800")
+RESOURCES_TIMEOUT = _timeout("RESOURCES_TIMEOUT", "900")
+PUBLISH_TIMEOUT = _timeout("PUBLISH_TIMEOUT", "300")
+
+# --- Event-loop stall detection (--detect-stalls) ---
+STALL_THRESHOLD_MS = float(os.getenv("STALL_THRESHOLD_MS", "100"))
+
+# --- Backfill (python -m src.main backfill) ---
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "3"))  # weeks in flight
+BACKFILL_SOURCE_CONCURRENCY = int(os.getenv("BACKFILL_SOURCE_CONCURRENCY", "1"))  # weeks fetching one source
+
+# --- Collector daemon (python -m src.main daemon) ---
+def _schedule(value: str) -> dict[str, float]:
+    """Parse "hackernews=3600,rss=86400" into {"hackernews": 3600.0, "rss": 86400.0}."""
+    schedule = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            schedule[name.strip()] = float(seconds)
+    return schedule
+
+
+# Seconds between fetches per source: hourly snapshots of the fast-moving
+# front pages, daily for feeds and listings that change slowly
+DAEMON_SCHEDULE = _schedule(os.getenv(
+    "DAEMON_SCHEDULE", "hackernews=3600,reddit=3600,rss=86400,arxiv=86400,github=86400"
+))
+DAEMON_RETRY_SECONDS = float(os.getenv("DAEMON_RETRY_SECONDS", "600"))
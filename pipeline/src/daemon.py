@@ -0,0 +1,148 @@
+"""Collector daemon: spread collection over the week instead of one Sunday burst.
+
+Each source is fetched on its own interval (hourly HN/Reddit snapshots,
+daily RSS/arXiv/GitHub by default; see ``DAEMON_SCHEDULE``). Every snapshot
+is folded into the deduplicated set of each article's digest week (by its
+publish date; undated items go to the week being collected) in the
+``ArticleStore`` right away, so by Sunday ``python -m src.main finalize`` only has to cluster,
+triage, analyze and publish what is already there.
+
+    python -m src.main daemon            # run until interrupted
+    python -m src.main daemon --once     # fetch whatever is due, then exit (cron)
+"""
+
+import asyncio
+import time
+from datetime import date
+
+from src import main
+from src.config import COLLECTOR_TIMEOUT, DAEMON_RETRY_SECONDS, DAEMON_SCHEDULE, RawArticle
+from src.lazy import lazy_function
+from src.spool import fresh_spool
+from src.store import ArticleStore, digest_week
+
+merge_new = lazy_function("src.analysis.deduplicator", "merge_new")
+
+
+class CollectorDaemon:
+    def __init__(
+        self,
+        store: ArticleStore,
+        schedule: dict[str, float] | None = None,
+        collectors: dict | None = None,
+    ):
+        self.store = store
+        self.schedule = schedule or DAEMON_SCHEDULE
+        self.collectors = collectors or main.build_collectors()
+
+    def _wait(self, name: str, now: float) -> float:
+        """Seconds until ``name`` is due; a failed fetch is retried sooner than its interval."""
+        last = self.store.last_fetch(name)
+        if last is None:
+            return 0.0
+        fetched_at, error = last
+        interval = self.schedule[name]
+        if error is not None:
+            interval = min(interval, DAEMON_RETRY_SECONDS)
+        return max(0.0, fetched_at + interval - now)
+
+    def due(self, now: float | None = None) -> list[str]:
+        """Sources whose interval has elapsed since their last fetch."""
+        now = now or time.time()
+        return [name for name in self.schedule if name in self.collectors and self._wait(name, now) == 0.0]
+
+    def next_due_in(self, now: float | None = None) -> float:
+        """Seconds until the next source is due."""
+        now = now or time.time()
+        return min((self._wait(name, now) for name in self.schedule if name in self.collectors), default=3600.0)
+
+    async def tick(self) -> dict[str, int]:
+        """Fetch every due source and fold the results into this week's store; returns new/changed counts."""
+        names = self.due()
+        if not names:
+            return {}
+        # Article bodies only live as long as the tick; the next one reloads them from the store
+        with fresh_spool():
+            return await self._tick(names)
+
+    def _week_of(self, article: RawArticle, current: date, finalized: dict[date, float | None]) -> date | None:
+        """The digest week ``article`` goes into, or None if that digest is already out.
+
+        Collectors look back a rolling seven days, so a Monday fetch still
+        returns last week's items; they belong to last week's digest, not
+        to ``current``. ``finalized`` caches each week's publish time.
+        """
+        if article.published_at is None:
+            return current
+        week = digest_week(article.published_at)
+        if week >= current:
+            return current
+        if week not in finalized:
+            finalized[week] = self.store.finalized_at(week)
+        if not finalized[week]:
+            return week
+        # Published after that digest went out: news for the next one
+        return current if article.published_at.timestamp() > finalized[week] else None
+
+    async def _tick(self, names: list[str]) -> dict[str, int]:
+        current = self.store.current_week()
+        results = await asyncio.gather(*(self._fetch(name) for name in names), return_exceptions=True)
+
+        fresh: dict[date, list[RawArticle]] = {}
+        fetched = covered = 0
+        finalized = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                print(f"  {name} failed: {result}")
+                self.store.record_fetch(current, name, 0, error=str(result) or type(result).__name__)
+                continue
+            articles, pages, duration = result
+            self.store.save_collection(current, name, articles, pages, origin="daemon", duration=duration)
+            fetched += len(articles)
+            for article in articles:
+                week = self._week_of(article, current, finalized)
+                if week is None:
+                    covered += 1
+                else:
+                    fresh.setdefault(week, []).append(article)
+
+        added = updated = 0
+        sizes = {}
+        for week, articles in sorted(fresh.items()):
+            rows = self.store.load_week(week)
+            ids = [row_id for row_id, _ in rows]
+            # Dedup is CPU-bound; keep it off the loop so it doesn't stall other fetches
+            unique, changed = await asyncio.to_thread(merge_new, [a for _, a in rows], articles)
+            self.store.save_articles(
+                week,
+                [(ids[i] if i < len(ids) else None, unique[i]) for i in sorted(changed)],
+            )
+            new = sum(1 for i in changed if i >= len(ids))
+            added += new
+            updated += len(changed) - new
+            sizes[week] = len(unique)
+        main.get_canonicalizer().save()
+
+        weeks = "; ".join(f"week of {week}: {size} articles" for week, size in sizes.items())
+        print(
+            f"[{time.strftime('%Y-%m-%d %H:%M')}] {', '.join(names)}: {fetched} fetched, "
+            f"{added} new, {updated} updated — {weeks or 'nothing new'}"
+            + (f" ({covered} already published, skipped)" if covered else "")
+        )
+        return {"fetched": fetched, "new": added, "updated": updated}
+
+    async def _fetch(self, name: str):
+        collector = self.collectors[name]()
+        started = time.monotonic()
+        articles = await asyncio.wait_for(collector.collect(), COLLECTOR_TIMEOUT)
+        return articles, getattr(collector, "pages", ()), time.monotonic() - started
+
+    async def run_forever(self, max_sleep: float = 300.0) -> None:
+        print(f"Collector daemon started: {', '.join(f'{n} every {s / 3600:g}h' for n, s in self.schedule.items())}")
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                # One bad tick (e.g. the disk filled up) shouldn't end the week's collection
+                print(f"  Daemon tick failed: {e}")
+            await asyncio.sleep(min(max(self.next_due_in(), 1.0), max_sleep))
@@ -0,0 +1,242 @@
+"""Dependency-graph stage executor.
+
+Stages declare the named values they consume and produce. The executor
+starts every stage as soon as all of its inputs exist, runs independent
+stages concurrently, applies per-stage timeouts, and records a timeline of
+when each stage started and finished, so wall time follows the critical
+path rather than the sum of the stages.
+"""
+
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from src.checkpoint import RunCheckpoints
+
+# Name of the stage whose code is running; tasks a stage spawns inherit it
+current_stage: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_stage", default=None)
+
+
+class StageFailed(Exception):
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error!r}")
+        self.stage = stage
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """One unit of work: ``run(**inputs)`` returns its outputs.
+
+    A stage with one output returns the value itself; with several it
+    returns a tuple in ``outputs`` order. ``checkpoint=False`` keeps
+    in-memory-only results (clients, caches) out of the run directory.
+    ``extra`` folds anything else the stage reads (e.g. data it was built
+    with) into its checkpoint identity.
+    """
+
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    timeout: float | None = None
+    checkpoint: bool = True
+    encode: Callable[[Any], Any] | None = None
+    decode: Callable[[Any], Any] | None = None
+    still_valid: Callable[[Any], bool] | None = None
+    extra: Any = None
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    started: float
+    finished: float | None = None
+    status: str = "running"  # running | done | resumed | failed | timeout | cancelled
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or self.started) - self.started
+
+
+@dataclass
+class Timeline:
+    entries: list[StageTiming] = field(default_factory=list)
+
+    def critical_path(self, stages: dict[str, Stage], producers: dict[str, str]) -> list[str]:
+        """Walk back from the last stage to finish through its latest-finishing input."""
+        by_stage = {t.stage: t for t in self.entries if t.finished is not None}
+        if not by_stage:
+            return []
+        current = max(by_stage.values(), key=lambda t: t.finished).stage
+        path = [current]
+        while True:
+            upstream = [
+                producers[name] for name in stages[current].inputs
+                if producers.get(name) in by_stage
+            ]
+            if not upstream:
+                break
+            current = max(upstream, key=lambda s: by_stage[s].finished)
+            path.append(current)
+        return list(reversed(path))
+
+    def format(self, width: int = 40) -> list[str]:
+        """One line per stage: offsets, duration, status and a proportional bar."""
+        if not self.entries:
+            return []
+        end = max((t.finished or t.started) for t in self.entries) or 1.0
+        name_width = max(len(t.stage) for t in self.entries)
+        lines = []
+        for t in sorted(self.entries, key=lambda t: t.started):
+            finished = t.finished if t.finished is not None else t.started
+            lead = int(t.started / end * width)
+            bar = max(1, int((finished - t.started) / end * width))
+            lines.append(
+                f"{t.stage:<{name_width}}  {t.started:6.2f}s → {finished:6.2f}s "
+                f"({t.duration:6.2f}s) {t.status:<9} |{' ' * lead}{'█' * bar}"
+            )
+        return lines
+
+
+class DAGExecutor:
+    def __init__(
+        self,
+        stages: list[Stage],
+        checkpoints: RunCheckpoints | None = None,
+        profiler=None,
+        targets: list[str] | None = None,
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.checkpoints = checkpoints
+        # Optional observer with stage_started(timing) / stage_finished(timing)
+        self.profiler = profiler
+        self.timeline = Timeline()
+        self.values: dict[str, Any] = {}
+        self.producers: dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' produced by both {self.producers[output]} and {stage.name}")
+                self.producers[output] = stage.name
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.producers]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing}, which no stage produces")
+        self._check_acyclic()
+        if targets is not None:
+            self.stages = {name: self.stages[name] for name in self._ancestors(targets)}
+
+    def _ancestors(self, targets: list[str]) -> list[str]:
+        """``targets`` and every stage they transitively depend on, in declaration order."""
+        unknown = [name for name in targets if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stages: {unknown}")
+        needed: set[str] = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            pending.extend(self.producers[value] for value in self.stages[name].inputs)
+        return [name for name in self.stages if name in needed]
+
+    def _check_acyclic(self) -> None:
+        state: dict[str, int] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 1:
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for value in self.stages[name].inputs:
+                visit(self.producers[value])
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(self) -> dict[str, Any]:
+        """Run every stage; returns all produced values by name.
+
+        The first failure cancels whatever is still running and is raised
+        as ``StageFailed``; ``values`` and the timeline keep what was
+        produced up to then.
+        """
+        values = self.values
+        ready = {name: asyncio.Event() for name in self.stages}
+        origin = time.perf_counter()
+
+        async def run_stage(stage: Stage) -> None:
+            for value in stage.inputs:
+                await ready[self.producers[value]].wait()
+            timing = StageTiming(stage.name, time.perf_counter() - origin)
+            self.timeline.entries.append(timing)
+            current_stage.set(stage.name)
+            if self.profiler is not None:
+                self.profiler.stage_started(timing)
+            try:
+                result = await asyncio.wait_for(self._execute(stage, values, timing), stage.timeout)
+            except asyncio.TimeoutError as e:
+                timing.status = "timeout"
+                raise StageFailed(stage.name, TimeoutError(f"timed out after {stage.timeout}s")) from e
+            except asyncio.CancelledError:
+                timing.status = "cancelled"
+                raise
+            except Exception as e:
+                timing.status = "failed"
+                raise StageFailed(stage.name, e) from e
+            finally:
+                timing.finished = time.perf_counter() - origin
+                if self.profiler is not None:
+                    self.profiler.stage_finished(timing)
+
+            if len(stage.outputs) == 1:
+                values[stage.outputs[0]] = result
+            elif stage.outputs:
+                values.update(zip(stage.outputs, result))
+            ready[stage.name].set()
+
+        tasks = [asyncio.create_task(run_stage(stage), name=stage.name) for stage in self.stages.values()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return values
+
+    async def _execute(self, stage: Stage, values: dict[str, Any], timing: StageTiming) -> Any:
+        kwargs = {name: values[name] for name in stage.inputs}
+        upstream = sorted({self.producers[name] for name in stage.inputs})
+
+        if self.checkpoints is None:
+            result = await stage.run(**kwargs)
+            timing.status = "done"
+            return result
+        if not stage.checkpoint:
+            self.checkpoints.passthrough(stage.name, upstream, stage.extra)
+            result = await stage.run(**kwargs)
+            timing.status = "done"
+            return result
+
+        computed = False
+
+        async def compute():
+            nonlocal computed
+            computed = True
+            return await stage.run(**kwargs)
+
+        options = {
+            name: getattr(stage, name)
+            for name in ("encode", "decode", "still_valid")
+            if getattr(stage, name) is not None
+        }
+        result = await self.checkpoints.stage(stage.name, compute, inputs=upstream, extra=stage.extra, **options)
+        timing.status = "done" if computed else "resumed"
+        return result
@@ -0,0 +1,22 @@
+"""Deferred imports for entry points that should start fast.
+
+``python -m src.main dedup`` shouldn't pay for ``google.genai``, ``feedparser``
+or ``yaml``. Modules that orchestrate stages bind the heavy callables through
+``lazy_function`` instead of importing them at the top; the real import
+happens on first call. The stand-in is a plain module attribute, so tests can
+still monkeypatch it.
+"""
+
+import importlib
+from typing import Any, Callable
+
+
+def lazy_function(module: str, name: str) -> Callable[..., Any]:
+    """A stand-in for ``from module import name`` that imports on first call."""
+
+    def proxy(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+    proxy.__name__ = proxy.__qualname__ = name
+    proxy.__doc__ = f"Lazily imported {module}.{name}."
+    return proxy
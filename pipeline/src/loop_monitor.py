@@ -0,0 +1,197 @@
+"""Opt-in event-loop stall detector.
+
+Synchronous work inside ``async`` code (a blocking SDK call, a big parse,
+fuzzy dedup, file writes) freezes every other stage while it runs. This
+monitor finds it two ways:
+
+- a heartbeat task sleeps for ``interval`` and records how late it wakes
+  up, giving the loop's scheduling-delay distribution;
+- every event-loop callback is timed. A watchdog thread notices one that has
+  run past ``threshold`` and captures the loop thread's stack while it is
+  still blocking, so the stall is attributed to the code responsible (and to
+  the pipeline stage that scheduled it, via ``dag.current_stage``).
+
+Use it around a run (``--detect-stalls``) or in tests::
+
+    async with LoopStallMonitor(threshold=0.05) as monitor:
+        await some_stage()
+    assert monitor.worst_stall() < 0.05
+"""
+
+import asyncio
+import asyncio.events
+import sys
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+
+from src.dag import current_stage
+
+MAX_STALLS = 50
+STACK_DEPTH = 12
+
+
+@dataclass
+class Stall:
+    stage: str | None
+    callback: str
+    duration: float
+    started: float
+    stack: list[str] = field(default_factory=list)
+
+
+def _describe(handle) -> str:
+    callback = handle._callback
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopStallMonitor:
+    """Samples loop lag and records callbacks that block longer than ``threshold`` seconds."""
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: list[Stall] = []
+        self.lag_samples: list[float] = []
+        self._origin = 0.0
+        self._loop_thread: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._original_run = None
+        # State of the callback the loop is running right now, shared with the watchdog
+        self._callback_id = 0
+        self._callback_started: float | None = None
+        self._captured: tuple[int, list[str]] | None = None
+
+    async def start(self) -> None:
+        self._origin = time.perf_counter()
+        self._loop_thread = threading.get_ident()
+        self._install()
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    async def stop(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        self._stopping.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        self._uninstall()
+
+    async def __aenter__(self) -> "LoopStallMonitor":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag_samples.append(max(0.0, time.perf_counter() - expected))
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.threshold / 2):
+            started, callback_id = self._callback_started, self._callback_id
+            if started is None or time.perf_counter() - started < self.threshold:
+                continue
+            if self._captured is not None and self._captured[0] == callback_id:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+            if self._callback_id != callback_id:
+                continue  # That callback finished while we were looking
+            self._captured = (callback_id, [
+                f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in stack
+            ])
+
+    def _install(self) -> None:
+        monitor = self
+        original = asyncio.events.Handle._run
+        self._original_run = original
+
+        def _run(handle):
+            if threading.get_ident() != monitor._loop_thread:
+                return original(handle)
+            monitor._callback_id += 1
+            callback_id = monitor._callback_id
+            start = time.perf_counter()
+            monitor._callback_started = start
+            try:
+                return original(handle)
+            finally:
+                monitor._callback_started = None
+                duration = time.perf_counter() - start
+                if duration >= monitor.threshold:
+                    captured = monitor._captured
+                    monitor._record(Stall(
+                        stage=handle._context.get(current_stage),
+                        callback=_describe(handle),
+                        duration=duration,
+                        started=start - monitor._origin,
+                        stack=captured[1] if captured and captured[0] == callback_id else [],
+                    ))
+
+        asyncio.events.Handle._run = _run
+
+    def _uninstall(self) -> None:
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    def _record(self, stall: Stall) -> None:
+        self.stalls.append(stall)
+        if len(self.stalls) > MAX_STALLS:
+            # Keep the worst ones
+            self.stalls.sort(key=lambda s: s.duration, reverse=True)
+            del self.stalls[MAX_STALLS:]
+
+    def worst_stall(self, stage: str | None = None) -> float:
+        """Longest blocking callback seen (optionally within one stage), in seconds."""
+        durations = [s.duration for s in self.stalls if stage is None or s.stage == stage]
+        return max(durations, default=0.0)
+
+    def summary(self) -> dict:
+        lags = sorted(self.lag_samples)
+        by_stage: dict[str, dict] = {}
+        for stall in self.stalls:
+            entry = by_stage.setdefault(stall.stage or "(none)", {"stalls": 0, "blocked_seconds": 0.0, "worst": 0.0})
+            entry["stalls"] += 1
+            entry["blocked_seconds"] += stall.duration
+            entry["worst"] = max(entry["worst"], stall.duration)
+        return {
+            "threshold_seconds": self.threshold,
+            "lag": {
+                "samples": len(lags),
+                "mean": sum(lags) / len(lags) if lags else 0.0,
+                "p99": lags[int(0.99 * (len(lags) - 1))] if lags else 0.0,
+                "max": lags[-1] if lags else 0.0,
+            },
+            "by_stage": by_stage,
+            "stalls": [asdict(s) for s in sorted(self.stalls, key=lambda s: s.duration, reverse=True)],
+        }
+
+
+def format_summary(summary: dict) -> list[str]:
+    lag = summary["lag"]
+    lines = [
+        f"loop lag: mean {lag['mean'] * 1000:.1f}ms, p99 {lag['p99'] * 1000:.1f}ms, max {lag['max'] * 1000:.1f}ms"
+    ]
+    for stall in summary["stalls"][:5]:
+        where = stall["stack"][-1] if stall["stack"] else stall["callback"]
+        lines.append(f"stall {stall['duration'] * 1000:.0f}ms in {stall['stage'] or '(no stage)'}: {where}")
+    return lines
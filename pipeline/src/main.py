@@ -1,105 +1,766 @@
 """Entry point — orchestrates the full weekly digest pipeline."""
 
+import argparse
 import asyncio
+import dataclasses
+import hashlib
+import os
 import sys
+import time
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from functools import partial
 
 from dotenv import load_dotenv
 
-from src.collectors.rss_collector import RSSCollector
-from src.collectors.hackernews import HackerNewsCollector
-from src.collectors.reddit import RedditCollector
-from src.collectors.arxiv import ArxivCollector
-from src.collectors.github_trending import GitHubTrendingCollector
-from src.analysis.deduplicator import deduplicate
-from src.analysis.analyzer import triage_articles, deep_analysis, curate_resources
-from src.publisher.markdown_writer import write_post, update_resources
-from src.publisher.git_publisher import git_publish
-from src.config import RawArticle
-
-
-async def collect_all_sources() -> list[RawArticle]:
-    """Run all collectors concurrently and aggregate results."""
-    collectors = [
-        RSSCollector(),
-        HackerNewsCollector(),
-        RedditCollector(),
-        ArxivCollector(),
-        GitHubTrendingCollector(),
+from src import checkpoint
+from src.checkpoint import RunCheckpoints, latest_run_id, new_run_id
+from src.dag import DAGExecutor, Stage, StageFailed
+from src.lazy import lazy_function
+from src.loop_monitor import LoopStallMonitor, format_summary
+from src.profiling import StageProfiler, format_report, previous_report
+from src.config import (
+    DigestProfile,
+    RawArticle,
+    COLLECTOR_TIMEOUT,
+    TRIAGE_TIMEOUT,
+    ANALYSIS_TIMEOUT,
+    RESOURCES_TIMEOUT,
+    PUBLISH_TIMEOUT,
+    STALL_THRESHOLD_MS,
+    BACKFILL_CONCURRENCY,
+    active_profiles,
+)
+
+# Heavy dependencies (google.genai, feedparser, thefuzz, numpy, yaml) load on
+# first use, so subcommands only pay for the stages they actually run
+get_canonicalizer = lazy_function("src.analysis.canonical", "get_canonicalizer")
+cluster_articles = lazy_function("src.analysis.clustering", "cluster_articles")
+restrict_clusters = lazy_function("src.analysis.clustering", "restrict_clusters")
+merge_new = lazy_function("src.analysis.deduplicator", "merge_new")
+triage_articles = lazy_function("src.analysis.analyzer", "triage_articles")
+deep_analysis = lazy_function("src.analysis.analyzer", "deep_analysis")
+curate_resources = lazy_function("src.analysis.analyzer", "curate_resources")
+build_shared_context = lazy_function("src.analysis.analyzer", "build_shared_context")
+get_routing_stats = lazy_function("src.analysis.routing", "get_routing_stats")
+write_post = lazy_function("src.publisher.markdown_writer", "write_post")
+update_resources = lazy_function("src.publisher.markdown_writer", "update_resources")
+post_week = lazy_function("src.publisher.markdown_writer", "post_week")
+git_publish = lazy_function("src.publisher.git_publisher", "git_publish")
+get_store = lazy_function("src.store", "get_store")
+reference_week = lazy_function("src.store", "reference_week")
+
+# Each collector is its own stage so a slow source delays only the merge,
+# not the other fetches
+COLLECTORS = {
+    "rss": lazy_function("src.collectors.rss_collector", "RSSCollector"),
+    "hackernews": lazy_function("src.collectors.hackernews", "HackerNewsCollector"),
+    "reddit": lazy_function("src.collectors.reddit", "RedditCollector"),
+    "arxiv": lazy_function("src.collectors.arxiv", "ArxivCollector"),
+    "github": lazy_function("src.collectors.github_trending", "GitHubTrendingCollector"),
+}
+
+
+def build_collectors(profiles: list[DigestProfile] | None = None) -> dict:
+    """Collector factories by name; each is only imported and built if its stage runs.
+
+    They fetch the union of ``profiles``' sources (default: the active
+    profiles), so every digest is built from one collection pass.
+    """
+    profiles = profiles or active_profiles()
+    feeds = dict(feed for profile in profiles for feed in profile.rss_feeds)
+    options = {
+        "rss": {"feeds": list(feeds.items())},
+        "reddit": {"subreddits": list(dict.fromkeys(s for p in profiles for s in p.subreddits))},
+        "hackernews": {"keywords": list(dict.fromkeys(
+            kw for p in profiles if "hackernews" in p.sources for kw in p.keywords
+        ))},
+    }
+    sources = {source for profile in profiles for source in profile.sources}
+    return {
+        name: partial(factory, **options.get(name, {}))
+        for name, factory in COLLECTORS.items()
+        if name in sources
+    }
+
+
+def _collector_stage(
+    name: str,
+    factory,
+    reference: datetime | None = None,
+    gate: asyncio.Semaphore | None = None,
+    collected=None,
+) -> Stage:
+    """Fetch one source; ``collected(name, articles)`` is awaited with what it returned."""
+
+    async def collect() -> list[RawArticle]:
+        collector = factory() if reference is None else factory(reference=reference)
+        collector_name = collector.__class__.__name__
+        week = reference_week(reference)
+        started = time.monotonic()
+        # A failed or slow source shouldn't sink the run; it just contributes nothing
+        try:
+            if gate is None:
+                result = await asyncio.wait_for(collector.collect(), COLLECTOR_TIMEOUT)
+            else:
+                # Queueing for a source shared with other runs doesn't count toward its timeout
+                async with gate:
+                    started = time.monotonic()
+                    result = await asyncio.wait_for(collector.collect(), COLLECTOR_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"  {collector_name} timed out after {COLLECTOR_TIMEOUT:.0f}s")
+            get_store().record_fetch(week, name, 0, error="timeout", origin="run")
+            return []
+        except Exception as e:
+            print(f"  {collector_name} failed: {e}")
+            get_store().record_fetch(week, name, 0, error=str(e) or type(e).__name__, origin="run")
+            return []
+        if not isinstance(result, list):
+            print(f"  {collector_name}: unexpected result type")
+            return []
+        print(f"  {collector_name}: {len(result)} articles")
+        get_store().save_collection(
+            week,
+            name,
+            result,
+            pages=getattr(collector, "pages", ()),
+            duration=time.monotonic() - started,
+        )
+        if collected is not None:
+            await collected(name, result)
+        return result
+
+    return Stage(
+        f"collect_{name}",
+        collect,
+        outputs=(f"{name}_articles",),
+        encode=_encode_articles,
+        decode=_decode_articles,
+    )
+
+
+class PipelineAborted(Exception):
+    """A stage found nothing worth continuing with."""
+
+
+def _encode_articles(articles: list[RawArticle]) -> list[RawArticle]:
+    # The checkpoint writer serializes each article as it goes (see checkpoint._to_json),
+    # so their bodies are loaded one at a time rather than all at once
+    return list(articles)
+
+
+def _decode_articles(data: list[dict]) -> list[RawArticle]:
+    return [RawArticle.model_validate(a) for a in data]
+
+
+def _file_hash(path: str) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _encode_dedup(result) -> dict:
+    unique, clusters = result
+    return {"unique": _encode_articles(unique), "clusters": [asdict(c) for c in clusters]}
+
+
+def _decode_dedup(data: dict):
+    from src.analysis.clustering import StoryCluster
+
+    return _decode_articles(data["unique"]), [StoryCluster(**c) for c in data["clusters"]]
+
+
+def build_stages(
+    collectors: dict,
+    reference: datetime | None = None,
+    gates: dict[str, asyncio.Semaphore] | None = None,
+    warm: list[RawArticle] | None = None,
+    profiles: list[DigestProfile] | None = None,
+    run_dir: str | None = None,
+) -> list[Stage]:
+    """The pipeline as a dependency graph; each stage starts once its inputs exist.
+
+    ``reference`` is the end of the week being digested (default: now); a
+    past one makes every stage work on that week instead (see ``src.backfill``).
+    ``gates`` bound how many concurrent runs may fetch from each source.
+    Each collector's articles are merged into the deduplicated set as soon
+    as that collector finishes, so dedup itself only has to cluster.
+    ``warm`` is a week already collected and deduplicated by the daemon (see
+    ``src.daemon``); it replaces the collectors, and dedup only clusters it.
+    ``profiles`` are the digests to build (default: the active profiles).
+    Collection and dedup run once for all of them; with more than one, each
+    profile gets its own branch from triage to archive (``triage@policy``,
+    ...), and the branches run concurrently into a single publish.
+    A branch that finds nothing to write about (no matching articles, no
+    stories) ends with None values instead of failing the run, and publish
+    goes ahead with the others.
+    ``run_dir`` holds each analysis's streamed partial text, so concurrent
+    runs and branches don't write over each other's.
+    """
+    gates = gates or {}
+    profiles = profiles or active_profiles()
+    if warm is not None:
+        collectors = {}
+
+    # Each source is folded into one deduplicated set as soon as it's fetched,
+    # so dedup only waits on the last source's share of the matching
+    folded: set[str] = set()
+    running: list[RawArticle] = []
+    fold_lock = asyncio.Lock()
+
+    async def fold(name: str, articles: list[RawArticle]) -> None:
+        nonlocal running
+        async with fold_lock:
+            if name not in folded:
+                # Title matching is CPU-bound; concurrent backfill weeks share this loop
+                running, _ = await asyncio.to_thread(merge_new, running, articles)
+                folded.add(name)
+
+    stages = [
+        _collector_stage(name, factory, reference, gates.get(name), collected=fold)
+        for name, factory in collectors.items()
     ]
+    collected = tuple(f"{name}_articles" for name in collectors)
+    restored: dict[str, list[RawArticle]] = {}
+
+    async def merge(**per_source: list[RawArticle]) -> list[RawArticle]:
+        # Sources resumed from their checkpoints never ran, so dedup folds them in
+        restored.update((name, per_source[f"{name}_articles"]) for name in collectors if name not in folded)
+        articles = [a for name in collected for a in per_source[name]]
+        # Persist redirect/canonical-tag aliases learned while fetching
+        get_canonicalizer().save()
+        print(f"Collected {len(articles)} total articles")
+        if not articles:
+            raise PipelineAborted("No articles collected.")
+        return articles
 
-    tasks = [c.collect() for c in collectors]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    all_articles = []
-    for i, result in enumerate(results):
-        collector_name = collectors[i].__class__.__name__
-        if isinstance(result, Exception):
-            print(f"  {collector_name} failed: {result}")
-        elif isinstance(result, list):
-            all_articles.extend(result)
-            print(f"  {collector_name}: {len(result)} articles")
+    async def load_warm() -> list[RawArticle]:
+        print(f"Loaded {len(warm)} articles from the store")
+        if not warm:
+            raise PipelineAborted("No articles in the store for this week.")
+        return warm
+
+    async def dedup(articles):
+        unique = articles
+        if warm is None:
+            for name, fetched in restored.items():
+                await fold(name, fetched)
+            unique = running
+        clusters = await asyncio.to_thread(cluster_articles, unique)
+        print(f"Deduplicated to {len(unique)} unique articles")
+        print(f"Grouped into {len(clusters)} story clusters")
+        return unique, clusters
+
+    async def publish(**posts):
+        # A skipped profile's branch hands over None; only the digests that were written go out
+        hashes = {
+            name: post["post_hash"] for name, post in posts.items() if name.startswith("post") and post is not None
+        }
+        if not hashes:
+            raise PipelineAborted("No digests to publish.")
+        git_publish()
+        return hashes
+
+    stages += [
+        Stage(
+            "collect",
+            merge if warm is None else load_warm,
+            inputs=collected,
+            outputs=("articles",),
+            checkpoint=False,
+            # A rerun finalize must redo everything if the daemon has added to the week since
+            extra=None if warm is None else checkpoint.content_hash(warm),
+        ),
+        Stage(
+            "dedup",
+            dedup,
+            inputs=("articles",),
+            outputs=("unique", "clusters"),
+            encode=_encode_dedup,
+            decode=_decode_dedup,
+        ),
+    ]
+    branches = [None] if len(profiles) == 1 else profiles
+    for profile, branch in zip(profiles, branches):
+        partial_path = None
+        if run_dir is not None:
+            partial_path = os.path.join(run_dir, f"{_profile_key('analysis', branch)}.partial.md")
+        digest = _digest_stages(profile, reference, partial_path)
+        if branch is None:
+            stages += digest
         else:
-            print(f"  {collector_name}: unexpected result type")
+            stages.append(_select_stage(profile))
+            stages += [_for_profile(stage, profile) for stage in digest]
+    return stages + [
+        Stage(
+            "publish",
+            publish,
+            inputs=tuple(
+                _profile_key(name, profile) for profile in branches for name in ("post", "resources_file")
+            ),
+            outputs=("published",),
+            timeout=PUBLISH_TIMEOUT,
+        ),
+    ]
+
+
+# Stages built once per digest profile; everything else is shared
+PROFILE_STAGES = ("select", "triage", "context", "analysis", "resources", "write", "update_resources", "archive")
+
+
+def _profile_key(name: str, profile: DigestProfile | None) -> str:
+    """Stage or value ``name`` in ``profile``'s branch (unsuffixed in a single-profile run)."""
+    return name if profile is None else f"{name}@{profile.name}"
+
+
+def profile_targets(targets: tuple[str, ...], profiles: list[DigestProfile] | None = None) -> tuple[str, ...]:
+    """Expand per-profile stage names in ``targets`` to every profile's branch."""
+    profiles = profiles or active_profiles()
+    if len(profiles) == 1:
+        return targets
+    return tuple(
+        _profile_key(target, profile)
+        for target in targets
+        for profile in (profiles if target in PROFILE_STAGES else [None])
+    )
+
+
+def profile_values(values: dict, profiles: list[DigestProfile]) -> list[tuple[DigestProfile, dict]]:
+    """Each profile's view of a run's ``values``: its own branch's under the unsuffixed names."""
+    if len(profiles) == 1:
+        return [(profiles[0], values)]
+    views = []
+    for profile in profiles:
+        suffix = f"@{profile.name}"
+        branch = {name.removesuffix(suffix): value for name, value in values.items() if name.endswith(suffix)}
+        views.append((profile, {**values, **branch}))
+    return views
+
+
+def _skipped(stage: Stage):
+    """The outputs of a stage in a skipped branch: None for each."""
+    return None if len(stage.outputs) == 1 else (None,) * len(stage.outputs)
+
 
-    return all_articles
+def _for_profile(stage: Stage, profile: DigestProfile) -> Stage:
+    """``stage`` moved into ``profile``'s branch: its name, inputs and outputs get the profile suffix.
 
+    ``PipelineAborted`` ends only this branch: the stage outputs None, and
+    every later stage of the branch passes the None along without running.
+    """
+    async def run(**inputs):
+        if any(value is None for value in inputs.values()):
+            return _skipped(stage)
+        try:
+            return await stage.run(**{name.rpartition("@")[0]: value for name, value in inputs.items()})
+        except PipelineAborted as e:
+            print(f"[{profile.name}] {e} Skipping this digest.")
+            return _skipped(stage)
 
-async def run_pipeline():
-    """Run the full weekly digest pipeline end-to-end."""
+    def still_valid(output) -> bool:
+        # A skip is never resumed, so a rerun gets another try at the branch
+        return output is not None and (stage.still_valid is None or stage.still_valid(output))
+
+    return dataclasses.replace(
+        stage,
+        name=_profile_key(stage.name, profile),
+        run=run,
+        inputs=tuple(_profile_key(name, profile) for name in stage.inputs),
+        outputs=tuple(_profile_key(name, profile) for name in stage.outputs),
+        encode=stage.encode and (lambda value: None if value is None else stage.encode(value)),
+        still_valid=still_valid,
+    )
+
+
+def _select_stage(profile: DigestProfile) -> Stage:
+    """The shared articles and clusters that ``profile``'s digest is built from."""
+    async def select(unique, clusters):
+        keep = [i for i, article in enumerate(unique) if profile.matches(article)]
+        print(f"[{profile.name}] {len(keep)} of {len(unique)} articles")
+        if not keep:
+            print(f"[{profile.name}] No articles for this digest. Skipping it.")
+            return None, None
+        return [unique[i] for i in keep], restrict_clusters(clusters, unique, keep)
+
+    return Stage(
+        _profile_key("select", profile),
+        select,
+        inputs=("unique", "clusters"),
+        outputs=(_profile_key("unique", profile), _profile_key("clusters", profile)),
+        # Cheap to redo, and the articles are already in the dedup checkpoint
+        checkpoint=False,
+    )
+
+
+def _digest_stages(profile: DigestProfile, reference: datetime | None, partial_path: str | None) -> list[Stage]:
+    """Triage through archive for one digest, over the ``unique`` articles and their ``clusters``."""
+
+    async def triage(unique, clusters):
+        result = await triage_articles(unique, clusters, focus=profile.focus)
+        num_stories = len(result.get("stories", []))
+        print(f"Identified {num_stories} top stories")
+        if num_stories == 0:
+            raise PipelineAborted("No stories identified.")
+        return result
+
+    async def context(triage, unique):
+        # The window ends at midnight after the digest's Sunday
+        week_ending = reference - timedelta(days=1) if reference is not None else None
+        return build_shared_context(triage, unique, week_ending=week_ending, focus=profile.focus)
+
+    async def analysis(triage, unique, context):
+        result = await deep_analysis(triage, unique, context, partial_path=partial_path)
+        print(f"Analysis generated: {len(result)} characters")
+        return result
+
+    async def resources(triage, unique, context):
+        result = await curate_resources(triage, unique, context)
+        print(f"Curated {len(result.get('resources', []))} resources")
+        return result
+
+    async def write(triage, analysis, resources, unique):
+        post_path = write_post(
+            triage, analysis, resources, source_articles=unique, reference=reference, profile=profile
+        )
+        return {"post_path": post_path, "post_hash": _file_hash(post_path)}
+
+    async def update(resources):
+        update_resources(resources, profile=profile)
+        return {"updated": True}
+
+    async def archive(unique, clusters, triage, post):
+        # Filed under the post's own date; a live run's collection week is the Sunday ahead of it.
+        # Picks and clusters index into this run's deduplicated list
+        get_store().record_post(
+            post["post_path"], post_week(reference), unique, clusters, triage.get("stories", [])
+        )
+        return {"post_path": post["post_path"]}
+
+    return [
+        Stage("triage", triage, inputs=("unique", "clusters"), outputs=("triage",), timeout=TRIAGE_TIMEOUT),
+        # The cache handle lives only as long as this process
+        Stage("context", context, inputs=("triage", "unique"), outputs=("context",), checkpoint=False),
+        Stage(
+            "analysis",
+            analysis,
+            inputs=("triage", "unique", "context"),
+            outputs=("analysis",),
+            timeout=ANALYSIS_TIMEOUT,
+        ),
+        Stage(
+            "resources",
+            resources,
+            inputs=("triage", "unique", "context"),
+            outputs=("resources",),
+            timeout=RESOURCES_TIMEOUT,
+        ),
+        Stage(
+            "write",
+            write,
+            inputs=("triage", "analysis", "resources", "unique"),
+            outputs=("post",),
+            # Rewrite if the post was deleted or edited since
+            still_valid=lambda out: _file_hash(out["post_path"]) == out["post_hash"],
+        ),
+        Stage("update_resources", update, inputs=("resources",), outputs=("resources_file",)),
+        Stage("archive", archive, inputs=("unique", "clusters", "triage", "post"), outputs=("archived",)),
+    ]
+
+
+async def run_pipeline(
+    run_id: str | None = None,
+    resume: bool = False,
+    profile: bool = False,
+    cprofile: bool = False,
+    trace_memory: bool = False,
+    stall_threshold_ms: float | None = None,
+    targets: tuple[str, ...] | None = None,
+    warm_week: date | None = None,
+):
+    """Run the full weekly digest pipeline end-to-end.
+
+    Stages run as a dependency graph (see ``build_stages``) and each is
+    checkpointed under the run directory; with ``resume``, stages whose
+    inputs are unchanged are loaded instead of rerun. ``targets`` limits the
+    run to those stages and what they depend on; the targets themselves are
+    always recomputed. ``profile`` writes a
+    per-stage timing report next to the checkpoints (see ``src.profiling``);
+    ``cprofile`` and ``trace_memory`` add cProfile dumps and tracemalloc data;
+    ``stall_threshold_ms`` adds loop lag and blocking-call stalls to it.
+    ``warm_week`` finalizes that week from the daemon's article store instead
+    of collecting, and marks it finalized once published. Every active digest
+    profile is built from the one collection (see ``build_stages``).
+    """
     load_dotenv()
+    if targets:
+        targets = profile_targets(targets)
+
+    warm, reference = None, None
+    if warm_week is not None:
+        from src.backfill import week_reference
+
+        warm = [article for _, article in get_store().load_week(warm_week)]
+        reference = week_reference(warm_week)
+
+    run = RunCheckpoints(run_id or new_run_id(), resume=resume, rerun=targets or ())
 
     print("=" * 60)
     print("AI & Tech Weekly Digest Pipeline")
+    print(f"Run: {run.run_id}{' (resuming)' if resume else ''}")
+    profiles = active_profiles()
+    if len(profiles) > 1:
+        print(f"Digests: {', '.join(p.name for p in profiles)}")
+    if warm_week is not None:
+        print(f"Finalizing the week of {warm_week} from the article store")
     print("=" * 60)
 
-    # 1. Collect from all sources in parallel
-    print("\n[1/7] Collecting articles...")
-    articles = await collect_all_sources()
-    print(f"Collected {len(articles)} total articles")
-
-    if not articles:
-        print("No articles collected. Exiting.")
-        sys.exit(1)
-
-    # 2. Deduplicate
-    print("\n[2/7] Deduplicating...")
-    unique = deduplicate(articles)
-    print(f"Deduplicated to {len(unique)} unique articles")
-
-    # 3. Triage with Gemini Flash
-    print("\n[3/7] Triaging stories...")
-    triage = await triage_articles(unique)
-    num_stories = len(triage.get("stories", []))
-    print(f"Identified {num_stories} top stories")
-
-    if num_stories == 0:
-        print("No stories identified. Exiting.")
-        sys.exit(1)
-
-    # 4. Deep analysis with Gemini Pro
-    print("\n[4/7] Writing analysis...")
-    analysis = await deep_analysis(triage, unique)
-    print(f"Analysis generated: {len(analysis)} characters")
-
-    # 5. Curate resources with Gemini Flash
-    print("\n[5/7] Curating resources...")
-    resources = await curate_resources(triage, unique)
-    num_resources = len(resources.get("resources", []))
-    print(f"Curated {num_resources} resources")
-
-    # 6. Write markdown post and update resources.json
-    print("\n[6/7] Publishing...")
-    post_path = write_post(triage, analysis, resources, source_articles=unique)
-    update_resources(resources)
-
-    # 7. Git commit and push
-    print("\n[7/7] Git publish...")
-    git_publish()
+    profiler = None
+    if profile or cprofile or trace_memory or stall_threshold_ms:
+        profiler = StageProfiler(run.directory, cprofile=cprofile, memory=trace_memory)
+        profiler.start()
+    monitor = None
+    if stall_threshold_ms:
+        monitor = LoopStallMonitor(threshold=stall_threshold_ms / 1000)
+        await monitor.start()
+
+    executor = DAGExecutor(
+        build_stages(build_collectors(), reference=reference, warm=warm, run_dir=run.directory),
+        checkpoints=run,
+        profiler=profiler,
+        targets=list(targets) if targets else None,
+    )
+    try:
+        values = await executor.run()
+    except StageFailed as e:
+        if isinstance(e.error, PipelineAborted):
+            print(f"{e.error} Exiting.")
+            sys.exit(1)
+        raise e.error from e
+    finally:
+        for name, value in executor.values.items():
+            if name.partition("@")[0] == "context" and value is not None:
+                await value.release()
+
+        if {"analysis", "resources"} & {name.partition("@")[0] for name in executor.stages}:
+            routing_stats = get_routing_stats()
+            for line in routing_stats.summary():
+                print(f"  {line}")
+            routing_stats.save()
+
+        print("\nTimeline:")
+        for line in executor.timeline.format():
+            print(f"  {line}")
+        path = executor.timeline.critical_path(executor.stages, executor.producers)
+        if path:
+            print(f"Critical path: {' → '.join(path)}")
+
+        if monitor is not None:
+            await monitor.stop()
+        if profiler is not None:
+            profiler.stop()
+            report = profiler.report(run.run_id)
+            if monitor is not None:
+                report["loop"] = monitor.summary()
+            report_path = profiler.write_report(report)
+            baseline = previous_report(os.path.dirname(run.directory), run.run_id)
+            print("\nProfile:")
+            for line in format_report(report, baseline):
+                print(f"  {line}")
+            if monitor is not None:
+                for line in format_summary(report["loop"]):
+                    print(f"  {line}")
+            print(f"Profile report: {report_path}")
 
     print("\n" + "=" * 60)
-    print(f"Done! Published: {post_path}")
+    if "published" in values:
+        if warm_week is not None:
+            # New daemon fetches go into next week's digest from here on
+            get_store().mark_finalized(warm_week)
+        posts = [branch["post"]["post_path"] for _, branch in profile_values(values, profiles) if branch["post"]]
+        print(f"Done! Published: {', '.join(posts)}")
+        skipped = [p.name for p, branch in profile_values(values, profiles) if not branch["post"]]
+        if skipped:
+            print(f"Skipped digests: {', '.join(skipped)}")
+    else:
+        print(f"Done: {', '.join(targets or executor.stages)} (run {run.run_id})")
+    if run.skipped:
+        print(f"Resumed from checkpoints: {', '.join(run.skipped)}")
     print("=" * 60)
 
 
+# Subcommand → the stages it runs (plus whatever they depend on)
+SUBCOMMANDS = {
+    "collect": ("collect",),
+    "dedup": ("dedup",),
+    "triage": ("triage",),
+    "analyze": ("analysis", "resources"),
+    "publish": ("archive", "publish"),
+}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument(
+        "--profile",
+        action="store_true",
+        help="record wall and CPU time per stage in <run dir>/profile.json",
+    )
+    profiling.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="also dump a cProfile file per stage (implies --profile)",
+    )
+    profiling.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="also record peak memory and top allocations per stage (implies --profile)",
+    )
+    profiling.add_argument(
+        "--detect-stalls",
+        nargs="?",
+        type=float,
+        const=STALL_THRESHOLD_MS,
+        metavar="MS",
+        help=(
+            "report callbacks that block the event loop longer than MS "
+            f"(default {STALL_THRESHOLD_MS:.0f}ms; implies --profile)"
+        ),
+    )
+
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Run the weekly AI & Tech digest pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    run = commands.add_parser("run", parents=[profiling], help="run the whole pipeline (default)")
+    run.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="resume a previous run from its checkpoints ('latest' for the most recent run)",
+    )
+
+    collect = commands.add_parser("collect", parents=[profiling], help="fetch articles from every source")
+    collect.add_argument("--run", metavar="RUN_ID", help="collect into this run instead of starting a new one")
+    for name, help_text in (
+        ("dedup", "deduplicate and cluster a run's articles"),
+        ("triage", "pick the top stories (Gemini Flash)"),
+        ("analyze", "write the analysis and curate resources (Gemini Pro + Flash)"),
+        ("publish", "write the post, update resources.json and git publish"),
+    ):
+        command = commands.add_parser(name, parents=[profiling], help=help_text)
+        command.add_argument(
+            "--run",
+            metavar="RUN_ID",
+            default="latest",
+            help="run whose checkpoints to build on (default: latest); missing earlier stages run first",
+        )
+
+    backfill = commands.add_parser("backfill", help="build the digests for a range of past weeks")
+    backfill.add_argument("--from", dest="start", type=date.fromisoformat, required=True, metavar="YYYY-MM-DD")
+    backfill.add_argument("--to", dest="end", type=date.fromisoformat, required=True, metavar="YYYY-MM-DD")
+    backfill.add_argument(
+        "--concurrency",
+        type=int,
+        default=BACKFILL_CONCURRENCY,
+        help=f"weeks to build at once (default {BACKFILL_CONCURRENCY})",
+    )
+    backfill.add_argument("--no-publish", action="store_true", help="write the posts but don't commit or push")
+
+    daemon = commands.add_parser("daemon", help="keep collecting into the article store on a schedule")
+    daemon.add_argument("--once", action="store_true", help="fetch whatever is due, then exit (for cron)")
+
+    finalize = commands.add_parser(
+        "finalize",
+        parents=[profiling],
+        help="triage, analyze and publish a week the daemon has collected",
+    )
+    finalize.add_argument(
+        "--week",
+        type=date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="the digest's Sunday (default: the week currently being collected)",
+    )
+
+    search = commands.add_parser("search", help="search past coverage in the article store")
+    search.add_argument("query", help='FTS5 query: words, "exact phrases", OR, prefix*')
+    search.add_argument("--articles", action="store_true", help="list every matching article, not just past picks")
+    search.add_argument("--limit", type=int, default=20)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    # Bare `python -m src.main [--resume ...]` keeps meaning the full run
+    if not argv or argv[0].startswith("-") and argv[0] not in ("-h", "--help"):
+        argv = ["run", *argv]
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        from src.backfill import backfill
+
+        if args.end < args.start:
+            parser.error("--to is before --from")
+        asyncio.run(backfill(args.start, args.end, concurrency=args.concurrency, publish=not args.no_publish))
+        return
+
+    if args.command == "search":
+        import sqlite3
+
+        store = get_store()
+        try:
+            if args.articles:
+                for hit in store.search(args.query, args.limit):
+                    picked = f"  [picked {', '.join(hit['weeks'])}]" if hit["weeks"] else ""
+                    print(f"{hit['title']}  {hit['url']}{picked}")
+            else:
+                hits = store.coverage(args.query, args.limit)
+                for hit in hits:
+                    print(f"{hit['week']}  [{hit['category']}] {hit['headline']}  {hit['url']}")
+                if not hits:
+                    print("Not covered in any stored post.")
+        except sqlite3.OperationalError as e:
+            parser.error(f"bad search query: {e}")
+        return
+
+    if args.command == "daemon":
+        from src.daemon import CollectorDaemon
+
+        load_dotenv()
+        daemon = CollectorDaemon(get_store())
+        asyncio.run(daemon.tick() if args.once else daemon.run_forever())
+        return
+
+    warm_week = None
+    if args.command == "finalize":
+        if args.week is not None and args.week.weekday() != 6:
+            parser.error("--week must be a Sunday")
+        warm_week = args.week or get_store().current_week()
+        run_id, targets = f"finalize-{warm_week.isoformat()}", None
+        # A failed finalize picks up where it stopped when run again
+        resume = os.path.isdir(os.path.join(checkpoint.RUNS_DIR, run_id))
+    elif args.command == "run":
+        run_id, resume, targets = args.resume, args.resume is not None, None
+    else:
+        run_id, targets = args.run, SUBCOMMANDS[args.command]
+        # Collecting has nothing upstream to reuse; it (re)starts the run
+        resume = run_id is not None and args.command != "collect"
+    if run_id == "latest":
+        run_id = latest_run_id()
+        if run_id is None:
+            parser.error("no previous runs to build on")
+
+    asyncio.run(run_pipeline(
+        run_id,
+        resume=resume,
+        profile=args.profile,
+        cprofile=args.cprofile,
+        trace_memory=args.tracemalloc,
+        stall_threshold_ms=args.detect_stalls,
+        targets=targets,
+        warm_week=warm_week,
+    ))
+
+
 if __name__ == "__main__":
-    asyncio.run(run_pipeline())
+    main()
@@ -0,0 +1,225 @@
+"""Opt-in per-stage profiling for ``python -m src.main --profile``.
+
+Stages run concurrently on one event loop, so process-wide counters can't
+be split by stage directly. Instead, while profiling is active every event
+loop callback is timed and charged to the stage that scheduled it (tracked
+through ``dag.current_stage``, which child tasks inherit). That gives
+per-stage CPU time for in-loop work and lets an optional cProfile profiler
+per stage be switched on only while that stage's code runs. Work pushed to
+threads (``asyncio.to_thread``) shows up in the process CPU total only.
+
+With ``memory``, tracemalloc records the peak traced memory seen while each
+stage was running and the top allocation sites it left behind.
+
+The report is written to ``<run dir>/profile.json`` (cProfile dumps to
+``<run dir>/profile/<stage>.prof``) and compared with the previous run's
+report, so slow weeks stand out.
+"""
+
+import asyncio.events
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from src.checkpoint import run_ids
+from src.dag import StageTiming, current_stage
+
+PROFILE_VERSION = 1
+TOP_ALLOCATIONS = 10
+
+
+@dataclass
+class StageProfile:
+    stage: str
+    status: str = "running"
+    started: float = 0.0
+    finished: float = 0.0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_memory_bytes: int | None = None
+    allocated_bytes: int | None = None
+    top_allocations: list[dict] = field(default_factory=list)
+    cprofile_path: str | None = None
+
+
+class StageProfiler:
+    """Collects wall time, in-loop CPU time and optional cProfile/tracemalloc data per stage."""
+
+    def __init__(self, directory: str, cprofile: bool = False, memory: bool = False):
+        self.directory = directory
+        self.cprofile = cprofile
+        self.memory = memory
+        self.stages: dict[str, StageProfile] = {}
+        self._profilers: dict[str, cProfile.Profile] = {}
+        self._snapshots: dict[str, tracemalloc.Snapshot] = {}
+        self._active: set[str] = set()
+        self._original_run = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self._started_at = ""
+        self._wall_seconds = 0.0
+        self._cpu_seconds = 0.0
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        self._started_at = datetime.now().isoformat(timespec="seconds")
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._install()
+
+    def stop(self) -> None:
+        self._wall_seconds = time.perf_counter() - self._wall_start
+        self._cpu_seconds = time.process_time() - self._cpu_start
+        self._uninstall()
+        if self.memory and tracemalloc.is_tracing():
+            self._sample_peak()
+            tracemalloc.stop()
+
+    def __enter__(self) -> "StageProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- executor hooks ---
+
+    def stage_started(self, timing: StageTiming) -> None:
+        profile = self.stages[timing.stage] = StageProfile(timing.stage, started=timing.started)
+        if self.memory:
+            self._sample_peak()
+            self._snapshots[timing.stage] = tracemalloc.take_snapshot()
+            profile.peak_memory_bytes = tracemalloc.get_traced_memory()[0]
+        self._active.add(timing.stage)
+        if self.cprofile:
+            self._profilers[timing.stage] = cProfile.Profile()
+
+    def stage_finished(self, timing: StageTiming) -> None:
+        profile = self.stages[timing.stage]
+        profile.status = timing.status
+        profile.finished = timing.finished or timing.started
+        profile.wall_seconds = timing.duration
+        if self.memory:
+            self._sample_peak()
+            before = self._snapshots.pop(timing.stage)
+            after = tracemalloc.take_snapshot()
+            diff = after.compare_to(before, "lineno")
+            profile.allocated_bytes = sum(stat.size_diff for stat in diff)
+            profile.top_allocations = [
+                {
+                    "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:TOP_ALLOCATIONS]
+            ]
+        self._active.discard(timing.stage)
+        profiler = self._profilers.pop(timing.stage, None)
+        if profiler is not None:
+            os.makedirs(os.path.join(self.directory, "profile"), exist_ok=True)
+            path = os.path.join(self.directory, "profile", f"{timing.stage}.prof")
+            profiler.dump_stats(path)
+            profile.cprofile_path = path
+
+    def _sample_peak(self) -> None:
+        # Peaks are global, so split them at every stage boundary: each
+        # window's peak counts toward every stage that was running in it
+        _, peak = tracemalloc.get_traced_memory()
+        for stage in self._active:
+            profile = self.stages[stage]
+            profile.peak_memory_bytes = max(profile.peak_memory_bytes or 0, peak)
+        tracemalloc.reset_peak()
+
+    # --- event loop instrumentation ---
+
+    def _install(self) -> None:
+        profiler = self
+        original = asyncio.events.Handle._run
+        self._original_run = original
+
+        def _run(handle):
+            stage = handle._context.get(current_stage)
+            if stage is None or stage not in profiler.stages:
+                return original(handle)
+            cprof = profiler._profilers.get(stage)
+            if cprof is not None:
+                cprof.enable()
+            start = time.thread_time()
+            try:
+                return original(handle)
+            finally:
+                profiler.stages[stage].cpu_seconds += time.thread_time() - start
+                if cprof is not None:
+                    cprof.disable()
+
+        asyncio.events.Handle._run = _run
+
+    def _uninstall(self) -> None:
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    # --- report ---
+
+    def report(self, run_id: str) -> dict:
+        return {
+            "version": PROFILE_VERSION,
+            "run_id": run_id,
+            "started_at": self._started_at,
+            "wall_seconds": self._wall_seconds,
+            "process_cpu_seconds": self._cpu_seconds,
+            "stages": {name: asdict(profile) for name, profile in self.stages.items()},
+        }
+
+    def write_report(self, report: dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "profile.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+def load_report(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return report if report.get("version") == PROFILE_VERSION else None
+
+
+def previous_report(runs_dir: str, run_id: str) -> dict | None:
+    """The newest profile report from a run started before ``run_id``."""
+    runs = run_ids(runs_dir)
+    earlier = runs[:runs.index(run_id)] if run_id in runs else runs
+    for name in reversed(earlier):
+        report = load_report(os.path.join(runs_dir, name, "profile.json"))
+        if report is not None:
+            return report
+    return None
+
+
+def format_report(report: dict, baseline: dict | None = None) -> list[str]:
+    """Per-stage wall/CPU (and memory) lines, with deltas against ``baseline``."""
+    before = (baseline or {}).get("stages", {})
+    lines = []
+    for name, stage in sorted(report["stages"].items(), key=lambda item: item[1]["started"]):
+        line = f"{name}: {stage['wall_seconds']:.2f}s wall, {stage['cpu_seconds']:.2f}s CPU"
+        if stage.get("peak_memory_bytes") is not None:
+            line += f", peak {stage['peak_memory_bytes'] / 1e6:.1f} MB"
+        if name in before:
+            line += f" ({stage['wall_seconds'] - before[name]['wall_seconds']:+.2f}s vs {baseline['run_id']})"
+        lines.append(line)
+    lines.append(
+        f"total: {report['wall_seconds']:.2f}s wall, {report['process_cpu_seconds']:.2f}s process CPU"
+    )
+    return lines
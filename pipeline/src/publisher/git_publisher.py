@@ -5,9 +5,10 @@ import sys
 from datetime import datetime, timezone
 
 
-def git_publish() -> None:
+def git_publish(message: str | None = None) -> None:
     """Stage content/ changes, commit, and push to origin main.
 
+    ``message`` overrides the default "digest: Week N, YYYY" commit message.
     Handles the case where there are no changes gracefully.
     """
     repo_root = _find_repo_root()
@@ -34,7 +35,7 @@ def git_publish() -> None:
             return
 
         # Commit
-        commit_msg = f"digest: Week {week_number}, {year}"
+        commit_msg = message or f"digest: Week {week_number}, {year}"
         _run_git(
             ["git", "commit", "-m", commit_msg],
             cwd=repo_root,
@@ -2,36 +2,36 @@
 
 import json
 import os
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
 import yaml
 
-from src.config import RawArticle, VALID_CATEGORIES, VALID_RESOURCE_TYPES
+from src.config import DigestProfile, RawArticle, VALID_CATEGORIES, VALID_RESOURCE_TYPES
 
 CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "content")
 POSTS_DIR = os.path.join(CONTENT_DIR, "posts")
 RESOURCES_PATH = os.path.join(CONTENT_DIR, "resources.json")
 
 
-def _get_current_sunday() -> datetime:
-    """Get the most recent Sunday date (or today if it's Sunday)."""
-    now = datetime.now(timezone.utc)
+def _get_current_sunday(now: datetime | None = None) -> datetime:
+    """Get the most recent Sunday date (or today if it's Sunday), as of ``now``."""
+    now = now or datetime.now(timezone.utc)
     days_since_sunday = (now.weekday() - 6) % 7
     sunday = now - timedelta(days=days_since_sunday)
     return sunday.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
-def _extract_source_indices(story: dict) -> list[int]:
-    """Handle both modern and legacy source-index keys from LLM output."""
-    indices = story.get("source_article_indices")
-    if isinstance(indices, list):
-        return [idx for idx in indices if isinstance(idx, int)]
+def post_week(reference: datetime | None = None) -> date:
+    """The Sunday that ``write_post`` dates a post written for ``reference``."""
+    return _get_current_sunday(reference).date()
 
-    legacy = story.get("source_articles")
-    if isinstance(legacy, list):
-        return [idx for idx in legacy if isinstance(idx, int)]
 
-    return []
+def _content_paths(profile: DigestProfile | None) -> tuple[str, str]:
+    """The posts directory and resources.json for ``profile``'s digest."""
+    if profile is None or not profile.content_dir:
+        return POSTS_DIR, RESOURCES_PATH
+    directory = os.path.join(CONTENT_DIR, profile.content_dir)
+    return os.path.join(directory, "posts"), os.path.join(directory, "resources.json")
 
 
 def write_post(
@@ -39,6 +39,8 @@ def write_post(
     analysis: str,
     resources: dict,
     source_articles: list[RawArticle] | None = None,
+    reference: datetime | None = None,
+    profile: DigestProfile | None = None,
 ) -> str:
     """Write the weekly digest markdown post matching the data contract.
 
@@ -46,13 +48,18 @@ def write_post(
         triage: Dict with 'stories' list from triage step.
         analysis: Full markdown analysis text from deep analysis step.
         resources: Dict with 'resources' list from resource curation step.
+        reference: End of the collection window; the post is dated the
+            Sunday on or before it (default: now).
+        profile: Digest profile the post is for; sets its title and
+            directory (default: the general digest in content/posts).
 
     Returns:
         Path to the written post file.
     """
-    os.makedirs(POSTS_DIR, exist_ok=True)
+    posts_dir, _ = _content_paths(profile)
+    os.makedirs(posts_dir, exist_ok=True)
 
-    sunday = _get_current_sunday()
+    sunday = _get_current_sunday(reference)
     date_str = sunday.strftime("%Y-%m-%d")
     week_number = sunday.isocalendar()[1]
     year = sunday.year
@@ -67,11 +74,10 @@ def write_post(
         significance = story.get("significance", 5)
         significance = max(1, min(10, significance))
 
-        # Prefer the URL selected during triage, otherwise map source indices to articles.
-        source_url = story.get("source_url", "")
-        if not source_url and source_articles:
-            indices = _extract_source_indices(story)
-            for idx in indices:
+        # Triage output is validated against TriagedStory, so stories only carry indices
+        source_url = ""
+        if source_articles:
+            for idx in story.get("source_article_indices", []):
                 if 0 <= idx < len(source_articles):
                     candidate = source_articles[idx].url.strip()
                     if candidate:
@@ -112,8 +118,9 @@ def write_post(
         summary = "This week's AI and tech digest."
 
     # Build frontmatter
+    title = profile.title if profile else "AI & Tech Weekly Digest"
     frontmatter = {
-        "title": f"AI & Tech Weekly Digest — Week of {sunday.strftime('%B %d, %Y')}",
+        "title": f"{title} — Week of {sunday.strftime('%B %d, %Y')}",
         "date": date_str,
         "week_number": week_number,
         "year": year,
@@ -136,7 +143,7 @@ def write_post(
     post_content = f"---\n{frontmatter_yaml}---\n\n{analysis}\n"
 
     # Write to file
-    post_path = os.path.join(POSTS_DIR, f"{date_str}.md")
+    post_path = os.path.join(posts_dir, f"{date_str}.md")
     with open(post_path, "w", encoding="utf-8") as f:
         f.write(post_content)
 
@@ -144,11 +151,13 @@ def write_post(
     return post_path
 
 
-def update_resources(resources: dict) -> None:
+def update_resources(resources: dict, profile: DigestProfile | None = None) -> None:
     """Merge new resources into existing resources.json without overwriting.
 
     Adds new resources to the appropriate category lists based on resource type.
+    Each ``profile`` with its own ``content_dir`` keeps its own resources.json.
     """
+    _, resources_path = _content_paths(profile)
     # Load existing resources
     existing = {"last_updated": "", "categories": {
         "newsletters": [],
@@ -160,9 +169,9 @@ def update_resources(resources: dict) -> None:
         "communities": [],
     }}
 
-    if os.path.exists(RESOURCES_PATH):
+    if os.path.exists(resources_path):
         try:
-            with open(RESOURCES_PATH, "r", encoding="utf-8") as f:
+            with open(resources_path, "r", encoding="utf-8") as f:
                 existing = json.load(f)
         except (json.JSONDecodeError, OSError) as e:
             print(f"  Warning: Could not read resources.json: {e}")
@@ -209,8 +218,8 @@ def update_resources(resources: dict) -> None:
     existing["last_updated"] = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
     # Write back
-    os.makedirs(os.path.dirname(RESOURCES_PATH), exist_ok=True)
-    with open(RESOURCES_PATH, "w", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(resources_path), exist_ok=True)
+    with open(resources_path, "w", encoding="utf-8") as f:
         json.dump(existing, f, indent=2, ensure_ascii=False)
 
     print(f"  Updated resources.json: {new_count} new resources added")
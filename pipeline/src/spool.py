@@ -0,0 +1,89 @@
+"""Disk spool for article bodies, read back through a memory map.
+
+Article bodies run up to 50 KB each but are only read a handful of times
+(dedup, clustering, excerpting for prompts), so ``RawArticle`` keeps a long
+body here and holds just its offset. The spool is an unlinked temporary
+file: the OS page cache keeps recently read bodies hot, and the file's
+space is freed once the last article referring to it is gone.
+"""
+
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class BodySpool:
+    """Append-only store of UTF-8 texts addressed by (offset, length)."""
+
+    def __init__(self, directory: str | None = None):
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._file = tempfile.TemporaryFile(dir=directory, prefix="bodies-")
+        self._map: mmap.mmap | None = None
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def append(self, text: str) -> tuple[int, int]:
+        """Write ``text`` to the end of the spool; returns its offset and length in bytes."""
+        data = text.encode("utf-8", "surrogatepass")
+        with self._lock:
+            offset = self.size
+            os.pwrite(self._file.fileno(), data, offset)
+            self.size += len(data)
+        return offset, len(data)
+
+    def read(self, offset: int, length: int, errors: str = "surrogatepass") -> str:
+        """Decode ``length`` bytes at ``offset``; ``errors="ignore"`` for a prefix that may split a character."""
+        if not length:
+            return ""
+        with self._lock:
+            if self._map is None or offset + length > len(self._map):
+                # Appends since the last read aren't mapped yet
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), self.size, access=mmap.ACCESS_READ)
+            data = self._map[offset:offset + length]
+        return data.decode("utf-8", errors)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+
+_spool: BodySpool | None = None
+_scoped: ContextVar[BodySpool | None] = ContextVar("body_spool", default=None)
+
+
+def get_spool() -> BodySpool:
+    """The spool new article bodies go to: the current ``fresh_spool`` scope's, else the process-wide one."""
+    scoped = _scoped.get()
+    if scoped is not None:
+        return scoped
+    global _spool
+    if _spool is None:
+        from src.config import CACHE_DIR
+
+        _spool = BodySpool(CACHE_DIR)
+    return _spool
+
+
+@contextmanager
+def fresh_spool():
+    """Spool bodies created in this block (and tasks/threads it starts) into a new file.
+
+    A long-lived process such as the collector daemon uses one per cycle, so
+    the space held by articles it has since dropped is given back.
+    """
+    from src.config import CACHE_DIR
+
+    token = _scoped.set(BodySpool(CACHE_DIR))
+    try:
+        yield _scoped.get()
+    finally:
+        _scoped.reset(token)
@@ -0,0 +1,554 @@
+"""Persistent article store: every article, fetch, cluster, pick and post, in one SQLite file.
+
+Collectors upsert what they fetch here in bulk, along with the article pages
+they downloaded, so a rerun reads pages from disk instead of the network.
+The collector daemon keeps each week's deduplicated article set here, which
+``finalize`` starts from, and every written post records its story clusters
+and triage picks. An FTS5 index over titles and bodies makes "have we
+covered this before?" a millisecond query.
+
+WAL mode lets the daemon write while a pipeline run or a ``search`` reads.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from src.config import CACHE_DIR, PAGE_CACHE_TTL_HOURS, RawArticle
+
+STORE_PATH = os.path.join(CACHE_DIR, "articles.db")
+
+# Bump with each schema change, and add the step that upgrades the previous version to _MIGRATIONS
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    source TEXT NOT NULL,
+    content TEXT NOT NULL,
+    published_at TEXT,
+    score INTEGER,
+    tags TEXT NOT NULL DEFAULT '[]',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, content, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, content ON articles
+WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    final_url TEXT,
+    content TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+
+-- origin is "daemon" for scheduled fetches, "run" for pipeline and backfill runs
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    origin TEXT NOT NULL,
+    week TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    duration REAL,
+    articles INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS fetches_source ON fetches (source, origin, fetched_at);
+
+-- The daemon's deduplicated set for each digest week
+CREATE TABLE IF NOT EXISTS week_articles (
+    week TEXT NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    added_at REAL NOT NULL,
+    PRIMARY KEY (week, article_id)
+);
+CREATE TABLE IF NOT EXISTS weeks (
+    week TEXT PRIMARY KEY,
+    finalized_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    week TEXT NOT NULL,
+    written_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_week ON posts (week);
+CREATE TABLE IF NOT EXISTS clusters (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    representative INTEGER NOT NULL REFERENCES articles (id)
+);
+CREATE TABLE IF NOT EXISTS cluster_articles (
+    cluster_id INTEGER NOT NULL REFERENCES clusters (id) ON DELETE CASCADE,
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    PRIMARY KEY (cluster_id, article_id)
+);
+CREATE TABLE IF NOT EXISTS picks (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    headline TEXT NOT NULL,
+    category TEXT,
+    significance INTEGER,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS pick_articles (
+    pick_id INTEGER NOT NULL REFERENCES picks (id) ON DELETE CASCADE,
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    PRIMARY KEY (pick_id, article_id)
+);
+CREATE INDEX IF NOT EXISTS pick_articles_article ON pick_articles (article_id);
+"""
+
+# Upgrade steps from each older schema version to the next, applied in order
+# inside one transaction. They keep every row: later versions should add
+# columns with ALTER TABLE rather than rebuild tables. Anything _SCHEMA
+# creates with IF NOT EXISTS (indexes, FTS, new tables) needn't appear here.
+_MIGRATIONS = {
+    # v1 kept one JSON row per article per week, and fetches had no origin
+    1: """
+    ALTER TABLE articles RENAME TO articles_v1;
+    DROP INDEX IF EXISTS articles_week;
+    DROP INDEX IF EXISTS fetches_source;
+    ALTER TABLE fetches ADD COLUMN origin TEXT NOT NULL DEFAULT 'daemon';
+    ALTER TABLE fetches ADD COLUMN duration REAL;
+    CREATE TABLE articles (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL,
+        source TEXT NOT NULL,
+        content TEXT NOT NULL,
+        published_at TEXT,
+        score INTEGER,
+        tags TEXT NOT NULL DEFAULT '[]',
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL
+    );
+    CREATE TABLE week_articles (
+        week TEXT NOT NULL,
+        article_id INTEGER NOT NULL REFERENCES articles (id),
+        added_at REAL NOT NULL,
+        PRIMARY KEY (week, article_id)
+    );
+    INSERT INTO articles (url, title, source, content, published_at, score, tags, first_seen, last_seen)
+    SELECT url,
+           json_extract(data, '$.title'),
+           json_extract(data, '$.source'),
+           json_extract(data, '$.content'),
+           replace(json_extract(data, '$.published_at'), 'Z', '+00:00'),
+           json_extract(data, '$.score'),
+           coalesce(json_extract(data, '$.tags'), '[]'),
+           first_seen,
+           last_seen
+    FROM articles_v1 WHERE true ORDER BY first_seen, id
+    ON CONFLICT (url) DO UPDATE SET
+        title = CASE WHEN length(excluded.content) > length(content) THEN excluded.title ELSE title END,
+        source = CASE WHEN length(excluded.content) > length(content) THEN excluded.source ELSE source END,
+        content = CASE WHEN length(excluded.content) > length(content) THEN excluded.content ELSE content END,
+        published_at = coalesce(published_at, excluded.published_at),
+        score = CASE WHEN score IS NULL OR excluded.score > score THEN excluded.score ELSE score END,
+        tags = (
+            SELECT json_group_array(value) FROM (
+                SELECT value FROM json_each(tags) UNION SELECT value FROM json_each(excluded.tags)
+            )
+        ),
+        last_seen = max(last_seen, excluded.last_seen);
+    INSERT OR IGNORE INTO week_articles (week, article_id, added_at)
+    SELECT v.week, a.id, v.first_seen FROM articles_v1 v JOIN articles a ON a.url = v.url;
+    DROP TABLE articles_v1;
+    """,
+}
+
+# Merging a re-fetched article never loses information: the longer body wins,
+# scores only go up, tags accumulate and a known publish date is kept
+_UPSERT_ARTICLE = """
+INSERT INTO articles (url, title, source, content, published_at, score, tags, first_seen, last_seen)
+VALUES (:url, :title, :source, :content, :published_at, :score, :tags, :now, :now)
+ON CONFLICT (url) DO UPDATE SET
+    title = CASE WHEN length(excluded.content) > length(content) THEN excluded.title ELSE title END,
+    source = CASE WHEN length(excluded.content) > length(content) THEN excluded.source ELSE source END,
+    content = CASE WHEN length(excluded.content) > length(content) THEN excluded.content ELSE content END,
+    published_at = coalesce(published_at, excluded.published_at),
+    score = CASE WHEN score IS NULL OR excluded.score > score THEN excluded.score ELSE score END,
+    tags = (
+        SELECT json_group_array(value) FROM (
+            SELECT value FROM json_each(tags) UNION SELECT value FROM json_each(excluded.tags)
+        )
+    ),
+    last_seen = excluded.last_seen
+"""
+
+_ARTICLE_COLUMNS = "a.id, a.url, a.title, a.source, a.content, a.published_at, a.score, a.tags"
+
+
+def digest_week(now: datetime | None = None) -> date:
+    """The Sunday whose digest an article seen at ``now`` belongs to (today, if it's Sunday)."""
+    now = now or datetime.now(timezone.utc)
+    return (now + timedelta(days=(6 - now.weekday()) % 7)).date()
+
+
+def reference_week(reference: datetime | None = None) -> date:
+    """The digest week of a collection window ending at ``reference`` (default: now)."""
+    if reference is None:
+        return digest_week()
+    # Backfill windows end at midnight after their Sunday
+    return digest_week(reference - timedelta(seconds=1))
+
+
+def _row_to_article(row) -> tuple[int, RawArticle]:
+    row_id, url, title, source, content, published_at, score, tags = row
+    return row_id, RawArticle(
+        title=title,
+        url=url,
+        source=source,
+        content=content,
+        published_at=datetime.fromisoformat(published_at) if published_at else None,
+        score=score,
+        tags=json.loads(tags),
+    )
+
+
+def _article_params(article: RawArticle, now: float) -> dict:
+    return {
+        "url": article.url,
+        "title": article.title,
+        "source": article.source,
+        "content": article.content,
+        "published_at": article.published_at.isoformat() if article.published_at else None,
+        "score": article.score,
+        "tags": json.dumps(article.tags),
+        "now": now,
+    }
+
+
+class ArticleStore:
+    """Articles keyed by URL, plus fetches, pages, week sets, clusters, picks and posts."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or STORE_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        # WAL keeps commits atomic without an fsync each; a crash loses at most the last few
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.execute("PRAGMA foreign_keys = ON")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            # v1 stores predate user_version; a store without tables is new
+            known = self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles'").fetchone()
+            version = 1 if known else SCHEMA_VERSION
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Article store {self.path} has schema v{version}, newer than this code's v{SCHEMA_VERSION}"
+            )
+        if version < SCHEMA_VERSION:
+            self._migrate(version)
+        self.db.executescript(_SCHEMA + f"PRAGMA user_version = {SCHEMA_VERSION};")
+
+    def _migrate(self, version: int) -> None:
+        print(f"Migrating article store {self.path} from schema v{version} to v{SCHEMA_VERSION}")
+        steps = "".join(_MIGRATIONS[v] for v in range(version, SCHEMA_VERSION))
+        # One transaction, so an interrupted upgrade leaves the old version to retry from;
+        # the FTS index is rebuilt over whatever rows the steps moved
+        try:
+            self.db.executescript(
+                f"BEGIN; {steps} {_SCHEMA} "
+                "INSERT INTO articles_fts (articles_fts) VALUES ('rebuild'); "
+                f"PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;"
+            )
+        except sqlite3.Error:
+            if self.db.in_transaction:
+                self.db.rollback()
+            raise
+
+    def close(self) -> None:
+        self.db.close()
+
+    # --- Articles ---
+
+    def upsert_articles(self, articles: list[RawArticle]) -> list[int]:
+        """Insert or merge ``articles`` in one transaction; returns their row ids in order."""
+        if not articles:
+            return []
+        now = time.time()
+        with self.db:
+            # A generator, so only one body is loaded from the spool at a time
+            self.db.executemany(_UPSERT_ARTICLE, (_article_params(a, now) for a in articles))
+        ids = self.article_ids([a.url for a in articles])
+        return [ids[a.url] for a in articles]
+
+    def article_ids(self, urls: list[str]) -> dict[str, int]:
+        """Row ids of the stored articles among ``urls``."""
+        return dict(self.db.execute(
+            "SELECT url, id FROM articles WHERE url IN (SELECT value FROM json_each(?))",
+            (json.dumps(urls),),
+        ))
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Full-text search over every stored article, best match first, with the weeks it was picked.
+
+        ``query`` uses FTS5 syntax: words, "quoted phrases", OR, prefix*.
+        """
+        rows = self.db.execute(
+            """
+            SELECT a.id, a.url, a.title, a.published_at,
+                   (SELECT group_concat(DISTINCT p.week) FROM pick_articles pa
+                        JOIN picks k ON k.id = pa.pick_id JOIN posts p ON p.id = k.post_id
+                        WHERE pa.article_id = a.id) AS weeks
+            FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+            ORDER BY bm25(articles_fts, 5.0, 1.0)
+            LIMIT ?
+            """,
+            (query, limit),
+        )
+        return [
+            {
+                "id": row_id,
+                "url": url,
+                "title": title,
+                "published_at": published_at,
+                "weeks": sorted(weeks.split(",")) if weeks else [],
+            }
+            for row_id, url, title, published_at, weeks in rows
+        ]
+
+    def coverage(self, query: str, limit: int = 20) -> list[dict]:
+        """Past digest stories whose source articles match ``query``, most recent week first."""
+        rows = self.db.execute(
+            """
+            SELECT p.week, p.path, k.headline, k.category, min(a.url)
+            FROM articles_fts
+                JOIN articles a ON a.id = articles_fts.rowid
+                JOIN pick_articles pa ON pa.article_id = a.id
+                JOIN picks k ON k.id = pa.pick_id
+                JOIN posts p ON p.id = k.post_id
+            WHERE articles_fts MATCH ?
+            GROUP BY k.id
+            ORDER BY p.week DESC, k.rank
+            LIMIT ?
+            """,
+            (query, limit),
+        )
+        return [
+            {"week": week, "post": path, "headline": headline, "category": category, "url": url}
+            for week, path, headline, category, url in rows
+        ]
+
+    # --- Pages (article bodies fetched by the collectors) ---
+
+    def cached_pages(self, urls: list[str], max_age: float | None = None) -> dict[str, str]:
+        """Bodies of the pages among ``urls`` fetched within ``max_age`` seconds (default ``PAGE_CACHE_TTL_HOURS``)."""
+        max_age = PAGE_CACHE_TTL_HOURS * 3600 if max_age is None else max_age
+        return dict(self.db.execute(
+            "SELECT url, content FROM pages WHERE url IN (SELECT value FROM json_each(?)) AND fetched_at >= ?",
+            (json.dumps(urls), time.time() - max_age),
+        ))
+
+    def save_pages(self, pages: list[tuple[str, str | None, str]]) -> None:
+        """Store fetched ``(url, final_url, content)`` pages in one transaction."""
+        if not pages:
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO pages (url, final_url, content, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET final_url = excluded.final_url, "
+                "content = excluded.content, fetched_at = excluded.fetched_at",
+                [(url, final_url, content, now) for url, final_url, content in pages],
+            )
+
+    # --- Fetch log ---
+
+    def save_collection(
+        self,
+        week: date,
+        source: str,
+        articles: list[RawArticle],
+        pages: list[tuple[str, str | None, str]] = (),
+        origin: str = "run",
+        duration: float | None = None,
+    ) -> list[int]:
+        """Store one collector fetch: its pages, its articles and the fetch itself; returns article ids."""
+        self.save_pages(list(pages))
+        ids = self.upsert_articles(articles)
+        self.record_fetch(week, source, len(articles), origin=origin, duration=duration)
+        return ids
+
+    def record_fetch(
+        self,
+        week: date,
+        source: str,
+        articles: int,
+        error: str | None = None,
+        origin: str = "daemon",
+        duration: float | None = None,
+    ) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT INTO fetches (origin, week, source, fetched_at, duration, articles, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (origin, week.isoformat(), source, time.time(), duration, articles, error),
+            )
+
+    def last_fetch(self, source: str, origin: str = "daemon") -> tuple[float, str | None] | None:
+        """When ``source`` was last fetched (epoch seconds) and the error, if that fetch failed."""
+        return self.db.execute(
+            "SELECT fetched_at, error FROM fetches WHERE source = ? AND origin = ? "
+            "ORDER BY fetched_at DESC, id DESC LIMIT 1",
+            (source, origin),
+        ).fetchone()
+
+    def fetch_summary(self, week: date, origin: str = "daemon") -> dict[str, dict]:
+        rows = self.db.execute(
+            "SELECT source, COUNT(*), SUM(articles), SUM(error IS NOT NULL) FROM fetches "
+            "WHERE week = ? AND origin = ? GROUP BY source",
+            (week.isoformat(), origin),
+        )
+        return {
+            source: {"fetches": count, "articles": total or 0, "errors": errors}
+            for source, count, total, errors in rows
+        }
+
+    # --- The daemon's per-week deduplicated sets ---
+
+    def load_week(self, week: date) -> list[tuple[int, RawArticle]]:
+        """The week's articles with their row ids, in the order they were first added."""
+        rows = self.db.execute(
+            f"SELECT {_ARTICLE_COLUMNS} FROM week_articles w JOIN articles a ON a.id = w.article_id "
+            "WHERE w.week = ? ORDER BY w.added_at, w.rowid",
+            (week.isoformat(),),
+        )
+        return [_row_to_article(row) for row in rows]
+
+    def save_articles(self, week: date, items: list[tuple[int | None, RawArticle]]) -> None:
+        """Add new articles (id None) to the week and replace changed ones, keeping their place."""
+        if not items:
+            return
+        ids = self.upsert_articles([article for _, article in items])
+        now = time.time()
+        with self.db:
+            for (old_id, _), new_id in zip(items, ids):
+                if old_id is None:
+                    self.db.execute(
+                        "INSERT OR IGNORE INTO week_articles (week, article_id, added_at) VALUES (?, ?, ?)",
+                        (week.isoformat(), new_id, now),
+                    )
+                elif old_id != new_id:
+                    # A merge can promote a different URL's version to represent the story
+                    self.db.execute(
+                        "UPDATE OR IGNORE week_articles SET article_id = ? WHERE week = ? AND article_id = ?",
+                        (new_id, week.isoformat(), old_id),
+                    )
+                    self.db.execute(
+                        "DELETE FROM week_articles WHERE week = ? AND article_id = ?",
+                        (week.isoformat(), old_id),
+                    )
+
+    def finalized_at(self, week: date) -> float | None:
+        """When the week's digest was published (epoch seconds), or None while it's still open."""
+        row = self.db.execute(
+            "SELECT finalized_at FROM weeks WHERE week = ?", (week.isoformat(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_finalized(self, week: date) -> bool:
+        return bool(self.finalized_at(week))
+
+    def mark_finalized(self, week: date) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT INTO weeks (week, finalized_at) VALUES (?, ?) "
+                "ON CONFLICT(week) DO UPDATE SET finalized_at = excluded.finalized_at",
+                (week.isoformat(), time.time()),
+            )
+
+    def current_week(self, now: datetime | None = None) -> date:
+        """The week new articles go into: the upcoming Sunday's, or the next one once that's published."""
+        week = digest_week(now)
+        return week + timedelta(days=7) if self.is_finalized(week) else week
+
+    # --- Posts ---
+
+    def record_post(
+        self,
+        path: str,
+        week: date,
+        articles: list[RawArticle],
+        clusters: list,
+        stories: list[dict],
+    ) -> int:
+        """Record a written post with its story clusters and triage picks; returns the post id.
+
+        ``clusters`` and each story's ``source_article_indices`` index into
+        ``articles``. Recording the same post path again replaces it.
+        """
+        ids = self.upsert_articles(articles)
+        with self.db:
+            self.db.execute("DELETE FROM posts WHERE path = ?", (path,))
+            post_id = self.db.execute(
+                "INSERT INTO posts (path, week, written_at) VALUES (?, ?, ?)",
+                (path, week.isoformat(), time.time()),
+            ).lastrowid
+            for cluster in clusters:
+                cluster_id = self.db.execute(
+                    "INSERT INTO clusters (post_id, representative) VALUES (?, ?)",
+                    (post_id, ids[cluster.representative]),
+                ).lastrowid
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO cluster_articles (cluster_id, article_id) VALUES (?, ?)",
+                    [(cluster_id, ids[i]) for i in cluster.members],
+                )
+            for rank, story in enumerate(stories):
+                pick_id = self.db.execute(
+                    "INSERT INTO picks (post_id, rank, headline, category, significance, summary) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        post_id,
+                        rank,
+                        story.get("headline", ""),
+                        story.get("category"),
+                        story.get("significance"),
+                        story.get("one_line_summary"),
+                    ),
+                ).lastrowid
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO pick_articles (pick_id, article_id) VALUES (?, ?)",
+                    [
+                        (pick_id, ids[i])
+                        for i in story.get("source_article_indices", [])
+                        if isinstance(i, int) and 0 <= i < len(ids)
+                    ],
+                )
+        return post_id
+
+
+_store: ArticleStore | None = None
+
+
+def get_store() -> ArticleStore:
+    """Return the process-wide store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = ArticleStore()
+    return _store
@@ -0,0 +1,33 @@
+"""Shared fixtures — keep on-disk caches out of the real cache directory."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Point every persistent cache at a per-test temporary directory."""
+    from src import checkpoint, spool, store
+    from src.analysis import canonical, governor, llm_cache, routing
+
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(
+        canonical,
+        "_canonicalizer",
+        canonical.URLCanonicalizer(path=str(cache_dir / "canonical_urls.json")),
+    )
+    monkeypatch.setattr(
+        llm_cache,
+        "_response_cache",
+        llm_cache.ResponseCache(directory=str(cache_dir / "llm")),
+    )
+    monkeypatch.setattr(governor, "_governors", {})
+    monkeypatch.setattr(
+        routing,
+        "_stats",
+        routing.RoutingStats(path=str(cache_dir / "model_stats.json")),
+    )
+    monkeypatch.setattr(checkpoint, "RUNS_DIR", str(cache_dir / "runs"))
+    monkeypatch.setattr(store, "STORE_PATH", str(cache_dir / "articles.db"))
+    monkeypatch.setattr(store, "_store", None)
+    monkeypatch.setattr(spool, "_spool", spool.BodySpool(str(cache_dir)))
+    return cache_dir
@@ -2,7 +2,7 @@
 
 import json
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 
 from src.config import RawArticle
 
@@ -78,6 +78,99 @@ class TestDeduplicator:
         from src.analysis.deduplicator import deduplicate
         assert deduplicate([]) == []
 
+    def test_url_normalization_collapses_amp_and_mobile(self):
+        from src.analysis.deduplicator import normalize_url
+
+        canonical = normalize_url("https://example.com/story")
+        assert normalize_url("https://m.example.com/story/") == canonical
+        assert normalize_url("https://amp.example.com/story") == canonical
+        assert normalize_url("https://example.com/story/amp") == canonical
+        assert normalize_url("https://example.com/story?outputType=amp") == canonical
+        assert normalize_url("https://example-com.cdn.ampproject.org/c/s/example.com/story") == canonical
+        assert normalize_url("https://amp.dev/docs") == "https://amp.dev/docs"
+
+    def test_deduplicates_via_learned_aliases(self, tmp_path):
+        from src.analysis.canonical import URLCanonicalizer
+        from src.analysis.deduplicator import deduplicate
+
+        map_path = str(tmp_path / "canonical.json")
+        canonicalizer = URLCanonicalizer(path=map_path)
+        canonicalizer.record_fetch("https://t.co/abc123", "https://example.com/story?utm_source=x")
+        canonicalizer.record_fetch(
+            "https://feeds.example.com/item/42",
+            page='<html><head><link href="https://example.com/story" rel="canonical"></head></html>',
+        )
+        canonicalizer.save()
+
+        # A fresh instance reads the aliases back from disk
+        reloaded = URLCanonicalizer(path=map_path)
+        articles = [
+            RawArticle(title="Shared via Twitter", url="https://t.co/abc123", source="hn", content="Short"),
+            RawArticle(title="Feed copy", url="https://feeds.example.com/item/42", source="rss", content="Longer body"),
+            RawArticle(title="Original", url="https://www.example.com/story/", source="rss", content="x"),
+        ]
+        result = deduplicate(articles, canonicalizer=reloaded)
+        assert len(result) == 1
+        assert result[0].content == "Longer body"
+
+    def test_ignores_home_page_and_cross_site_canonicals(self, tmp_path):
+        from src.analysis.canonical import URLCanonicalizer
+
+        canonicalizer = URLCanonicalizer(path=str(tmp_path / "canonical.json"))
+        canonicalizer.record_fetch(
+            "https://www.example.com/paywalled-story",
+            page='<link rel="canonical" href="/">',
+        )
+        canonicalizer.record_fetch(
+            "https://news.example.co.uk/syndicated",
+            page='<link rel="canonical" href="https://partner.co.uk/original">',
+        )
+        canonicalizer.record_fetch(
+            "https://news.example.co.uk/amp/42",
+            page='<link rel="canonical" href="https://www.example.co.uk/story/42">',
+        )
+
+        paywalled, syndicated = "https://example.com/paywalled-story", "https://news.example.co.uk/syndicated"
+        assert canonicalizer.canonicalize(paywalled) == paywalled
+        assert canonicalizer.canonicalize(syndicated) == syndicated
+        assert canonicalizer.canonicalize("https://news.example.co.uk/amp/42") == "https://example.co.uk/story/42"
+
+    def test_merged_article_shares_the_longest_body(self):
+        from src.analysis.deduplicator import deduplicate
+        from src.spool import get_spool
+
+        body = "Gemini 3 benchmarks and pricing. " * 200
+        articles = [
+            RawArticle(title="Gemini 3 is out", url="https://example.com/g3", source="rss", content=body, tags=["ai"]),
+            RawArticle(title="Gemini 3 is out", url="https://www.example.com/g3/", source="hn", content="short", score=90, tags=["hn"]),
+        ]
+        spooled = get_spool().size
+        (merged,) = deduplicate(articles)
+
+        assert merged.shares_body(articles[0])
+        assert get_spool().size == spooled
+        assert merged.content == body and merged.score == 90
+        assert set(merged.tags) == {"ai", "hn"}
+
+    def test_merge_new_folds_snapshot_into_existing(self):
+        from src.analysis.deduplicator import merge_new
+
+        existing = [
+            RawArticle(title="Google Releases Gemini 2.5", url="https://a.com/1", source="rss", content="Short"),
+            RawArticle(title="Rust 2.0 announced", url="https://b.com/2", source="hn", content="Rust"),
+        ]
+        snapshot = [
+            RawArticle(title="Google Releases Gemini 2.5 Ultra", url="https://c.com/3", source="hn", content="A much longer write-up", score=50),
+            RawArticle(title="New JavaScript framework released", url="https://d.com/4", source="hn", content="JS"),
+            RawArticle(title="New JavaScript framework released", url="https://www.d.com/4/", source="reddit", content="JS"),
+        ]
+        unique, changed = merge_new(existing, snapshot)
+
+        assert len(unique) == 3
+        assert changed == {0, 2}
+        assert unique[0].content == "A much longer write-up" and unique[0].score == 50
+        assert unique[1] is existing[1]
+
 
 # --- Analyzer Tests (mocked Gemini API) ---
 
@@ -103,7 +196,7 @@ class TestAnalyzer:
         )
 
         mock_client = MagicMock()
-        mock_client.models.generate_content = MagicMock(return_value=mock_response)
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
         with patch("src.analysis.analyzer._get_client", return_value=mock_client):
             from src.analysis.analyzer import triage_articles
@@ -125,7 +218,7 @@ class TestAnalyzer:
         )
 
         mock_client = MagicMock()
-        mock_client.models.generate_content = MagicMock(return_value=mock_response)
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
         with patch("src.analysis.analyzer._get_client", return_value=mock_client):
             from src.analysis.analyzer import triage_articles
@@ -142,7 +235,7 @@ class TestAnalyzer:
         )
 
         mock_client = MagicMock()
-        mock_client.models.generate_content = MagicMock(return_value=mock_response)
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
         triage = {"stories": [{"headline": "Test", "source_article_indices": [0]}]}
 
@@ -173,7 +266,7 @@ class TestAnalyzer:
         )
 
         mock_client = MagicMock()
-        mock_client.models.generate_content = MagicMock(return_value=mock_response)
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
         triage = {"stories": []}
 
@@ -183,3 +276,1074 @@ class TestAnalyzer:
 
         assert "resources" in result
         assert len(result["resources"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_analysis_and_curation_overlap(self):
+        import asyncio
+
+        in_flight = 0
+        both_started = asyncio.Event()
+
+        async def slow_generate(model, contents, config):
+            nonlocal in_flight
+            in_flight += 1
+            if in_flight == 2:
+                both_started.set()
+            # Blocking calls would run one at a time and never both be in flight
+            await asyncio.wait_for(both_started.wait(), 5)
+            response = MagicMock()
+            response.text = '{"resources": []}'
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = slow_generate
+
+        triage = {"stories": [{"headline": "Test", "source_article_indices": [0]}]}
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            from src.analysis.analyzer import deep_analysis, curate_resources
+            await asyncio.gather(
+                deep_analysis(triage, _make_articles()),
+                curate_resources(triage, _make_articles()),
+            )
+
+        assert both_started.is_set()
+
+    def test_client_is_shared(self, monkeypatch):
+        from src.analysis import analyzer
+
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.setattr(analyzer, "_client", None)
+        assert analyzer._get_client() is analyzer._get_client()
+
+
+# --- Prompt Packer Tests ---
+
+class TestPacker:
+    def test_packs_within_budget_and_reports_drops(self):
+        from src.analysis.packer import pack_articles
+
+        articles = [
+            RawArticle(
+                title=f"Story {i}",
+                url=f"https://example.com/{i}",
+                source="hackernews",
+                content="word " * 2000,
+                score=i * 10,
+            )
+            for i in range(50)
+        ]
+        packed = pack_articles(articles, token_budget=2000)
+
+        assert packed.tokens_used <= 2000
+        assert packed.dropped > 0
+        assert len(packed.included) + packed.dropped == 50
+        # Highest-scoring articles are packed first, under their original indices
+        assert packed.included[0] == 49
+        items = json.loads(packed.payload)
+        assert [item["index"] for item in items] == packed.included
+
+    def test_serializes_compactly_without_nulls(self):
+        from src.analysis.packer import pack_articles
+
+        articles = [RawArticle(title="Bare", url="https://example.com", source="rss", content="x")]
+        packed = pack_articles(articles, token_budget=1000)
+
+        assert "\n" not in packed.payload
+        assert json.loads(packed.payload) == [
+            {"index": 0, "title": "Bare", "url": "https://example.com", "source": "rss", "content": "x"}
+        ]
+
+    def test_content_slices_shrink_as_budget_fills(self):
+        from src.analysis.packer import pack_articles
+
+        articles = [
+            RawArticle(title=f"T{i}", url=f"https://e.com/{i}", source="rss", content="y" * 5000, score=100 - i)
+            for i in range(10)
+        ]
+        items = json.loads(pack_articles(articles, token_budget=3000).payload)
+        lengths = [len(item["content"]) for item in items]
+
+        assert lengths[0] > lengths[-1]
+        assert lengths == sorted(lengths, reverse=True)
+
+
+# --- Sharded Triage Tests ---
+
+class TestShardedTriage:
+    def test_balanced_shards_cover_every_article_once(self):
+        from src.analysis.analyzer import _balanced_shards
+
+        articles = [
+            RawArticle(title=f"A{i}", url=f"https://e.com/{i}", source="rss", content="z" * (100 * (i % 7 + 1)))
+            for i in range(25)
+        ]
+        shards = _balanced_shards(articles, shard_size=10)
+
+        assert len(shards) == 3
+        assert sorted(i for shard in shards for i in shard) == list(range(25))
+        loads = [sum(min(len(articles[i].content), 2000) for i in shard) for shard in shards]
+        assert max(loads) - min(loads) <= 700
+
+    @pytest.mark.asyncio
+    async def test_sharded_triage_preserves_global_indices(self, monkeypatch):
+        from src.analysis import analyzer
+
+        monkeypatch.setattr(analyzer, "TRIAGE_SHARD_SIZE", 4)
+        articles = _make_articles(10)
+        shard_prompts = []
+
+        async def fake_generate(model, contents, config):
+            prompt = contents[0]["parts"][0]["text"]
+            response = MagicMock()
+            if prompt.startswith(analyzer.TRIAGE_REDUCE_PROMPT):
+                candidates = json.loads(prompt.split("Candidate stories from all batches:\n\n", 1)[1])
+                merged = sorted({i for c in candidates for i in c["source_article_indices"]})
+                response.text = json.dumps({"stories": [{
+                    "headline": "Merged", "category": "tech", "significance": 7,
+                    "source_article_indices": merged + [999], "one_line_summary": "All shards.",
+                }]})
+            else:
+                shard_prompts.append(prompt)
+                items = json.loads(prompt.split("this week:\n\n", 1)[1])
+                response.text = json.dumps({"stories": [{
+                    "headline": "Shard story", "category": "tech", "significance": 5,
+                    "source_article_indices": [item["index"] for item in items],
+                    "one_line_summary": "Shard.",
+                }]})
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = fake_generate
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            result = await analyzer.triage_articles(articles)
+
+        assert len(shard_prompts) == 3
+        # Out-of-range indices are dropped; every global index survives the reduce
+        assert result["stories"][0]["source_article_indices"] == list(range(10))
+
+
+# --- Response Cache Tests ---
+
+class TestResponseCache:
+    @pytest.mark.asyncio
+    async def test_rerun_is_served_from_cache(self):
+        mock_response = MagicMock()
+        mock_response.text = json.dumps({"resources": []})
+        mock_response.usage_metadata = MagicMock(prompt_token_count=100, candidates_token_count=50)
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            from src.analysis.analyzer import curate_resources
+            first = await curate_resources({"stories": []}, _make_articles())
+            second = await curate_resources({"stories": []}, _make_articles())
+
+        assert first == second
+        assert mock_client.aio.models.generate_content.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rerun_reuses_a_fallback_models_reply(self, monkeypatch):
+        from src.analysis import analyzer
+        from src.analysis.routing import ModelRoute
+
+        monkeypatch.setattr(analyzer, "RESOURCES_ROUTE", ModelRoute("resources", ["primary", "fallback"]))
+        calls = []
+
+        async def generate(model, contents, config):
+            calls.append(model)
+            if model == "primary":
+                raise RuntimeError("503 overloaded")
+            response = MagicMock()
+            response.text = json.dumps({"resources": []})
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = generate
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            await analyzer.curate_resources({"stories": []}, _make_articles())
+            await analyzer.curate_resources({"stories": []}, _make_articles())
+
+        assert calls == ["primary", "fallback"]
+
+    def test_key_depends_on_model_prompt_and_config(self):
+        from src.analysis.llm_cache import ResponseCache
+
+        base = ResponseCache.key("flash", "prompt", {"temperature": 0.3})
+        assert base == ResponseCache.key("flash", "prompt", {"temperature": 0.3})
+        assert base != ResponseCache.key("pro", "prompt", {"temperature": 0.3})
+        assert base != ResponseCache.key("flash", "prompt!", {"temperature": 0.3})
+        assert base != ResponseCache.key("flash", "prompt", {"temperature": 0.7})
+
+    def test_ttl_size_eviction_and_bypass(self, tmp_path):
+        from src.analysis.llm_cache import ResponseCache
+
+        cache = ResponseCache(directory=str(tmp_path), ttl_hours=1, max_entries=2)
+        cache.put("a", "first", {"prompt_token_count": 10})
+        cache.put("b", "second")
+        cache.put("c", "third")
+
+        hit = cache.get("c")
+        assert hit.text == "third"
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+        cache.ttl_seconds = -1
+        assert cache.get("c") is None
+
+        cache.enabled = False
+        cache.put("d", "bypassed")
+        assert not (tmp_path / "d.json").exists()
+
+
+# --- Streaming Analysis Tests ---
+
+class TestStreamingAnalysis:
+    @pytest.mark.asyncio
+    async def test_stream_resumes_from_partial_text(self, monkeypatch, tmp_path):
+        from src.analysis import analyzer
+
+        partial_path = tmp_path / "analysis.partial.md"
+        monkeypatch.setattr(analyzer, "ANALYSIS_STREAMING", True)
+        monkeypatch.setattr(analyzer, "ANALYSIS_PARTIAL_PATH", str(partial_path))
+
+        requests = []
+
+        def _chunk(text):
+            chunk = MagicMock()
+            chunk.text = text
+            chunk.usage_metadata = None
+            return chunk
+
+        async def fake_stream(model, contents, config):
+            requests.append(contents[0]["parts"][0]["text"])
+            attempt = len(requests)
+
+            async def chunks():
+                if attempt == 1:
+                    yield _chunk("## This Week in AI & Tech\n\n")
+                    yield _chunk("> Big week")
+                    raise TimeoutError("stream dropped")
+                yield _chunk(" for open models.\n\n## The Big Story\n\nDetails.")
+
+            return chunks()
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content_stream = fake_stream
+        triage = {"stories": [{"headline": "Test", "source_article_indices": [0]}]}
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            result = await analyzer.deep_analysis(triage, _make_articles())
+
+        assert result == "## This Week in AI & Tech\n\n> Big week for open models.\n\n## The Big Story\n\nDetails."
+        assert partial_path.read_text() == result
+        # The second request continues from what was already written
+        assert len(requests) == 2
+        assert "> Big week\n--- END OF WRITTEN SO FAR ---" in requests[1]
+
+
+# --- Sectioned Analysis Tests ---
+
+class TestSectionedAnalysis:
+    @pytest.mark.asyncio
+    async def test_sections_fan_out_then_assemble(self, monkeypatch):
+        import asyncio
+        from src.analysis import analyzer
+
+        monkeypatch.setattr(analyzer, "ANALYSIS_MODE", "sections")
+        articles = _make_articles(3)
+        triage = {"stories": [
+            {"headline": "Policy shift", "category": "policy", "significance": 6,
+             "source_article_indices": [2], "one_line_summary": "Rules."},
+            {"headline": "New model", "category": "ai-research", "significance": 9,
+             "source_article_indices": [0], "one_line_summary": "A model."},
+        ]}
+
+        prompts = []
+        in_flight = 0
+        peak = 0
+
+        async def fake_generate(model, contents, config):
+            nonlocal in_flight, peak
+            prompt = contents[0]["parts"][0]["text"]
+            prompts.append(prompt)
+            response = MagicMock()
+            if "finishing the weekly" in prompt:
+                response.text = json.dumps({
+                    "this_week": "A busy week.",
+                    "big_story": "The new model.",
+                    "connecting_the_dots": "It all connects.",
+                })
+                return response
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            heading = prompt.split("before it:\n## ", 1)[1].split("\n", 1)[0]
+            response.text = f"## {heading}\n\nDraft for {heading}."
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = fake_generate
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            result = await analyzer.deep_analysis(triage, articles)
+
+        assert peak == 2
+        # Each section only sees its own story's source material
+        research = next(p for p in prompts if "## AI Research" in p)
+        assert articles[0].url in research and articles[2].url not in research
+        assert result.startswith("## This Week in AI & Tech\n> A busy week."), result
+        assert (
+            result.index("## The Big Story")
+            < result.index("## AI Research & Breakthroughs")
+            < result.index("## Policy & Society")
+            < result.index("## Connecting the Dots")
+        )
+
+    @pytest.mark.asyncio
+    async def test_failed_section_is_omitted(self, monkeypatch):
+        from src.analysis import analyzer
+
+        monkeypatch.setattr(analyzer, "ANALYSIS_MODE", "sections")
+        triage = {"stories": [
+            {"headline": "A", "category": "tech", "significance": 5,
+             "source_article_indices": [0], "one_line_summary": "a"},
+            {"headline": "B", "category": "open-source", "significance": 5,
+             "source_article_indices": [1], "one_line_summary": "b"},
+        ]}
+
+        async def fake_generate(model, contents, config):
+            prompt = contents[0]["parts"][0]["text"]
+            if "## Open Source" in prompt and "finishing the weekly" not in prompt:
+                raise RuntimeError("boom")
+            response = MagicMock()
+            response.text = (
+                '{"this_week":"w","big_story":"b","connecting_the_dots":"c"}'
+                if "finishing the weekly" in prompt else "## Industry Moves\n\nText."
+            )
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = fake_generate
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            result = await analyzer.deep_analysis(triage, _make_articles())
+
+        assert "## Industry Moves" in result
+        assert "## Open Source & Tools" not in result
+
+    @pytest.mark.asyncio
+    async def test_all_sections_failing_raises(self, monkeypatch):
+        from src.analysis import analyzer
+
+        monkeypatch.setattr(analyzer, "ANALYSIS_MODE", "sections")
+        triage = {"stories": [
+            {"headline": "A", "category": "tech", "significance": 5,
+             "source_article_indices": [0], "one_line_summary": "a"},
+            {"headline": "B", "category": "open-source", "significance": 5,
+             "source_article_indices": [1], "one_line_summary": "b"},
+        ]}
+        framed = []
+
+        async def fake_generate(model, contents, config):
+            if "finishing the weekly" in contents[0]["parts"][0]["text"]:
+                framed.append(model)
+            raise RuntimeError("boom")
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = fake_generate
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            with pytest.raises(RuntimeError, match="All 2 analysis sections failed"):
+                await analyzer.deep_analysis(triage, _make_articles())
+        assert framed == []
+
+    @pytest.mark.asyncio
+    async def test_sections_see_the_digest_week_and_focus(self, monkeypatch):
+        from datetime import datetime
+        from src.analysis import analyzer
+
+        monkeypatch.setattr(analyzer, "ANALYSIS_MODE", "sections")
+        articles = _make_articles(2)
+        triage = {"stories": [
+            {"headline": "A", "category": "tech", "significance": 5,
+             "source_article_indices": [0], "one_line_summary": "a"},
+        ]}
+        context = analyzer.build_shared_context(
+            triage, articles, week_ending=datetime(2024, 3, 10), focus="open models",
+        )
+
+        prompts = []
+
+        async def fake_generate(model, contents, config):
+            prompt = contents[0]["parts"][0]["text"]
+            prompts.append(prompt)
+            response = MagicMock()
+            response.text = (
+                '{"this_week":"w","big_story":"b","connecting_the_dots":"c"}'
+                if "finishing the weekly" in prompt else "## Industry Moves\n\nText."
+            )
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = fake_generate
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            await analyzer.deep_analysis(triage, articles, context=context)
+
+        assert len(prompts) == 2  # one section, one framing call
+        for prompt in prompts:
+            assert prompt.startswith(
+                "This digest covers the week ending Sunday, March 10, 2024.\n\n"
+                "This digest focuses on open models."
+            ), prompt
+
+
+# --- Rate Governor Tests ---
+
+class TestRateGovernor:
+    @pytest.mark.asyncio
+    async def test_waits_for_token_budget(self):
+        import time
+        from src.analysis.governor import RateGovernor
+
+        governor = RateGovernor(rpm=1000, tpm=6000)  # 100 tokens/s
+        await governor.acquire(6000)
+        start = time.perf_counter()
+        await governor.acquire(10)
+        assert time.perf_counter() - start >= 0.08
+
+    @pytest.mark.asyncio
+    async def test_settle_corrects_estimate(self):
+        from src.analysis.governor import RateGovernor
+
+        governor = RateGovernor(rpm=1000, tpm=6000)
+        permit = await governor.acquire(1000)
+        governor.settle(permit, 4000)
+        assert governor.tokens.wait_time(3000) > 0
+        governor.settle(permit, 1000)  # back to the original charge
+        assert governor.tokens.wait_time(3000) == 0
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_is_served_first(self):
+        import asyncio
+        from src.analysis.governor import PRIORITY_BACKGROUND, PRIORITY_CRITICAL, RateGovernor
+
+        governor = RateGovernor(rpm=600, tpm=10 ** 6)  # 10 requests/s
+        for _ in range(600):
+            await governor.acquire(1)
+
+        order = []
+
+        async def take(name, priority):
+            await governor.acquire(1, priority)
+            order.append(name)
+
+        background = asyncio.create_task(take("background", PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        critical = asyncio.create_task(take("critical", PRIORITY_CRITICAL))
+        await asyncio.gather(background, critical)
+        assert order == ["critical", "background"]
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_call_backs_off_and_retries(self):
+        from google.genai import errors
+        from src.analysis.governor import RateGovernor, is_rate_limited
+
+        governor = RateGovernor(rpm=1000, tpm=10 ** 6, base_backoff=0.01)
+        calls = []
+
+        class Quota(errors.APIError):
+            def __init__(self):
+                Exception.__init__(self, "429 RESOURCE_EXHAUSTED")
+                self.code = 429
+                self.status = "RESOURCE_EXHAUSTED"
+                self.details = {"error": {"details": [{"retryDelay": "0.02s"}]}}
+
+        async def request():
+            calls.append(1)
+            if len(calls) == 1:
+                raise Quota()
+            return "ok"
+
+        result, permit = await governor.call(request, 100, label="Test")
+        assert result == "ok"
+        assert len(calls) == 2
+        assert governor.throttled == 1
+        assert is_rate_limited(Quota())
+        assert not is_rate_limited(ValueError("bad json"))
+
+    @pytest.mark.asyncio
+    async def test_generate_uses_model_governor(self, monkeypatch):
+        from src.analysis import analyzer, governor
+
+        monkeypatch.setattr(analyzer, "GEMINI_PRO_TPM", 60000)
+        mock_response = MagicMock()
+        mock_response.text = "{}"
+        mock_response.usage_metadata.prompt_token_count = 1234
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            await analyzer._generate(analyzer.PRO_MODEL, "prompt", {}, "Test")
+
+        pro = governor._governors[analyzer.PRO_MODEL]
+        assert pro.requests.capacity == analyzer.GEMINI_PRO_RPM
+        # Pre-charged with the estimate, then corrected to the reported prompt size
+        assert pro.tokens.wait_time(60000 - 1300) == 0
+        assert pro.tokens.wait_time(60000 - 1000) > 0
+
+
+# --- Model Routing Tests ---
+
+class TestModelRouting:
+    @pytest.mark.asyncio
+    async def test_falls_back_on_error(self):
+        from src.analysis.routing import ModelRoute, get_routing_stats, route_call
+
+        route = ModelRoute("triage", ["primary", "fallback"], hedge_after=None)
+
+        async def call(model):
+            if model == "primary":
+                raise RuntimeError("503 overloaded")
+            return f"from {model}"
+
+        result, model = await route_call(route, call, "Test")
+        assert (result, model) == ("from fallback", "fallback")
+        stats = get_routing_stats()
+        assert stats.win_rate("triage", "fallback") == 1.0
+        assert stats.win_rate("triage", "primary") == 0.0
+
+    @pytest.mark.asyncio
+    async def test_hedges_slow_primary_and_cancels_loser(self):
+        import asyncio
+        from src.analysis.routing import ModelRoute, get_routing_stats, route_call
+
+        route = ModelRoute("analysis", ["slow", "fast"], hedge_after=0.05)
+        cancelled = []
+
+        async def call(model):
+            try:
+                await asyncio.sleep(5 if model == "slow" else 0.01)
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+            return model
+
+        result, model = await asyncio.wait_for(route_call(route, call, "Test"), 1)
+        assert model == "fast"
+        assert cancelled == ["slow"]
+        stats = get_routing_stats()
+        stats.save()
+        assert any(line.startswith("analysis fast: win rate 100%") for line in stats.summary())
+
+    @pytest.mark.asyncio
+    async def test_time_queued_for_a_permit_does_not_count_toward_the_hedge(self):
+        import asyncio
+        from src.analysis.routing import ModelRoute, mark_dispatched, route_call
+
+        route = ModelRoute("analysis", ["primary", "fallback"], hedge_after=0.05)
+        called = []
+
+        async def call(model):
+            called.append(model)
+            await asyncio.sleep(0.2)  # waiting on the rate governor
+            mark_dispatched()
+            await asyncio.sleep(0.01)
+            return model
+
+        assert await route_call(route, call, "Test", signals_dispatch=True) == ("primary", "primary")
+        assert called == ["primary"]
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_never_hedges(self):
+        from src.analysis.routing import ModelRoute, route_call
+
+        route = ModelRoute("resources", ["primary", "fallback"], hedge_after=1.0)
+        called = []
+
+        async def call(model):
+            called.append(model)
+            return model
+
+        assert await route_call(route, call, "Test") == ("primary", "primary")
+        assert called == ["primary"]
+
+    @pytest.mark.asyncio
+    async def test_all_models_failing_raises(self):
+        from src.analysis.routing import ModelRoute, route_call
+
+        route = ModelRoute("triage", ["a", "b"], hedge_after=None)
+
+        async def call(model):
+            raise ValueError(model)
+
+        with pytest.raises(ValueError, match="b"):
+            await route_call(route, call, "Test")
+
+
+# --- Context Cache Tests ---
+
+class TestContextCache:
+    def _long_articles(self):
+        articles = _make_articles(3)
+        for i, a in enumerate(articles):
+            a.content = f"Paragraph about topic {i} and its details. " * 200
+        return articles
+
+    async def _run_stages(self, monkeypatch, enabled: bool):
+        from src.analysis import analyzer, llm_cache
+        from src.analysis.fake_gemini import FakeGeminiClient
+        from src.analysis.routing import ModelRoute
+
+        monkeypatch.setattr(llm_cache.get_response_cache(), "enabled", False)
+        # Same model for both stages so they can share one cached prefix
+        monkeypatch.setattr(analyzer, "ANALYSIS_ROUTE", ModelRoute("analysis", ["model-a"]))
+        monkeypatch.setattr(analyzer, "RESOURCES_ROUTE", ModelRoute("resources", ["model-a"]))
+        fake = FakeGeminiClient()
+        articles = self._long_articles()
+        triage = {"stories": [
+            {"headline": f"Story {i}", "category": "tech", "significance": 7,
+             "source_article_indices": [i], "one_line_summary": "s"}
+            for i in range(3)
+        ]}
+        context = analyzer.build_shared_context(triage, articles)
+        context.enabled = enabled
+        context.min_tokens = 100
+
+        with patch("src.analysis.analyzer._get_client", return_value=fake):
+            await analyzer.deep_analysis(triage, articles, context)
+            created = len(fake.cached_contents)
+            resources = await analyzer.curate_resources(triage, articles, context)
+            await context.release()
+        return fake, context, created, resources
+
+    @pytest.mark.asyncio
+    async def test_shared_prefix_is_cached_once_and_reused(self, monkeypatch):
+        fake, context, created, resources = await self._run_stages(monkeypatch, enabled=True)
+
+        assert created == 1
+        assert fake.cached_contents == {}  # released
+        assert [call.cached_tokens for call in fake.calls] == [context.tokens, context.tokens]
+        assert resources["resources"]  # the fake saw article URLs through the cache
+
+    @pytest.mark.asyncio
+    async def test_cached_run_pays_fewer_fresh_input_tokens(self, monkeypatch):
+        cached_fake, context, _, _ = await self._run_stages(monkeypatch, enabled=True)
+        inline_fake, _, created, _ = await self._run_stages(monkeypatch, enabled=False)
+
+        assert created == 0
+        assert inline_fake.cached_tokens == 0
+        assert inline_fake.uncached_tokens - cached_fake.uncached_tokens >= 2 * context.tokens - 10
+        # Total input is the same; only the billing split changes
+        assert sum(c.prompt_tokens for c in cached_fake.calls) == pytest.approx(
+            sum(c.prompt_tokens for c in inline_fake.calls), abs=5
+        )
+
+    @pytest.mark.asyncio
+    async def test_no_cache_is_created_when_the_stages_use_different_models(self, monkeypatch):
+        from src.analysis import analyzer, llm_cache
+        from src.analysis.fake_gemini import FakeGeminiClient
+        from src.analysis.routing import ModelRoute
+
+        monkeypatch.setattr(llm_cache.get_response_cache(), "enabled", False)
+        monkeypatch.setattr(analyzer, "ANALYSIS_ROUTE", ModelRoute("analysis", ["model-pro"]))
+        monkeypatch.setattr(analyzer, "RESOURCES_ROUTE", ModelRoute("resources", ["model-flash"]))
+        fake = FakeGeminiClient()
+        created = []
+        create = fake.aio.caches.create
+
+        async def counting_create(**kwargs):
+            created.append(kwargs["model"])
+            return await create(**kwargs)
+
+        monkeypatch.setattr(fake.aio.caches, "create", counting_create)
+        prompts = []
+        generate = fake.aio.models.generate_content
+
+        async def recording_generate(model, contents, config=None):
+            prompts.append(contents[0]["parts"][0]["text"])
+            return await generate(model=model, contents=contents, config=config)
+
+        monkeypatch.setattr(fake.aio.models, "generate_content", recording_generate)
+        articles = self._long_articles()
+        triage = {"stories": [{"headline": "Story", "category": "tech", "significance": 7,
+                               "source_article_indices": [0], "one_line_summary": "s"}]}
+        context = analyzer.build_shared_context(triage, articles)
+        context.min_tokens = 100
+
+        with patch("src.analysis.analyzer._get_client", return_value=fake):
+            await analyzer.deep_analysis(triage, articles, context)
+            await analyzer.curate_resources(triage, articles, context)
+
+        assert created == []
+        assert [call.cached_tokens for call in fake.calls] == [0, 0]
+        # Curation isn't sent the analysis's source material when it can't share a cache
+        assert "Source material:" in prompts[0]
+        assert "Source material:" not in prompts[1]
+
+    @pytest.mark.asyncio
+    async def test_stream_resumes_cache_the_prefix_on_the_default_routes(self, monkeypatch, tmp_path):
+        from src.analysis import analyzer, llm_cache
+        from src.analysis.fake_gemini import FakeGeminiClient
+
+        monkeypatch.setattr(llm_cache.get_response_cache(), "enabled", False)
+        monkeypatch.setattr(analyzer, "ANALYSIS_STREAMING", True)
+        fake = FakeGeminiClient()
+        created = []
+        create = fake.aio.caches.create
+
+        async def counting_create(**kwargs):
+            created.append(kwargs["model"])
+            return await create(**kwargs)
+
+        monkeypatch.setattr(fake.aio.caches, "create", counting_create)
+        stream = fake.aio.models.generate_content_stream
+        streams = []
+
+        async def dropping_stream(model, contents, config=None):
+            chunks = await stream(model=model, contents=contents, config=config)
+            streams.append(model)
+            if len(streams) > 2:
+                return chunks
+
+            async def dropped():
+                yield await chunks.__anext__()
+                raise TimeoutError("stream dropped")
+
+            return dropped()
+
+        monkeypatch.setattr(fake.aio.models, "generate_content_stream", dropping_stream)
+        articles = self._long_articles()
+        triage = {"stories": [{"headline": "Story", "category": "tech", "significance": 7,
+                               "source_article_indices": [0], "one_line_summary": "s"}]}
+        context = analyzer.build_shared_context(triage, articles)
+        context.min_tokens = 100
+
+        with patch("src.analysis.analyzer._get_client", return_value=fake):
+            await analyzer.deep_analysis(triage, articles, context, partial_path=str(tmp_path / "a.partial.md"))
+            await analyzer.curate_resources(triage, articles, context)
+            await context.release()
+
+        # The first read goes inline; both resumes read the one cache the second read created
+        assert created == [analyzer.ANALYSIS_ROUTE.primary]
+        analysis_calls = [c for c in fake.calls if c.model == analyzer.ANALYSIS_ROUTE.primary]
+        assert [c.cached_tokens for c in analysis_calls] == [0, context.tokens, context.tokens]
+        assert fake.cached_contents == {}
+
+    @pytest.mark.asyncio
+    async def test_small_context_is_sent_inline(self):
+        from src.analysis.context_cache import SharedContext
+        from src.analysis.fake_gemini import FakeGeminiClient
+
+        fake = FakeGeminiClient()
+        context = SharedContext("tiny", min_tokens=100, shared_models={"model-a"})
+        assert await context.cache_name(fake, "model-a") is None
+        assert fake.cached_contents == {}
+
+
+# --- Fake Gemini Tests ---
+
+class TestFakeGemini:
+    @pytest.mark.asyncio
+    async def test_server_serves_the_real_sdk(self, monkeypatch, tmp_path):
+        from src.analysis import analyzer, llm_cache
+        from src.analysis.fake_gemini import FakeBehavior, FakeGeminiServer
+        from src.analysis.routing import ModelRoute
+
+        monkeypatch.setattr(llm_cache.get_response_cache(), "enabled", False)
+        monkeypatch.setattr(analyzer, "_client", None)
+        articles = _make_articles(5)
+
+        with FakeGeminiServer(FakeBehavior(fence_rate=1.0, latency_median=0.01)) as server:
+            monkeypatch.setenv("GEMINI_BASE_URL", server.url)
+            triage = await analyzer.triage_articles(articles)
+
+            monkeypatch.setattr(analyzer, "ANALYSIS_STREAMING", True)
+            monkeypatch.setattr(analyzer, "ANALYSIS_PARTIAL_PATH", str(tmp_path / "partial.md"))
+            # Curation on the analysis model, so the prefix is worth an explicit cache
+            monkeypatch.setattr(analyzer, "RESOURCES_ROUTE", ModelRoute("resources", [analyzer.ANALYSIS_ROUTE.primary]))
+            context = analyzer.build_shared_context(triage, articles)
+            context.min_tokens = 10
+            analysis = await analyzer.deep_analysis(triage, articles, context)
+            await context.release()
+
+            service = server.service
+
+        # Fenced JSON still parses; the stream and cached prefix went over HTTP
+        assert len(triage["stories"]) == 5
+        assert analysis.startswith("## This Week in AI & Tech")
+        assert service.calls[-1].cached_tokens == context.tokens
+        assert service.cached_contents == {}
+
+    @pytest.mark.asyncio
+    async def test_injected_429_matches_the_sdk_error(self):
+        from google.genai import errors
+        from src.analysis.fake_gemini import FakeBehavior, FakeGeminiClient
+        from src.analysis.governor import is_rate_limited, retry_delay
+
+        fake = FakeGeminiClient(FakeBehavior(rate_limit_rate=1.0, retry_delay=2.5))
+        with pytest.raises(errors.ClientError) as excinfo:
+            await fake.aio.models.generate_content(model="m", contents=[{"role": "user", "parts": [{"text": "hi"}]}])
+
+        assert is_rate_limited(excinfo.value)
+        assert retry_delay(excinfo.value) == 2.5
+        assert fake.service.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_quota_and_truncation(self):
+        from src.analysis import analyzer
+        from src.analysis.fake_gemini import FakeBehavior, FakeGeminiClient
+        from src.analysis.governor import is_rate_limited
+
+        fake = FakeGeminiClient(FakeBehavior(rpm_limit=1, truncate_rate=1.0))
+        contents = [{"role": "user", "parts": [{"text": "hi"}]}]
+        response = await fake.aio.models.generate_content(model="m", contents=contents)
+        assert analyzer._was_truncated(response)
+
+        with pytest.raises(Exception) as excinfo:
+            await fake.aio.models.generate_content(model="m", contents=contents)
+        assert is_rate_limited(excinfo.value)
+
+
+# --- Passage Selection Tests ---
+
+class TestPassageSelection:
+    def test_prefers_relevant_passages_over_boilerplate(self):
+        from src.analysis.passages import select_passages
+
+        page = (
+            "<html><head><script>var tracking = 1;</script></head><body>"
+            "<nav>Home | Subscribe | Login</nav>"
+            "<p>We use cookies to improve your experience. Accept all cookies to continue.</p>"
+            "<p>By Staff Writer. Published Monday. Share this article on social media.</p>"
+            + "".join(f"<p>Unrelated filler paragraph number {i} about the weather and sports.</p>" for i in range(20))
+            + "<p>The new Gemini model doubles context length and beats prior benchmarks on long context retrieval.</p>"
+            "<p>Gemini pricing drops for long context workloads, Google said.</p>"
+            "</body></html>"
+        )
+        excerpt = select_passages(page, "Google Gemini model long context", budget_chars=300)
+
+        assert len(excerpt) <= 300
+        assert "Gemini model doubles context length" in excerpt
+        assert "cookies" not in excerpt
+        assert "tracking" not in excerpt
+
+    def test_short_content_is_returned_whole(self):
+        from src.analysis.passages import select_passages
+
+        assert select_passages("<p>Short &amp; sweet.</p>", "anything", 500) == "Short & sweet."
+
+    def test_bm25_ranks_matching_passage_first(self):
+        from src.analysis.passages import bm25_scores
+
+        scores = bm25_scores(
+            ["cats and dogs", "transformer attention heads", "stock market news"],
+            "attention in transformer models",
+        )
+        assert scores.argmax() == 1
+        assert scores[0] == scores[2] == 0
+
+
+# --- Story Clustering Tests ---
+
+class TestStoryClustering:
+    def test_groups_coverage_of_the_same_story(self):
+        from src.analysis.clustering import cluster_articles
+
+        articles = [
+            RawArticle(
+                title="OpenAI releases GPT-5 with native video understanding",
+                url="https://a.com/gpt5", source="rss:theverge",
+                content="OpenAI released GPT-5 today, adding native video understanding and longer context.",
+                score=10,
+            ),
+            RawArticle(
+                title="Meta open-sources Llama 4 weights",
+                url="https://b.com/llama", source="rss:techcrunch",
+                content="Meta published Llama 4 weights under a permissive license for researchers.",
+            ),
+            RawArticle(
+                title="GPT-5 release: OpenAI adds native video understanding",
+                url="https://c.com/gpt5", source="hackernews",
+                content="The GPT-5 release from OpenAI brings native video understanding to the API.",
+                score=900,
+            ),
+            RawArticle(
+                title="EU finalizes AI Act enforcement timeline",
+                url="https://d.com/eu", source="rss:arstechnica",
+                content="Regulators in Brussels set dates for enforcement of the AI Act obligations.",
+            ),
+        ]
+        clusters = cluster_articles(articles)
+
+        by_member = {m: c for c in clusters for m in c.members}
+        assert len(clusters) == 3
+        assert by_member[0] is by_member[2]
+        # The higher-priority article represents the cluster
+        assert by_member[0].representative == 2
+        assert sorted(m for c in clusters for m in c.members) == [0, 1, 2, 3]
+
+    def test_restricted_clusters_are_reindexed_into_the_subset(self):
+        from src.analysis.clustering import StoryCluster, restrict_clusters
+
+        articles = [
+            RawArticle(title=f"Story {i}", url=f"https://e.com/{i}", source="rss:x", content="c", score=i)
+            for i in range(5)
+        ]
+        clusters = [StoryCluster(representative=4, members=[0, 2, 4]), StoryCluster(representative=3, members=[1, 3])]
+
+        restricted = restrict_clusters(clusters, articles, keep=[0, 2, 3])
+
+        # The dropped representative is replaced by the best remaining member
+        assert restricted == [
+            StoryCluster(representative=1, members=[0, 1]),
+            StoryCluster(representative=2, members=[2]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_triage_sends_representatives_and_expands_members(self):
+        from src.analysis.clustering import StoryCluster
+
+        prompts = []
+
+        async def fake_generate(model, contents, config):
+            prompts.append(contents[0]["parts"][0]["text"])
+            response = MagicMock()
+            response.text = json.dumps({"stories": [{
+                "headline": "Clustered", "category": "tech", "significance": 6,
+                "source_article_indices": [3], "one_line_summary": "One story.",
+            }]})
+            return response
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = fake_generate
+        clusters = [StoryCluster(representative=3, members=[0, 3, 4]), StoryCluster(1, [1]), StoryCluster(2, [2])]
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            from src.analysis.analyzer import triage_articles
+            result = await triage_articles(_make_articles(5), clusters)
+
+        items = json.loads(prompts[0].split("this week:\n\n", 1)[1])
+        assert sorted(item["index"] for item in items) == [1, 2, 3]
+        assert next(item for item in items if item["index"] == 3)["members"] == [0, 4]
+        assert result["stories"][0]["source_article_indices"] == [3, 0, 4]
+
+
+# --- Structured Output Tests ---
+
+class TestStructuredOutput:
+    @pytest.mark.asyncio
+    async def test_truncated_triage_is_salvaged_without_retry(self):
+        story = {
+            "headline": "Complete", "category": "tech", "significance": 7,
+            "source_article_indices": [0], "one_line_summary": "Fits.",
+        }
+        mock_response = MagicMock()
+        mock_response.text = json.dumps({"stories": [story, story]})[:-40]
+        mock_response.usage_metadata = MagicMock(prompt_token_count=100, candidates_token_count=4000)
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+        with patch("src.analysis.analyzer._get_client", return_value=mock_client):
+            from src.analysis.analyzer import triage_articles
+            result = await triage_articles(_make_articles())
+
+        assert result == {"stories": [story]}
+        assert mock_client.aio.models.generate_content.await_count == 1
+        config = mock_client.aio.models.generate_content.await_args.kwargs["config"]
+        assert config["response_schema"].__name__ == "TriageResult"
+
+    def test_invalid_items_are_dropped_individually(self):
+        from src.analysis.analyzer import _parse_structured
+        from src.config import CuratedResource
+
+        response = MagicMock()
+        response.text = json.dumps({"resources": [
+            {"title": "Good", "url": "https://e.com", "type": "paper", "description": "Worth it."},
+            {"title": "Missing url", "type": "paper", "description": "No link."},
+        ]})
+        result = _parse_structured(response, "resources", CuratedResource, "Resources")
+
+        assert [r["title"] for r in result["resources"]] == ["Good"]
+
+    def test_malformed_complete_output_still_raises(self):
+        from src.analysis.analyzer import _parse_structured
+        from src.config import TriagedStory
+
+        response = MagicMock()
+        response.text = '{"stories": [} trailing garbage'
+        with pytest.raises(json.JSONDecodeError):
+            _parse_structured(response, "stories", TriagedStory, "Triage")
+
+
+# --- Streaming JSON Salvage Tests ---
+
+class TestJsonStream:
+    DOC = json.dumps({
+        "note": 'brackets [in] "strings" {are} text',
+        "stories": [
+            {"headline": "A ]} tricky", "source_article_indices": [1, 2]},
+            {"headline": "B", "nested": {"list": [{"x": 1}]}},
+            {"headline": "C"},
+        ],
+    })
+
+    def test_chunked_feed_yields_items_as_they_complete(self):
+        from src.analysis.json_stream import ArrayItemStream
+
+        stream = ArrayItemStream("stories")
+        seen = []
+        for i in range(0, len(self.DOC), 5):
+            seen.extend(stream.feed(self.DOC[i:i + 5]))
+
+        assert [item["headline"] for item in seen] == ["A ]} tricky", "B", "C"]
+        assert stream.closed
+
+    def test_strings_spanning_chunks_are_scanned_once(self, monkeypatch):
+        from src.analysis import json_stream
+
+        doc = json.dumps({"stories": [{"headline": 'long \\ "quoted" ' * 200}, {"headline": "B"}]})
+        for size in (1, 2, 3, 7):
+            stream = json_stream.ArrayItemStream("stories")
+            seen = []
+            for i in range(0, len(doc), size):
+                seen.extend(stream.feed(doc[i:i + size]))
+            assert [item["headline"][:4] for item in seen] == ["long", "B"]
+
+        # Each character of the long string is matched by the tail regex at most once
+        scanned = []
+        tail = json_stream._STRING_TAIL_RE
+
+        class CountingTail:
+            def match(self, text, pos):
+                m = tail.match(text, pos)
+                scanned.append(m.end() - pos)
+                return m
+
+        monkeypatch.setattr(json_stream, "_STRING_TAIL_RE", CountingTail())
+        stream = json_stream.ArrayItemStream("stories")
+        for i in range(0, len(doc), 10):
+            stream.feed(doc[i:i + 10])
+        assert len(stream.items) == 2
+        assert sum(scanned) < len(doc)
+
+    def test_recovers_complete_items_from_any_truncation_point(self):
+        from src.analysis.json_stream import salvage_array_items
+
+        full = json.loads(self.DOC)["stories"]
+        for cut in range(len(self.DOC)):
+            recovered = salvage_array_items(self.DOC[:cut], "stories")
+            assert recovered == full[:len(recovered)]
+        cut_in_third = self.DOC.index('{"headline": "C"') + 5
+        assert salvage_array_items(self.DOC[:cut_in_third], "stories") == full[:2]
+
+    def test_extract_balanced_json(self):
+        from src.analysis.json_stream import extract_balanced_json
+
+        assert extract_balanced_json(f"Sure! {self.DOC} Hope that helps.") == self.DOC
+        assert extract_balanced_json(self.DOC[:-3]) is None
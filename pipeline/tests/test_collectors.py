@@ -192,3 +192,122 @@ async def test_reddit_collector_parses_json():
     assert len(articles) >= 1
     assert articles[0].source == "reddit:r/MachineLearning"
     assert isinstance(articles[0], RawArticle)
+
+
+# --- Backfill windows ---
+
+@pytest.mark.asyncio
+async def test_hackernews_backfill_searches_the_past_week():
+    """With a reference date, HN should query Algolia for that week instead of today's front page."""
+    from src.collectors.hackernews import HackerNewsCollector
+
+    reference = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    hits = [
+        {"objectID": "7", "title": "New AI model", "url": "https://example.com/model", "points": 300},
+        {"objectID": "8", "title": "Gardening tips", "url": "https://example.com/garden", "points": 400},
+    ]
+    requested = []
+
+    async def mock_get(url, **kwargs):
+        requested.append((url, kwargs.get("params")))
+        resp = MagicMock()
+        resp.raise_for_status = MagicMock()
+        resp.json = MagicMock(return_value={"hits": hits})
+        resp.text = "article body"
+        resp.url = url
+        return resp
+
+    mock_client = AsyncMock()
+    mock_client.get = mock_get
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        articles = await HackerNewsCollector(reference=reference).collect()
+
+    search_url, params = requested[0]
+    assert "hn.algolia.com" in search_url
+    assert f"created_at_i<{int(reference.timestamp())}" in params["numericFilters"]
+    assert not any("firebaseio" in url for url, _ in requested)
+    assert [a.title for a in articles] == ["New AI model"]
+
+
+@pytest.mark.asyncio
+async def test_rerun_reads_article_pages_from_the_store():
+    """Pages a collector downloaded are saved with its articles and reused by the next run."""
+    from src.collectors.hackernews import HackerNewsCollector
+    from src.store import get_store, reference_week
+
+    hits = [{"objectID": "7", "title": "New AI model", "url": "https://example.com/model", "points": 300}]
+    requested = []
+
+    async def mock_get(url, **kwargs):
+        requested.append(url)
+        resp = MagicMock()
+        resp.raise_for_status = MagicMock()
+        resp.json = MagicMock(return_value={"hits": hits})
+        resp.text = "article body"
+        resp.url = url
+        return resp
+
+    mock_client = AsyncMock()
+    mock_client.get = mock_get
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+
+    reference = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    store = get_store()
+    with patch("httpx.AsyncClient", return_value=mock_client), \
+            patch.object(store, "cached_pages", wraps=store.cached_pages) as lookups:
+        first = HackerNewsCollector(reference=reference)
+        articles = await first.collect()
+        store.save_collection(reference_week(reference), "hackernews", articles, first.pages)
+        again = await HackerNewsCollector(reference=reference).collect()
+
+    assert requested.count("https://example.com/model") == 1
+    # One store query per collection, not one per page
+    assert lookups.call_count == 2
+    assert again[0].content == articles[0].content == "article body"
+
+
+@pytest.mark.asyncio
+async def test_arxiv_backfill_limits_to_the_window():
+    """Backfilled arXiv queries ask for the week by submission date and drop later papers."""
+    entry = """
+      <entry>
+        <title>{title}</title>
+        <summary>Abstract.</summary>
+        <link href="http://arxiv.org/abs/{id}" rel="alternate" type="text/html"/>
+        <published>{published}</published>
+      </entry>"""
+    mock_xml = '<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{}{}</feed>'.format(
+        entry.format(title="In window", id="1", published="2026-02-26T00:00:00Z"),
+        entry.format(title="Too new", id="2", published="2026-03-05T00:00:00Z"),
+    )
+    mock_response = MagicMock()
+    mock_response.text = mock_xml
+    mock_response.raise_for_status = MagicMock()
+    mock_client = AsyncMock()
+    mock_client.get = AsyncMock(return_value=mock_response)
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("httpx.AsyncClient", return_value=mock_client):
+        from src.collectors.arxiv import ArxivCollector
+        articles = await ArxivCollector(reference=datetime(2026, 3, 2, tzinfo=timezone.utc)).collect()
+
+    query = mock_client.get.call_args.kwargs["params"]["search_query"]
+    assert "submittedDate:[202602230000 TO 202603020000]" in query
+    assert [a.title for a in articles] == ["In window"]
+
+
+@pytest.mark.asyncio
+async def test_reddit_skips_backfill():
+    """Reddit has no historical listing, so a backfilled week gets nothing rather than this week's posts."""
+    from src.collectors.reddit import RedditCollector
+
+    with patch("httpx.AsyncClient") as client:
+        articles = await RedditCollector(reference=datetime(2026, 3, 2, tzinfo=timezone.utc)).collect()
+
+    assert articles == []
+    client.assert_not_called()
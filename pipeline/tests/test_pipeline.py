@@ -0,0 +1,1187 @@
+"""Tests for pipeline orchestration — the stage graph, checkpoints and resume."""
+
+import pytest
+
+from src.config import RawArticle
+
+
+def _articles(n: int = 3) -> list[RawArticle]:
+    return [
+        RawArticle(
+            title=f"Article {i} about AI",
+            url=f"https://example.com/{i}",
+            source="hackernews",
+            content=f"Content of article {i}.",
+            score=10 * i,
+        )
+        for i in range(n)
+    ]
+
+
+class TestCheckpoints:
+    @pytest.mark.asyncio
+    async def test_resume_skips_unchanged_stages(self):
+        from src.checkpoint import RunCheckpoints
+
+        calls = []
+
+        async def compute(name, value):
+            calls.append(name)
+            return value
+
+        run = RunCheckpoints("run-1")
+        await run.stage("a", lambda: compute("a", [1, 2]))
+        await run.stage("b", lambda: compute("b", {"x": 1}), inputs=["a"])
+
+        resumed = RunCheckpoints("run-1", resume=True)
+        assert await resumed.stage("a", lambda: compute("a", [1, 2])) == [1, 2]
+        assert await resumed.stage("b", lambda: compute("b", {"x": 1}), inputs=["a"]) == {"x": 1}
+        assert calls == ["a", "b"]
+        assert resumed.skipped == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_changed_input_reruns_downstream(self):
+        from src.checkpoint import RunCheckpoints
+
+        run = RunCheckpoints("run-2")
+        await run.stage("a", lambda: _value([1]))
+        await run.stage("b", lambda: _value("old"), inputs=["a"])
+
+        resumed = RunCheckpoints("run-2", resume=True)
+        # New sources change "a"'s identity, so it and everything after it rerun
+        await resumed.stage("a", lambda: _value([1, 2]), extra="new-sources")
+        assert await resumed.stage("b", lambda: _value("new"), inputs=["a"]) == "new"
+        assert resumed.skipped == []
+
+    def test_latest_run_is_the_last_one_started(self, monkeypatch, tmp_path):
+        import time
+        from src.checkpoint import RunCheckpoints, latest_run_id
+
+        runs_dir = str(tmp_path / "runs")
+        clock = iter(range(100, 200))
+        monkeypatch.setattr(time, "time", lambda: next(clock))
+        for run_id in ("backfill-2026-10-11", "20261019-120000"):
+            RunCheckpoints(run_id, runs_dir=runs_dir)
+        assert latest_run_id(runs_dir) == "20261019-120000"
+
+        # Resuming an older run doesn't make it the latest; restarting one does
+        RunCheckpoints("backfill-2026-10-11", resume=True, runs_dir=runs_dir)
+        assert latest_run_id(runs_dir) == "20261019-120000"
+        RunCheckpoints("finalize-2026-10-18", runs_dir=runs_dir)
+        assert latest_run_id(runs_dir) == "finalize-2026-10-18"
+
+    def test_unknown_run_raises(self):
+        from src.checkpoint import RunCheckpoints
+
+        with pytest.raises(FileNotFoundError):
+            RunCheckpoints("missing", resume=True)
+
+
+async def _value(value):
+    return value
+
+
+class TestDAGExecutor:
+    @pytest.mark.asyncio
+    async def test_independent_stages_overlap(self):
+        import asyncio
+        from src.dag import DAGExecutor, Stage
+
+        async def slow(value, **_):
+            await asyncio.sleep(0.05)
+            return value
+
+        executor = DAGExecutor([
+            Stage("a", lambda: slow(1), outputs=("a",)),
+            Stage("b", lambda a: slow(a + 1), inputs=("a",), outputs=("b",)),
+            Stage("c", lambda a: slow(a + 2), inputs=("a",), outputs=("c",)),
+            Stage("d", lambda b, c: slow(b + c), inputs=("b", "c"), outputs=("d",)),
+        ])
+        values = await executor.run()
+
+        assert values["d"] == 5
+        timing = {t.stage: t for t in executor.timeline.entries}
+        # b and c both start the moment a finishes, not one after the other
+        assert timing["c"].started < timing["b"].finished
+        assert timing["d"].started >= max(timing["b"].finished, timing["c"].finished)
+        assert executor.timeline.critical_path(executor.stages, executor.producers)[0] == "a"
+        assert executor.timeline.critical_path(executor.stages, executor.producers)[-1] == "d"
+        assert len(executor.timeline.format()) == 4
+
+    @pytest.mark.asyncio
+    async def test_timeout_fails_stage_and_cancels_the_rest(self):
+        import asyncio
+        from src.dag import DAGExecutor, Stage, StageFailed
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        executor = DAGExecutor([
+            Stage("stuck", hang, outputs=("x",), timeout=0.05),
+            Stage("other", hang, outputs=("y",)),
+            Stage("after", _value, inputs=("x",), outputs=("z",)),
+        ])
+        with pytest.raises(StageFailed) as excinfo:
+            await executor.run()
+
+        assert excinfo.value.stage == "stuck"
+        statuses = {t.stage: t.status for t in executor.timeline.entries}
+        assert statuses == {"stuck": "timeout", "other": "cancelled"}
+
+    def test_rejects_missing_inputs_and_cycles(self):
+        from src.dag import DAGExecutor, Stage
+
+        with pytest.raises(ValueError, match="no stage produces"):
+            DAGExecutor([Stage("a", _value, inputs=("missing",), outputs=("a",))])
+        with pytest.raises(ValueError, match="cycle"):
+            DAGExecutor([
+                Stage("a", _value, inputs=("b",), outputs=("a",)),
+                Stage("b", _value, inputs=("a",), outputs=("b",)),
+            ])
+
+    @pytest.mark.asyncio
+    async def test_checkpointed_stages_resume(self):
+        from src.checkpoint import RunCheckpoints
+        from src.dag import DAGExecutor, Stage
+
+        calls = []
+
+        async def produce():
+            calls.append("produce")
+            return [1, 2]
+
+        async def total(numbers):
+            calls.append("total")
+            return sum(numbers)
+
+        def stages():
+            return [
+                Stage("produce", produce, outputs=("numbers",)),
+                Stage("handle", lambda numbers: _value(object()), inputs=("numbers",),
+                      outputs=("handle",), checkpoint=False),
+                Stage("total", lambda numbers, handle: total(numbers),
+                      inputs=("numbers", "handle"), outputs=("total",)),
+            ]
+
+        await DAGExecutor(stages(), RunCheckpoints("dag-1")).run()
+        executor = DAGExecutor(stages(), RunCheckpoints("dag-1", resume=True))
+        values = await executor.run()
+
+        assert values["total"] == 3
+        assert calls == ["produce", "total"]
+        statuses = {t.stage: t.status for t in executor.timeline.entries}
+        assert statuses == {"produce": "resumed", "handle": "done", "total": "resumed"}
+
+
+class TestRunPipelineResume:
+    @pytest.mark.asyncio
+    async def test_failed_publish_resumes_without_rerunning_llm_stages(self, monkeypatch, tmp_path):
+        from src import main
+
+        calls = []
+
+        async def collect():
+            calls.append("collect")
+            return _articles()
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+
+        async def triage(unique, clusters, focus=""):
+            calls.append("triage")
+            return {"stories": [{"headline": "H", "category": "tech", "significance": 7,
+                                 "source_article_indices": [0], "one_line_summary": "s"}]}
+
+        async def analysis(triage, unique, context, partial_path=None):
+            calls.append("analysis")
+            return "## This Week in AI & Tech\n> Text"
+
+        async def resources(triage, unique, context):
+            calls.append("resources")
+            return {"resources": []}
+
+        post = tmp_path / "post.md"
+
+        def write_post(*args, **kwargs):
+            calls.append("write")
+            post.write_text("post")
+            return str(post)
+
+        publish_attempts = []
+
+        def git_publish():
+            publish_attempts.append(1)
+            if len(publish_attempts) == 1:
+                raise RuntimeError("push rejected")
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"hn": collector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", resources)
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", git_publish)
+
+        with pytest.raises(RuntimeError, match="push rejected"):
+            await main.run_pipeline("week-1")
+        assert calls[:2] == ["collect", "triage"]
+        assert sorted(calls[2:]) == ["analysis", "resources", "write"]
+
+        calls.clear()
+        await main.run_pipeline("week-1", resume=True)
+        assert calls == []
+        assert len(publish_attempts) == 2
+
+    @pytest.mark.asyncio
+    async def test_deleted_post_is_rewritten_on_resume(self, monkeypatch, tmp_path):
+        from src import main
+
+        post = tmp_path / "post.md"
+        writes = []
+
+        def write_post(*args, **kwargs):
+            writes.append(1)
+            post.write_text("post")
+            return str(post)
+
+        async def collect():
+            return _articles()
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+
+        async def triage(unique, clusters, focus=""):
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        async def analysis(*args, **kwargs):
+            return "text"
+
+        async def resources(*args):
+            return {"resources": []}
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"hn": collector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", resources)
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda: None)
+
+        await main.run_pipeline("week-2")
+        post.unlink()
+        await main.run_pipeline("week-2", resume=True)
+        assert len(writes) == 2
+        assert post.exists()
+
+
+class TestRunPipelineGraph:
+    @pytest.mark.asyncio
+    async def test_resources_file_updates_while_analysis_still_runs(self, monkeypatch, tmp_path):
+        import asyncio
+        from src import main
+
+        resources_updated = asyncio.Event()
+
+        async def collect():
+            return _articles()
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+
+        async def triage(unique, clusters, focus=""):
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        async def analysis(*args, **kwargs):
+            # Would time out if update_resources waited for the whole LLM phase
+            await asyncio.wait_for(resources_updated.wait(), 1)
+            return "text"
+
+        async def resources(*args):
+            return {"resources": []}
+
+        post = tmp_path / "post.md"
+
+        def write_post(*args, **kwargs):
+            post.write_text("post")
+            return str(post)
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"a": collector, "b": collector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", resources)
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: resources_updated.set())
+        monkeypatch.setattr(main, "git_publish", lambda: None)
+
+        await main.run_pipeline("week-3", profile=True)
+        assert post.exists()
+
+        from src import checkpoint
+        from src.profiling import load_report
+
+        report = load_report(f"{checkpoint.RUNS_DIR}/week-3/profile.json")
+        assert {"collect_a", "collect_b", "dedup", "analysis", "update_resources"} <= set(report["stages"])
+
+    @pytest.mark.asyncio
+    async def test_sources_are_deduplicated_as_they_arrive(self, monkeypatch):
+        import asyncio
+        from src import main
+        from src.analysis.deduplicator import merge_new
+
+        topics = ["Rust 2.0 announced", "Gemini tops the benchmarks", "EU passes the AI Act", "Open weights for all"]
+        articles = [a.model_copy(update={"title": topic}) for a, topic in zip(_articles(4), topics)]
+        merges = []
+
+        def recording_merge(existing, new):
+            merges.append([a.url for a in new])
+            return merge_new(existing, new)
+
+        async def fast():
+            return articles[:2]
+
+        async def slow():
+            # Still fetching while the fast source is folded in
+            while not merges:
+                await asyncio.sleep(0.01)
+            return articles[1:]
+
+        collectors = {
+            name: type("FakeCollector", (), {"collect": staticmethod(collect)})
+            for name, collect in (("slow", slow), ("fast", fast))
+        }
+        clustered = []
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: collectors)
+        monkeypatch.setattr(main, "merge_new", recording_merge)
+        monkeypatch.setattr(main, "cluster_articles", lambda unique: clustered.append(len(unique)) or [])
+
+        await main.run_pipeline("week-7", targets=("dedup",))
+        assert merges == [[a.url for a in articles[:2]], [a.url for a in articles[1:]]]
+        assert clustered == [4]
+
+        # Sources resumed from their checkpoints are folded in by dedup itself
+        merges.clear()
+        await main.run_pipeline("week-7", resume=True, targets=("dedup",))
+        assert sorted(map(len, merges)) == [2, 3]
+        assert clustered == [4, 4]
+
+    @pytest.mark.asyncio
+    async def test_no_articles_exits(self, monkeypatch):
+        from src import main
+
+        async def collect():
+            return []
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"a": collector})
+
+        with pytest.raises(SystemExit):
+            await main.run_pipeline("week-4")
+
+
+    @pytest.mark.asyncio
+    async def test_live_post_is_archived_under_its_own_date(self, monkeypatch):
+        from datetime import datetime
+        from src import main
+        from src.publisher import markdown_writer
+
+        class Wednesday(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(2024, 3, 13, 9, tzinfo=tz)
+
+        # Written on a Wednesday, the post is dated the Sunday before, not the one being collected
+        monkeypatch.setattr(markdown_writer, "datetime", Wednesday)
+        stages = main._digest_stages(main.active_profiles()[0], None, None)
+        archive = next(stage for stage in stages if stage.name == "archive")
+        await archive.run(unique=[], clusters=[], triage={"stories": []}, post={"post_path": "2024-03-10.md"})
+
+        assert main.get_store().db.execute("SELECT week FROM posts").fetchall() == [("2024-03-10",)]
+
+
+class TestDigestProfiles:
+    @staticmethod
+    def _profiles():
+        from src.config import DigestProfile
+
+        tools = DigestProfile(
+            name="tools", title="Tools Weekly", focus="developer tools",
+            rss_feeds=(("shared", "https://shared.example/feed"), ("tools", "https://tools.example/feed")),
+            subreddits=(), keywords=("release",), sources=("rss", "hackernews"), content_dir="tools",
+        )
+        policy = DigestProfile(
+            name="policy", title="Policy Weekly", focus="regulation",
+            rss_feeds=(("shared", "https://shared.example/feed"), ("policy", "https://policy.example/feed")),
+            subreddits=(), keywords=("law",), sources=("rss", "hackernews"), content_dir="policy",
+        )
+        return [tools, policy]
+
+    def test_collectors_fetch_the_union_of_profile_sources(self):
+        from src import main
+
+        collectors = main.build_collectors(self._profiles())
+
+        assert set(collectors) == {"rss", "hackernews"}
+        assert collectors["rss"].keywords["feeds"] == [
+            ("shared", "https://shared.example/feed"),
+            ("tools", "https://tools.example/feed"),
+            ("policy", "https://policy.example/feed"),
+        ]
+        assert collectors["hackernews"].keywords["keywords"] == ["release", "law"]
+
+    @pytest.mark.asyncio
+    async def test_one_collection_fans_out_to_every_profile(self, monkeypatch, tmp_path):
+        import os
+        from src import main
+
+        fetches = []
+
+        async def collect():
+            fetches.append(1)
+            return [
+                RawArticle(title="Shared feed story", url="https://e.com/1", source="rss:shared", content="a"),
+                RawArticle(title="New compiler release", url="https://e.com/2", source="rss:tools", content="b"),
+                RawArticle(title="Senate hearing", url="https://e.com/3", source="rss:policy", content="c"),
+                RawArticle(title="Privacy law passes", url="https://e.com/4", source="hackernews", content="d"),
+            ]
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+        seen = {}
+
+        async def triage(unique, clusters, focus=""):
+            seen[focus] = sorted(a.title for a in unique)
+            assert sorted(m for c in clusters for m in c.members) == list(range(len(unique)))
+            return {"stories": [{"headline": focus, "source_article_indices": [0]}]}
+
+        def write_post(*args, profile, **kwargs):
+            path = tmp_path / f"{profile.name}.md"
+            path.write_text(profile.title)
+            return str(path)
+
+        published = []
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "active_profiles", self._profiles)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"rss": collector, "hackernews": collector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        partials = []
+
+        async def analysis(*args, partial_path):
+            partials.append(os.path.basename(partial_path))
+            return "text"
+
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", lambda *args: _value({"resources": []}))
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda: published.append(1))
+
+        await main.run_pipeline("profiles-1")
+
+        assert len(fetches) == 2  # one per source, not per profile
+        assert seen == {
+            "developer tools": ["New compiler release", "Shared feed story"],
+            "regulation": ["Privacy law passes", "Senate hearing", "Shared feed story"],
+        }
+        assert (tmp_path / "tools.md").exists() and (tmp_path / "policy.md").exists()
+        assert published == [1]
+        # Concurrent analyses stream into separate files in the run directory
+        assert sorted(partials) == ["analysis@policy.partial.md", "analysis@tools.partial.md"]
+
+        # A profile's subcommand target covers each profile's branch
+        assert main.profile_targets(("collect", "triage"), self._profiles()) == (
+            "collect", "triage@tools", "triage@policy",
+        )
+
+    @pytest.mark.asyncio
+    async def test_an_empty_profile_skips_only_its_own_digest(self, monkeypatch, tmp_path):
+        import dataclasses
+        from src import main
+
+        tools, policy = self._profiles()
+        # Nothing collected matches this one, and triage finds nothing for tools
+        quiet = dataclasses.replace(
+            policy, name="quiet", focus="nothing", rss_feeds=(("quiet", "https://quiet.example/feed"),),
+            keywords=("zzz",), sources=("rss",), content_dir="quiet",
+        )
+        profiles = [tools, policy, quiet]
+
+        async def collect():
+            return [
+                RawArticle(title="New compiler release", url="https://e.com/2", source="rss:tools", content="b"),
+                RawArticle(title="Senate hearing", url="https://e.com/3", source="rss:policy", content="c"),
+            ]
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+        triaged = []
+
+        async def triage(unique, clusters, focus=""):
+            triaged.append(focus)
+            stories = [] if focus == "developer tools" else [{"headline": focus, "source_article_indices": [0]}]
+            return {"stories": stories}
+
+        def write_post(*args, profile, **kwargs):
+            path = tmp_path / f"{profile.name}.md"
+            path.write_text(profile.title)
+            return str(path)
+
+        published = []
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "active_profiles", lambda: profiles)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"rss": collector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", lambda *args, **kwargs: _value("text"))
+        monkeypatch.setattr(main, "curate_resources", lambda *args: _value({"resources": []}))
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda: published.append(1))
+
+        await main.run_pipeline("profiles-empty")
+
+        assert sorted(triaged) == ["developer tools", "regulation"]  # quiet never reached triage
+        assert [p.name for p in tmp_path.iterdir() if p.suffix == ".md"] == ["policy.md"]
+        archived = main.get_store().db.execute("SELECT path FROM posts").fetchall()
+        assert [row[0] for row in archived] == [str(tmp_path / "policy.md")]
+        assert published == [1]
+
+
+class TestProfiling:
+    @pytest.mark.asyncio
+    async def test_cpu_and_memory_are_charged_to_the_right_stage(self, tmp_path):
+        import asyncio
+        import asyncio.events
+        from src.dag import DAGExecutor, Stage
+        from src.profiling import StageProfiler
+
+        kept = []
+
+        async def busy():
+            # Spread the work over several loop steps, including a child task
+            async def chunk():
+                sum(i * i for i in range(200_000))
+
+            for _ in range(3):
+                await asyncio.gather(chunk())
+            kept.append(bytearray(2_000_000))
+            return 1
+
+        async def idle():
+            await asyncio.sleep(0.1)
+            return 2
+
+        original_run = asyncio.events.Handle._run
+        profiler = StageProfiler(str(tmp_path), cprofile=True, memory=True)
+        with profiler:
+            await DAGExecutor(
+                [Stage("busy", busy, outputs=("a",)), Stage("idle", idle, outputs=("b",))],
+                profiler=profiler,
+            ).run()
+        assert asyncio.events.Handle._run is original_run
+
+        stages = profiler.stages
+        assert stages["busy"].cpu_seconds > 5 * stages["idle"].cpu_seconds
+        assert stages["idle"].wall_seconds >= 0.1
+        assert stages["busy"].allocated_bytes >= 2_000_000
+        assert stages["busy"].peak_memory_bytes >= 2_000_000
+        assert (tmp_path / "profile" / "busy.prof").exists()
+
+    def test_report_round_trip_and_regression_deltas(self, tmp_path):
+        from src.profiling import StageProfiler, format_report, previous_report
+
+        def report_for(run_id: str, wall: float) -> dict:
+            profiler = StageProfiler(str(tmp_path / run_id))
+            profiler.start()
+            profiler.stop()
+            report = profiler.report(run_id)
+            report["stages"] = {
+                "triage": {"started": 0.0, "wall_seconds": wall, "cpu_seconds": 0.5, "peak_memory_bytes": None},
+            }
+            profiler.write_report(report)
+            return report
+
+        report_for("20261005-090000", 10.0)
+        current = report_for("20261012-090000", 12.5)
+
+        baseline = previous_report(str(tmp_path), "20261012-090000")
+        assert baseline["run_id"] == "20261005-090000"
+        lines = format_report(current, baseline)
+        assert lines[0] == "triage: 12.50s wall, 0.50s CPU (+2.50s vs 20261005-090000)"
+
+
+class TestLoopStallMonitor:
+    @pytest.mark.asyncio
+    async def test_blocking_stage_is_attributed_with_its_stack(self):
+        import asyncio
+        import time
+        from src.dag import DAGExecutor, Stage
+        from src.loop_monitor import LoopStallMonitor
+
+        async def blocker():
+            time.sleep(0.15)
+            return 1
+
+        async def polite():
+            await asyncio.sleep(0.15)
+            return 2
+
+        async with LoopStallMonitor(threshold=0.05, interval=0.01) as monitor:
+            await DAGExecutor([
+                Stage("blocker", blocker, outputs=("a",)),
+                Stage("polite", polite, outputs=("b",)),
+            ]).run()
+
+        assert monitor.worst_stall("blocker") >= 0.15
+        assert monitor.worst_stall("polite") == 0.0
+        stall = monitor.stalls[0]
+        assert any("in blocker" in frame for frame in stall.stack)
+        summary = monitor.summary()
+        assert summary["by_stage"]["blocker"]["stalls"] == 1
+        assert summary["lag"]["max"] >= 0.1
+
+    @pytest.mark.asyncio
+    async def test_pipeline_stages_do_not_block_the_loop(self, monkeypatch, tmp_path):
+        import time
+        from src import checkpoint, main
+        from src.analysis import analyzer  # loaded up front; its first import would count as a stall
+        from src.profiling import load_report
+
+        async def collect():
+            return _articles(20)
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+
+        async def triage(unique, clusters, focus=""):
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        post = tmp_path / "post.md"
+
+        def write_post(*args, **kwargs):
+            post.write_text("post")
+            return str(post)
+
+        def slow_merge(existing, new):
+            # Stands in for a big week's pairwise title matching
+            time.sleep(0.4)
+            return existing + new, set(range(len(existing), len(existing) + len(new)))
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"a": collector})
+        monkeypatch.setattr(main, "merge_new", slow_merge)
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", lambda *args, **kwargs: _value("text"))
+        monkeypatch.setattr(main, "curate_resources", lambda *args: _value({"resources": []}))
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda: None)
+
+        await main.run_pipeline("week-5", stall_threshold_ms=250)
+
+        loop = load_report(f"{checkpoint.RUNS_DIR}/week-5/profile.json")["loop"]
+        assert loop["stalls"] == []
+
+
+class TestCLI:
+    def _fake_stages(self, monkeypatch, tmp_path, calls):
+        from src import main
+
+        async def collect():
+            calls.append("collect")
+            return _articles()
+
+        collector = type("FakeCollector", (), {"collect": staticmethod(collect)})
+
+        async def triage(unique, clusters, focus=""):
+            calls.append("triage")
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        async def analysis(*args, **kwargs):
+            calls.append("analysis")
+            return "text"
+
+        async def resources(*args):
+            calls.append("resources")
+            return {"resources": []}
+
+        post = tmp_path / "post.md"
+
+        def write_post(*args, **kwargs):
+            calls.append("write")
+            post.write_text("post")
+            return str(post)
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"hn": collector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", resources)
+        monkeypatch.setattr(main, "write_post", write_post)
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda: calls.append("publish"))
+        return main
+
+    def test_subcommands_run_their_stages_on_the_latest_run(self, monkeypatch, tmp_path):
+        calls = []
+        main = self._fake_stages(monkeypatch, tmp_path, calls)
+
+        main.main(["collect", "--run", "week-6"])
+        assert calls == ["collect"]
+        main.main(["dedup"])
+        main.main(["triage"])
+        main.main(["triage"])  # asked for explicitly, so it reruns
+        assert calls == ["collect", "triage", "triage"]
+
+        calls.clear()
+        main.main(["analyze"])
+        assert sorted(calls) == ["analysis", "resources"]
+
+        calls.clear()
+        main.main(["publish"])
+        assert calls == ["write", "publish"]
+
+        # The bare legacy form still means "run", and everything is checkpointed now
+        calls.clear()
+        main.main(["--resume", "latest"])
+        assert calls == []
+
+    def test_unknown_target_is_rejected(self):
+        from src.dag import DAGExecutor, Stage
+
+        with pytest.raises(ValueError, match="Unknown stages"):
+            DAGExecutor([Stage("a", _value, outputs=("a",))], targets=["b"])
+
+    def test_startup_skips_heavy_imports(self):
+        """`python -m src.main <cmd>` must not import the LLM, feed or YAML stacks up front."""
+        import os
+        import subprocess
+        import sys
+
+        pipeline_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import src.main"],
+            cwd=pipeline_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imported[name.strip()] = int(cumulative)
+
+        heavy = {"google.genai", "feedparser", "thefuzz", "yaml", "numpy", "crawl4ai"}
+        assert heavy.isdisjoint(imported), heavy & imported.keys()
+        assert imported["src.main"] < 1_000_000  # microseconds
+
+
+class TestBackfill:
+    def test_sundays_in_range(self):
+        from datetime import date
+        from src.backfill import sundays
+
+        assert sundays(date(2026, 2, 17), date(2026, 3, 8)) == [
+            date(2026, 2, 22), date(2026, 3, 1), date(2026, 3, 8),
+        ]
+        assert sundays(date(2026, 3, 2), date(2026, 3, 7)) == []
+
+    @pytest.mark.asyncio
+    async def test_weeks_run_concurrently_then_publish_once(self, monkeypatch):
+        import asyncio
+        from datetime import date
+        from src import backfill, main
+
+        references = []
+        in_flight = {"now": 0, "max": 0}
+
+        class FakeCollector:
+            def __init__(self, reference=None):
+                references.append(reference)
+                self.reference = reference
+
+            async def collect(self):
+                return _articles()
+
+        async def triage(unique, clusters, focus=""):
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        async def analysis(*args, **kwargs):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.05)
+            in_flight["now"] -= 1
+            return "text"
+
+        async def resources(*args):
+            return {"resources": []}
+
+        posts, commits = [], []
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"hn": FakeCollector})
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", resources)
+        monkeypatch.setattr(main, "write_post", lambda *a, reference, **kw: posts.append(reference) or str(reference))
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda message=None: commits.append(message))
+
+        written = await backfill.backfill(date(2026, 2, 15), date(2026, 3, 1), concurrency=3)
+
+        assert len(written) == 3
+        assert sorted(r.date() for r in references) == [date(2026, 2, 16), date(2026, 2, 23), date(2026, 3, 2)]
+        assert [r.date() for r in posts] == [date(2026, 2, 16), date(2026, 2, 23), date(2026, 3, 2)]
+        assert in_flight["max"] > 1
+        assert commits == ["digest: backfill 2026-02-15 to 2026-03-01 (3 weeks)"]
+
+
+class TestDaemon:
+    @pytest.mark.asyncio
+    async def test_ticks_fold_snapshots_into_the_week(self, monkeypatch, tmp_path):
+        import time
+        from src.daemon import CollectorDaemon
+        from src.store import ArticleStore
+
+        topics = ["Rust 2.0 announced", "Gemini tops the benchmarks", "EU passes the AI Act"]
+
+        def snapshot(n):
+            return [a.model_copy(update={"title": topic}) for a, topic in zip(_articles(n), topics)]
+
+        snapshots = {"hn": [snapshot(2), snapshot(3)], "rss": [snapshot(1)]}
+        fetched = []
+
+        def collector(name):
+            class Fake:
+                async def collect(self):
+                    fetched.append(name)
+                    return snapshots[name].pop(0)
+            return Fake
+
+        store = ArticleStore(str(tmp_path / "articles.db"))
+        daemon = CollectorDaemon(
+            store,
+            schedule={"hn": 3600, "rss": 86400},
+            collectors={"hn": collector("hn"), "rss": collector("rss")},
+        )
+        assert await daemon.tick() == {"fetched": 3, "new": 2, "updated": 0}
+        assert await daemon.tick() == {}
+
+        # An hour later only HN is due again; its repeats merge into the stored rows
+        later = time.time() + 3601
+        assert daemon.due(later) == ["hn"]
+        monkeypatch.setattr(time, "time", lambda: later)
+        assert await daemon.tick() == {"fetched": 3, "new": 1, "updated": 2}
+
+        week = store.current_week()
+        assert [a.url for _, a in store.load_week(week)] == [f"https://example.com/{i}" for i in range(3)]
+        assert store.fetch_summary(week) == {
+            "hn": {"fetches": 2, "articles": 5, "errors": 0},
+            "rss": {"fetches": 1, "articles": 1, "errors": 0},
+        }
+
+    @pytest.mark.asyncio
+    async def test_monday_fetch_files_articles_by_publish_date(self, monkeypatch, tmp_path):
+        import time
+        from datetime import date, datetime, timezone
+        from src.daemon import CollectorDaemon
+        from src.store import ArticleStore
+
+        def at(day, hour=12):
+            return datetime(2024, 3, day, hour, tzinfo=timezone.utc)
+
+        # Last Sunday's digest went out that morning; the daemon now collects for the 17th
+        store = ArticleStore(str(tmp_path / "articles.db"))
+        with monkeypatch.context() as m:
+            m.setattr(time, "time", lambda: at(10, 8).timestamp())
+            store.mark_finalized(date(2024, 3, 10))
+        monkeypatch.setattr(store, "current_week", lambda: date(2024, 3, 17))
+
+        dated = [at(8), at(10, 20), at(11), None, at(1)]
+        topics = ["Rust 2.0 announced", "Gemini tops the benchmarks", "EU passes the AI Act",
+                  "Open weights for all", "Quantum error correction"]
+        snapshot = [
+            a.model_copy(update={"title": topic, "published_at": published})
+            for a, topic, published in zip(_articles(5), topics, dated)
+        ]
+
+        class Fake:
+            async def collect(self):
+                return snapshot
+
+        daemon = CollectorDaemon(store, schedule={"hn": 3600}, collectors={"hn": Fake})
+        assert await daemon.tick() == {"fetched": 5, "new": 4, "updated": 0}
+
+        def urls(week):
+            return [a.url for _, a in store.load_week(week)]
+
+        # Friday's story was in the published digest; Sunday night's came after it went out
+        assert urls(date(2024, 3, 17)) == [f"https://example.com/{i}" for i in (1, 2, 3)]
+        assert urls(date(2024, 3, 10)) == []
+        # A week that was never finalized still gets its late arrivals
+        assert urls(date(2024, 3, 3)) == ["https://example.com/4"]
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_is_retried_before_its_interval(self, tmp_path):
+        import time
+        from src.daemon import CollectorDaemon
+        from src.store import ArticleStore
+
+        class Broken:
+            async def collect(self):
+                raise RuntimeError("503")
+
+        store = ArticleStore(str(tmp_path / "articles.db"))
+        daemon = CollectorDaemon(store, schedule={"rss": 86400}, collectors={"rss": Broken})
+        await daemon.tick()
+        assert store.fetch_summary(store.current_week())["rss"]["errors"] == 1
+        assert daemon.due() == []
+        assert daemon.due(time.time() + 601) == ["rss"]
+
+    @pytest.mark.asyncio
+    async def test_finalize_runs_from_the_warm_store(self, monkeypatch):
+        from datetime import date
+        from src import main
+        from src.store import ArticleStore
+
+        week = date(2026, 3, 1)
+        store = ArticleStore()
+        store.save_articles(week, [(None, a) for a in _articles(3)])
+        store.close()
+
+        def no_collectors():
+            raise AssertionError("finalize must not collect")
+
+        seen = {}
+
+        async def triage(unique, clusters, focus=""):
+            seen["unique"] = len(unique)
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        async def analysis(*args, **kwargs):
+            return "text"
+
+        async def resources(*args):
+            return {"resources": []}
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {"hn": no_collectors})
+        monkeypatch.setattr(main, "merge_new", lambda *args: pytest.fail("warm articles are already deduplicated"))
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", analysis)
+        monkeypatch.setattr(main, "curate_resources", resources)
+        monkeypatch.setattr(main, "write_post", lambda *a, reference, **kw: seen.setdefault("reference", reference) and "post.md")
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", lambda message=None: None)
+
+        await main.run_pipeline("finalize-2026-03-01", warm_week=week)
+
+        assert seen["unique"] == 3
+        assert seen["reference"].date() == date(2026, 3, 2)
+        store = ArticleStore()
+        assert store.is_finalized(week)
+        assert store.current_week(main.datetime(2026, 2, 27)) == date(2026, 3, 8)
+
+    @pytest.mark.asyncio
+    async def test_rerun_finalize_sees_articles_added_since(self, monkeypatch):
+        from datetime import date
+        from src import main
+        from src.store import ArticleStore
+
+        week = date(2026, 3, 1)
+        articles = _articles(4)
+        store = ArticleStore()
+        store.save_articles(week, [(None, a) for a in articles[:3]])
+        store.close()
+
+        seen = []
+
+        async def triage(unique, clusters, focus=""):
+            seen.append(len(unique))
+            return {"stories": [{"headline": "H", "source_article_indices": [0]}]}
+
+        published = []
+
+        def git_publish(message=None):
+            published.append(1)
+            if len(published) == 1:
+                raise RuntimeError("push rejected")
+
+        monkeypatch.setattr(main, "load_dotenv", lambda: None)
+        monkeypatch.setattr(main, "build_collectors", lambda: {})
+        monkeypatch.setattr(main, "cluster_articles", lambda unique: [])
+        monkeypatch.setattr(main, "triage_articles", triage)
+        monkeypatch.setattr(main, "deep_analysis", lambda *args, **kwargs: _value("text"))
+        monkeypatch.setattr(main, "curate_resources", lambda *args: _value({"resources": []}))
+        monkeypatch.setattr(main, "write_post", lambda *args, **kwargs: "post.md")
+        monkeypatch.setattr(main, "update_resources", lambda r, profile=None: None)
+        monkeypatch.setattr(main, "git_publish", git_publish)
+
+        with pytest.raises(RuntimeError, match="push rejected"):
+            await main.run_pipeline("finalize-2026-03-01", warm_week=week)
+        # The daemon keeps collecting into the week before finalize is run again
+        ArticleStore().save_articles(week, [(None, articles[3])])
+        await main.run_pipeline("finalize-2026-03-01", resume=True, warm_week=week)
+
+        assert seen == [3, 4]
+
+
+class TestArticleStore:
+    def test_upserts_merge_and_stay_searchable(self, tmp_path):
+        import json
+        from src.store import ArticleStore
+
+        store = ArticleStore(str(tmp_path / "articles.db"))
+        assert store.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        first = RawArticle(title="Gemini 3 released", url="https://a.com/1", source="rss:x", content="short", score=5, tags=["ai"])
+        other = RawArticle(title="Rust 2.0", url="https://b.com/2", source="hackernews", content="borrow checker")
+        ids = store.upsert_articles([first, other])
+
+        longer = first.model_copy(update={"content": "a much longer body about multimodal agents", "score": 3, "tags": ["llm"]})
+        assert store.upsert_articles([longer]) == ids[:1]
+
+        tags, score = store.db.execute("SELECT tags, score FROM articles WHERE id = ?", (ids[0],)).fetchone()
+        assert sorted(json.loads(tags)) == ["ai", "llm"]
+        assert score == 5
+        assert [h["url"] for h in store.search("multimodal")] == ["https://a.com/1"]
+        assert store.search("short") == []
+
+    def test_past_coverage_comes_from_recorded_posts(self, tmp_path):
+        from datetime import date
+        from src.analysis.clustering import StoryCluster
+        from src.store import ArticleStore
+
+        store = ArticleStore(str(tmp_path / "articles.db"))
+        articles = [
+            RawArticle(title="Gemini 3 released", url="https://a.com/1", source="rss:x", content="Google ships Gemini 3"),
+            RawArticle(title="Gemini 3 hands-on", url="https://b.com/2", source="hackernews", content="We tried Gemini"),
+            RawArticle(title="Rust 2.0", url="https://c.com/3", source="hackernews", content="borrow checker"),
+        ]
+        stories = [{"headline": "Google's Gemini 3", "category": "ai-industry", "source_article_indices": [1, 0]}]
+        store.record_post("posts/2026-03-01.md", date(2026, 3, 1), articles, [StoryCluster(0, [0, 1]), StoryCluster(2, [2])], stories)
+        # Rewriting the same post replaces its picks instead of adding to them
+        store.record_post("posts/2026-03-01.md", date(2026, 3, 1), articles, [StoryCluster(0, [0, 1])], stories)
+
+        assert store.coverage("gemini") == [{
+            "week": "2026-03-01",
+            "post": "posts/2026-03-01.md",
+            "headline": "Google's Gemini 3",
+            "category": "ai-industry",
+            "url": "https://a.com/1",
+        }]
+        assert store.coverage("rust") == []
+        assert {h["url"]: h["weeks"] for h in store.search("rust OR gemini")} == {
+            "https://a.com/1": ["2026-03-01"],
+            "https://b.com/2": ["2026-03-01"],
+            "https://c.com/3": [],
+        }
+        assert store.db.execute("SELECT COUNT(*) FROM clusters").fetchone()[0] == 1
+
+    def test_v1_store_is_migrated_in_place(self, tmp_path):
+        import json
+        import sqlite3
+        from datetime import date, datetime, timezone
+        from src.store import ArticleStore
+
+        path = str(tmp_path / "articles.db")
+        old = sqlite3.connect(path)
+        old.executescript("""
+            CREATE TABLE articles (id INTEGER PRIMARY KEY, week TEXT NOT NULL, url TEXT NOT NULL,
+                data TEXT NOT NULL, first_seen REAL NOT NULL, last_seen REAL NOT NULL);
+            CREATE INDEX articles_week ON articles (week);
+            CREATE TABLE fetches (id INTEGER PRIMARY KEY, week TEXT NOT NULL, source TEXT NOT NULL,
+                fetched_at REAL NOT NULL, articles INTEGER NOT NULL, error TEXT);
+            CREATE INDEX fetches_source ON fetches (source, fetched_at);
+            CREATE TABLE weeks (week TEXT PRIMARY KEY, finalized_at REAL);
+        """)
+        # Rows as v1 stored them: the pydantic model's JSON
+        dated = {"title": "Quantum chips", "url": "https://e.com/q", "source": "rss", "content": "short",
+                 "published_at": "2024-03-04T12:00:00Z", "score": None, "tags": []}
+        longer = {**dated, "title": "Quantum chips!", "source": "hn", "content": "a longer body",
+                  "published_at": None, "score": 7, "tags": ["ai"]}
+        other = {**dated, "title": "Open weights", "url": "https://e.com/o", "content": "weights",
+                 "published_at": None}
+        old.executemany(
+            "INSERT INTO articles (week, url, data, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+            [
+                ("2024-03-10", dated["url"], json.dumps(dated), 1.0, 2.0),
+                ("2024-03-10", other["url"], json.dumps(other), 3.0, 3.0),
+                ("2024-03-17", longer["url"], json.dumps(longer), 5.0, 6.0),
+            ],
+        )
+        old.execute("INSERT INTO fetches (week, source, fetched_at, articles) VALUES ('2024-03-10', 'rss', 1.0, 2)")
+        old.execute("INSERT INTO weeks (week, finalized_at) VALUES ('2024-03-10', 9.0)")
+        old.commit()
+        old.close()
+
+        store = ArticleStore(path)
+
+        first = [article for _, article in store.load_week(date(2024, 3, 10))]
+        assert [a.url for a in first] == [dated["url"], other["url"]]
+        # The same URL in two weeks is one article, merged the way upserts merge
+        merged = first[0]
+        assert (merged.title, merged.content, merged.score, merged.tags) == ("Quantum chips!", "a longer body", 7, ["ai"])
+        assert merged.published_at == datetime(2024, 3, 4, 12, tzinfo=timezone.utc)
+        assert [a.url for _, a in store.load_week(date(2024, 3, 17))] == [dated["url"]]
+        assert store.is_finalized(date(2024, 3, 10))
+        assert store.fetch_summary(date(2024, 3, 10))["rss"]["articles"] == 2
+        assert [row["url"] for row in store.search("weights")] == [other["url"]]
+        assert store.db.execute("PRAGMA user_version").fetchone()[0] == 2
+        store.close()
+
+        # Reopening doesn't migrate again
+        assert len(ArticleStore(path).load_week(date(2024, 3, 10))) == 2
+
+    def test_newer_schema_is_left_alone(self, tmp_path):
+        import sqlite3
+        from src.store import ArticleStore
+
+        path = str(tmp_path / "articles.db")
+        newer = sqlite3.connect(path)
+        newer.executescript("CREATE TABLE articles (id INTEGER PRIMARY KEY); PRAGMA user_version = 99;")
+        newer.close()
+
+        with pytest.raises(RuntimeError, match="v99"):
+            ArticleStore(path)
+        assert sqlite3.connect(path).execute("SELECT name FROM sqlite_master").fetchall() == [("articles",)]
+
+
+class TestArticleRecord:
+    def test_bodies_are_spooled_and_memory_stays_flat(self):
+        import tracemalloc
+
+        body = "A long article body about open-weight models and GPUs. " * 400
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            articles = [
+                RawArticle(title=f"Story {i}", url=f"https://example.com/{i}", source="rss:x", content=body)
+                for i in range(500)
+            ]
+            held = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+        # ~11 MB of bodies; only the records themselves stay resident
+        assert held < len(body) * 500 / 20
+        assert articles[123].content == body
+        assert articles[0].content_length == len(body)
+        assert articles[0].head(10) == body[:10]
+
+    def test_round_trips_like_the_pydantic_model(self):
+        import pickle
+        from datetime import datetime, timezone
+
+        article = RawArticle(
+            title="T", url="https://example.com", source="hn", content="é" * 3000,
+            published_at=datetime(2026, 3, 1, tzinfo=timezone.utc), tags=["ai"],
+        )
+        data = article.model_dump(mode="json")
+        assert data["published_at"] == "2026-03-01T00:00:00+00:00"
+        assert RawArticle.model_validate(data) == article
+        assert pickle.loads(pickle.dumps(article)) == article
+        assert article.head(5) == "ééééé"
+
+        copy = article.model_copy(update={"title": "U"})
+        assert copy.shares_body(article) and copy.title == "U" and article.title == "T"
+        assert not article.model_copy(update={"content": "new"}).shares_body(article)
@@ -6,6 +6,7 @@ import tempfile
 import pytest
 import yaml
 
+from src.config import RawArticle
 from src.publisher.markdown_writer import write_post, update_resources
 
 
@@ -54,7 +55,6 @@ class TestMarkdownWriter:
                     "significance": 9,
                     "source_article_indices": [0],
                     "one_line_summary": "A major AI breakthrough.",
-                    "source_url": "https://example.com/story1",
                 },
                 {
                     "headline": "Test Story Two",
@@ -62,7 +62,6 @@ class TestMarkdownWriter:
                     "significance": 7,
                     "source_article_indices": [1],
                     "one_line_summary": "New tech development.",
-                    "source_url": "https://example.com/story2",
                 },
             ]
         }
@@ -80,7 +79,11 @@ class TestMarkdownWriter:
             ]
         }
 
-        post_path = write_post(triage, analysis, resources)
+        articles = [
+            RawArticle(title=f"Story {i}", url=f"https://example.com/story{i}", source="rss:x", content="c")
+            for i in (1, 2)
+        ]
+        post_path = write_post(triage, analysis, resources, source_articles=articles)
         assert os.path.exists(post_path)
         assert post_path.endswith(".md")
 
@@ -112,6 +115,9 @@ class TestMarkdownWriter:
             assert "significance" in story
             assert 1 <= story["significance"] <= 10
             assert "source_url" in story
+        assert [s["source_url"] for s in frontmatter["top_stories"]] == [
+            "https://example.com/story1", "https://example.com/story2",
+        ]
 
         # Verify resources structure
         for resource in frontmatter["resources"]:
@@ -125,6 +131,30 @@ class TestMarkdownWriter:
         body = "---".join(parts[2:])
         assert "## This Week" in body
 
+    def test_write_post_dates_backfilled_week(self, temp_content_dir):
+        from datetime import datetime, timezone
+
+        reference = datetime(2026, 3, 2, tzinfo=timezone.utc)  # Monday after the digest's Sunday
+        post_path = write_post({"stories": []}, "Analysis", {"resources": []}, reference=reference)
+
+        assert os.path.basename(post_path) == "2026-03-01.md"
+        with open(post_path, encoding="utf-8") as f:
+            frontmatter = yaml.safe_load(f.read().split("---")[1])
+        assert frontmatter["week_number"] == 9
+
+    def test_profile_post_goes_to_its_own_directory(self, temp_content_dir, monkeypatch):
+        from src.config import PROFILES
+
+        monkeypatch.setattr("src.publisher.markdown_writer.CONTENT_DIR", str(temp_content_dir / "content"))
+        post_path = write_post({"stories": []}, "Analysis", {"resources": []}, profile=PROFILES["policy"])
+        update_resources({"resources": [{"title": "T", "url": "https://e.com", "type": "tool"}]}, profile=PROFILES["policy"])
+
+        assert os.path.dirname(post_path) == str(temp_content_dir / "content" / "policy" / "posts")
+        with open(post_path, encoding="utf-8") as f:
+            frontmatter = yaml.safe_load(f.read().split("---")[1])
+        assert frontmatter["title"].startswith("AI Policy Weekly — Week of")
+        assert (temp_content_dir / "content" / "policy" / "resources.json").exists()
+
     def test_write_post_validates_categories(self, temp_content_dir):
         """Invalid categories should be corrected to 'tech'."""
         triage = {